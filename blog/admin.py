@@ -1,4 +1,33 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from .models import Post
+from .moderation import ModerationError, moderate, owned_posts
 
-admin.site.register(Post)
\ No newline at end of file
+
+def moderation_action(action, description):
+    def run(modeladmin, request, queryset):
+        try:
+            count = moderate(action, owned_posts(request.user, queryset.values_list('pk', flat=True)))
+        except ModerationError as error:
+            modeladmin.message_user(request, str(error), messages.ERROR)
+            return
+        modeladmin.message_user(request, '%d post(s) affected.' % count, messages.SUCCESS)
+    run.__name__ = '%s_posts' % action
+    run.short_description = description
+    return run
+
+
+@admin.register(Post)
+class PostAdmin(admin.ModelAdmin):
+    list_display = ('title', 'author', 'published_date')
+    list_filter = ('published_date',)
+    actions = [
+        moderation_action('publish', 'Publish selected posts'),
+        moderation_action('unpublish', 'Unpublish selected posts'),
+        moderation_action('delete', 'Delete selected posts'),
+    ]
+
+    def get_actions(self, request):
+        # o delete_selected padrao apaga post a post; o de lote substitui
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
@@ -0,0 +1,97 @@
+from datetime import datetime
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import ExtractMonth, ExtractYear
+from django.utils import timezone
+
+from .models import ArchiveBucket, Post
+
+# Posts publicados por ano/mes. Como blog.stats: as funcoes abaixo ajustam so
+# os meses afetados; rebuild_archive refaz tudo. Os meses seguem o fuso de
+# TIME_ZONE, o mesmo que ExtractYear/ExtractMonth usam no banco.
+
+
+def bucket(date):
+    local = timezone.localtime(date)
+    return local.year, local.month
+
+
+def period(year, month=None):
+    # [inicio, fim) do ano ou do mes, para filtrar published_date por faixa (e
+    # usar o post_published_idx) em vez de extrair ano e mes de cada linha.
+    tz = timezone.get_current_timezone()
+    if month is None:
+        start, end = datetime(year, 1, 1), datetime(year + 1, 1, 1)
+    else:
+        start = datetime(year, month, 1)
+        end = datetime(year + month // 12, month % 12 + 1, 1)
+    return timezone.make_aware(start, tz), timezone.make_aware(end, tz)
+
+
+def _ensure_rows(buckets):
+    ArchiveBucket.objects.bulk_create(
+        [ArchiveBucket(year=year, month=month) for year, month in buckets], ignore_conflicts=True,
+    )
+
+
+def add_published(date):
+    year, month = bucket(date)
+    _ensure_rows([(year, month)])
+    ArchiveBucket.objects.filter(year=year, month=month).update(post_count=F('post_count') + 1)
+
+
+def remove_published(date):
+    year, month = bucket(date)
+    ArchiveBucket.objects.filter(year=year, month=month, post_count__gt=0).update(post_count=F('post_count') - 1)
+
+
+def move_published(old, new):
+    # old/new: published_date antes e depois (None = rascunho)
+    if old and new and bucket(old) == bucket(new):
+        return
+    if old:
+        remove_published(old)
+    if new:
+        add_published(new)
+
+
+def _aggregate(posts):
+    return (posts.filter(published_date__isnull=False)
+            .annotate(year=ExtractYear('published_date'), month=ExtractMonth('published_date'))
+            .values('year', 'month').annotate(count=Count('pk')).order_by()
+            .values_list('year', 'month', 'count'))
+
+
+def refresh_buckets(buckets):
+    # Recalcula do zero so os meses indicados, numa consulta por faixa de datas.
+    buckets = set(buckets)
+    if not buckets:
+        return
+    ranges = [Q(published_date__gte=start, published_date__lt=end)
+              for start, end in (period(year, month) for year, month in buckets)]
+    counts = {(year, month): count for year, month, count in _aggregate(Post.objects.filter(reduce(or_, ranges)))}
+    with transaction.atomic():
+        _ensure_rows(buckets)
+        for year, month in buckets:
+            ArchiveBucket.objects.filter(year=year, month=month).update(post_count=counts.get((year, month), 0))
+
+
+def rebuild_archive(using='default'):
+    with transaction.atomic(using=using):
+        ArchiveBucket.objects.using(using).all().delete()
+        return ArchiveBucket.objects.using(using).bulk_create([
+            ArchiveBucket(year=year, month=month, post_count=count)
+            for year, month, count in _aggregate(Post.objects.using(using).all())
+        ])
+
+
+def archive_tree():
+    # [(ano, total, [(mes, contagem), ...]), ...], mais recentes primeiro
+    years = {}
+    for year, month, count in (ArchiveBucket.objects.filter(post_count__gt=0)
+                               .order_by('-year', '-month').values_list('year', 'month', 'post_count')):
+        years.setdefault(year, []).append((month, count))
+    return [(year, sum(count for month, count in months), months) for year, months in years.items()]
@@ -0,0 +1,165 @@
+import gzip
+import mimetypes
+import re
+
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import ImproperlyConfigured, SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.http import FileResponse, Http404
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # opcional: sem o pacote, so gera as versoes .gz
+    brotli = None
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.txt', '.json', '.xml', '.html')
+# Arquivos com hash no nome nunca mudam de conteudo.
+IMMUTABLE = 'public, max-age=31536000, immutable'
+MUTABLE = 'public, max-age=300'
+
+# Gerado por manage.py download_fonts (nao versionado); sem ele as fontes vem
+# do proprio Google Fonts.
+FONTS_CSS = 'css/fonts.css'
+WEB_FONTS_API = 'https://fonts.googleapis.com/css2'
+
+COMMENT_RE = re.compile(r'/\*.*?\*/', re.S)
+SPACE_RE = re.compile(r'\s+')
+PUNCTUATION_RE = re.compile(r'\s*([{};,>])\s*')
+# Espaco antes de ":" pode ser seletor (".a :hover"); so o depois e removido.
+COLON_RE = re.compile(r':\s+')
+
+
+def css_bundles():
+    return getattr(settings, 'BLOG_CSS_BUNDLES', {})
+
+
+def web_fonts_url():
+    families = getattr(settings, 'BLOG_WEB_FONTS', [])
+    return '%s?%s' % (WEB_FONTS_API, urlencode([('family', family) for family in families] + [('display', 'swap')]))
+
+
+def local_fonts():
+    # Depois do collectstatic vale o manifesto; antes, os diretorios de origem.
+    hashed_files = getattr(staticfiles_storage, 'hashed_files', {})
+    if hashed_files:
+        return FONTS_CSS in hashed_files
+    return finders.find(FONTS_CSS) is not None
+
+
+def bundle_path(name):
+    # Em css/, para que url(../fonts/...) dos arquivos de origem continue valido.
+    return 'css/%s.bundle.css' % name
+
+
+def minify_css(css):
+    css = COMMENT_RE.sub('', css)
+    css = SPACE_RE.sub(' ', css)
+    css = PUNCTUATION_RE.sub(r'\1', css)
+    css = COLON_RE.sub(':', css)
+    return css.replace(';}', '}').strip()
+
+
+def compressed_variants(content):
+    variants = [('.gz', gzip.compress(content, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(content)))
+    return variants
+
+
+class AssetStorage(ManifestStaticFilesStorage):
+    # collectstatic: junta e minifica os CSS de cada pagina (BLOG_CSS_BUNDLES),
+    # poe o hash do conteudo nos nomes (ManifestStaticFilesStorage) e grava ao
+    # lado de cada arquivo com hash as versoes .gz e .br ja comprimidas.
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            yield from super().post_process(paths, dry_run, **options)
+            return
+        paths = dict(paths)
+        for name, sources in css_bundles().items():
+            path = bundle_path(name)
+            paths[path] = (self, path)
+            self.build_bundle(path, sources)
+        yield from super().post_process(paths, dry_run, **options)
+        for hashed_name in set(self.hashed_files.values()):
+            if hashed_name.endswith(COMPRESSIBLE):
+                self.compress(hashed_name)
+
+    def build_bundle(self, path, sources):
+        parts = []
+        for source in sources:
+            if source == FONTS_CSS and not self.exists(source):
+                # sem download_fonts: a pagina liga o Google Fonts (bundle_urls)
+                continue
+            if not self.exists(source):
+                raise ImproperlyConfigured("CSS bundle %s: %s not found." % (path, source))
+            with self.open(source) as stream:
+                parts.append(stream.read().decode('utf-8'))
+        if self.exists(path):
+            self.delete(path)
+        self.save(path, ContentFile(minify_css('\n'.join(parts)).encode('utf-8')))
+
+    def compress(self, name):
+        with self.open(name) as stream:
+            content = stream.read()
+        for suffix, data in compressed_variants(content):
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self.save(name + suffix, ContentFile(data))
+
+    def stored_name(self, name):
+        # Antes do primeiro collectstatic (desenvolvimento, testes) nao ha
+        # manifesto: usa o nome sem hash em vez de falhar.
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            if self.hashed_files:
+                raise
+            return name
+
+
+def bundle_urls(name):
+    # Com o manifesto, um unico arquivo; sem ele, os arquivos de origem.
+    sources = css_bundles()[name]
+    urls = []
+    if FONTS_CSS in sources and not local_fonts():
+        sources = [source for source in sources if source != FONTS_CSS]
+        urls.append(web_fonts_url())
+    path = bundle_path(name)
+    if path in getattr(staticfiles_storage, 'hashed_files', {}):
+        return urls + [staticfiles_storage.url(path)]
+    return urls + [staticfiles_storage.url(source) for source in sources]
+
+
+def serve(request, path):
+    # Para quando o Django serve o STATIC_ROOT (BLOG_SERVE_STATIC): escolhe a
+    # versao pre-comprimida pelo Accept-Encoding e manda cache "immutable" para
+    # os nomes com hash.
+    storage = staticfiles_storage
+    try:
+        exists = storage.exists(path)
+    except SuspiciousFileOperation:
+        exists = False
+    if not exists or path.endswith(('.gz', '.br')):
+        raise Http404(path)
+
+    content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    accepted = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    name, encoding = path, None
+    for candidate, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if candidate in accepted and storage.exists(path + suffix):
+            name, encoding = path + suffix, candidate
+            break
+
+    response = FileResponse(storage.open(name), content_type=content_type)
+    if encoding:
+        response['Content-Encoding'] = encoding
+    patch_vary_headers(response, ['Accept-Encoding'])
+    immutable = path in set(getattr(storage, 'hashed_files', {}).values())
+    response['Cache-Control'] = IMMUTABLE if immutable else MUTABLE
+    return response
@@ -0,0 +1,84 @@
+from asgiref.sync import sync_to_async
+from django.shortcuts import render
+
+from . import views
+from .cache import cache_response
+from .counters import count_view
+from .conditional import conditional_page, list_last_modified, next_scheduled, post_last_modified
+from .feeds import feed_response
+from .replicas import read_from_replica
+
+# Versoes async def das views de leitura, servidas pelo ASGI (mysite.asgi_urls).
+# O Django 3.2 nao tem ORM assincrono: as consultas e o render (que ainda
+# avalia querysets preguicosos e request.user) rodam num unico salto para
+# sync_to_async(thread_sensitive=True), na thread do request, dona da conexao
+# com o banco. O mysite/asgi.py abre um ThreadSensitiveContext por request, para
+# que requests diferentes nao disputem a mesma thread.
+
+
+@sync_to_async(thread_sensitive=True)
+def renderPage(request, page, *args):
+  return render(request, *page(request, *args))
+
+@cache_response('list', 'categories')
+@read_from_replica
+@conditional_page('list', 'categories', last_modified=list_last_modified, expires=next_scheduled)
+async def postList(request):
+  return await renderPage(request, views.postListPage)
+
+@count_view
+@cache_response('post:{pk}', 'categories')
+@read_from_replica
+@conditional_page('post:{pk}', 'categories', last_modified=post_last_modified)
+async def postDetail(request, pk):
+  return await renderPage(request, views.postDetailPage, pk)
+
+@cache_response('category:{id_category}', 'list', 'categories')
+@read_from_replica
+@conditional_page('category:{id_category}', 'list', 'categories', last_modified=list_last_modified, expires=next_scheduled)
+async def postFilter(request, id_category):
+  return await renderPage(request, views.postFilterPage, id_category)
+
+@cache_response('list', 'categories')
+@read_from_replica
+@conditional_page('list', 'categories', last_modified=list_last_modified, expires=next_scheduled)
+async def postCategories(request):
+  return await renderPage(request, views.postCategoriesPage)
+
+@cache_response('list', 'categories')
+@read_from_replica
+@conditional_page('list', 'categories', last_modified=list_last_modified, expires=next_scheduled)
+async def postArchive(request, year, month=None):
+  return await renderPage(request, views.postArchivePage, year, month)
+
+@cache_response('author:{pk}', 'list', 'categories')
+@read_from_replica
+@conditional_page('author:{pk}', 'list', 'categories', last_modified=list_last_modified, expires=next_scheduled)
+async def myPosts(request, pk):
+  return await renderPage(request, views.myPostsPage, pk)
+
+@cache_response('views', 'list', 'categories')
+@read_from_replica
+@conditional_page('views', 'list', 'categories', last_modified=list_last_modified, expires=next_scheduled)
+async def mostViewed(request):
+  return await renderPage(request, views.mostViewedPage)
+
+# O ASGIHandler do Django 3.2 percorre respostas em streaming no event loop,
+# onde o ORM nao pode rodar: os feeds sao montados inteiros na thread do
+# request.
+
+@sync_to_async(thread_sensitive=True)
+def renderFeed(page, *args):
+  return feed_response(stream=False, **page(*args))
+
+@conditional_page('list', last_modified=list_last_modified)
+async def postFeed(request, feed_format):
+  return await renderFeed(views.postFeedPage, request, feed_format)
+
+@conditional_page('category:{id_category}', last_modified=list_last_modified)
+async def categoryFeed(request, id_category, feed_format):
+  return await renderFeed(views.categoryFeedPage, request, id_category, feed_format)
+
+@conditional_page('author:{pk}', last_modified=list_last_modified)
+async def authorFeed(request, pk, feed_format):
+  return await renderFeed(views.authorFeedPage, request, pk, feed_format)
@@ -0,0 +1,221 @@
+import asyncio
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from asgiref.sync import ThreadSensitiveContext, async_to_sync
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, connections, transaction
+from django.test import AsyncClient, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .archive import rebuild_archive
+from .cache import get_cache
+from .models import Category, Post
+from .related import rebuild_related_posts
+from .rendering import refresh_rendered
+from .stats import rebuild_category_stats
+
+WORDS = (
+    'algoritmo dados rede seguranca python django banco consulta indice cache '
+    'desempenho teste servidor cliente pagina categoria busca texto usuario sistema'
+).split()
+
+
+def sentence(rng, size):
+    return ' '.join(rng.choice(WORDS) for _ in range(size))
+
+
+def seed(users=10, posts=1000, categories=20, seed=0, batch_size=1000):
+    # Dados sinteticos reprodutiveis (mesma semente, mesmo banco), gravados com
+    # bulk_create em lotes; ids explicitos porque o banco e novo.
+    rng = random.Random(seed)
+    User = get_user_model()
+    now = timezone.now()
+    password = make_password('benchmark')
+
+    with transaction.atomic():
+        User.objects.bulk_create([
+            User(pk=pk, username='user%d' % pk, password=password) for pk in range(1, users + 1)
+        ])
+        Category.objects.bulk_create([
+            Category(pk=pk, name='Categoria %d' % pk) for pk in range(1, categories + 1)
+        ])
+
+    through = Post.category.through
+    for first in range(1, posts + 1, batch_size):
+        batch, links = [], []
+        for pk in range(first, min(first + batch_size, posts + 1)):
+            created = now - timedelta(minutes=rng.randint(0, 60 * 24 * 365))
+            batch.append(Post(
+                pk=pk,
+                author_id=rng.randint(1, users),
+                title=sentence(rng, 6),
+                subtitle=sentence(rng, 15),
+                text=sentence(rng, 300),
+                created_date=created,
+                # ~10% rascunhos
+                published_date=created if rng.random() > 0.1 else None,
+            ))
+            refresh_rendered(batch[-1])
+            for category in rng.sample(range(1, categories + 1), min(categories, rng.randint(1, 3))):
+                links.append(through(post_id=pk, category_id=category))
+        with transaction.atomic():
+            Post.objects.bulk_create(batch)
+            through.objects.bulk_create(links)
+
+    rebuild_category_stats()
+    rebuild_archive()
+    rebuild_related_posts()
+    return {'users': users, 'posts': posts, 'categories': categories, 'seed': seed}
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(name, send, requests):
+    timings, queries = [], []
+    for i in range(requests):
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            response = send(i)
+            timings.append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            raise AssertionError('%s returned %d' % (name, response.status_code))
+        queries.append(len(context.captured_queries))
+
+    total = sum(timings)
+    return {
+        'requests': requests,
+        'mean_ms': round(statistics.mean(timings) * 1000, 3),
+        'p50_ms': round(percentile(timings, 0.50) * 1000, 3),
+        'p90_ms': round(percentile(timings, 0.90) * 1000, 3),
+        'p99_ms': round(percentile(timings, 0.99) * 1000, 3),
+        'max_ms': round(max(timings) * 1000, 3),
+        'throughput_rps': round(requests / total, 1) if total else None,
+        'queries': statistics.median(queries),
+    }
+
+
+def run(requests=100, seed=0):
+    rng = random.Random(seed)
+    post_ids = list(Post.objects.values_list('pk', flat=True))
+    category_ids = list(Category.objects.values_list('pk', flat=True))
+    author = get_user_model().objects.order_by('pk').first()
+    anonymous = Client()
+    writer = Client()
+    writer.force_login(author)
+
+    def new_post(i):
+        return writer.post(reverse('postNew'), {
+            'title': sentence(rng, 6),
+            'subtitle': sentence(rng, 15),
+            'category': rng.sample(category_ids, 1),
+            'text': sentence(rng, 300),
+        })
+
+    scenarios = {
+        'postList': lambda i: anonymous.get(reverse('postList')),
+        'postDetail': lambda i: anonymous.get(reverse('postDetail', args=[rng.choice(post_ids)])),
+        'postFilter': lambda i: anonymous.get(reverse('postFilter', args=[rng.choice(category_ids)])),
+        'search': lambda i: anonymous.get(reverse('postList'), {'search': rng.choice(WORDS)}),
+        'postNew': new_post,
+    }
+    results = {}
+    for name, send in scenarios.items():
+        get_cache().clear()
+        results[name] = measure(name, send, requests)
+    return results
+
+
+def read_paths(requests, seed):
+    rng = random.Random(seed)
+    post_ids = list(Post.objects.values_list('pk', flat=True))
+    category_ids = list(Category.objects.values_list('pk', flat=True))
+    choices = [
+        lambda: reverse('postList'),
+        lambda: reverse('postDetail', args=[rng.choice(post_ids)]),
+        lambda: reverse('postFilter', args=[rng.choice(category_ids)]),
+    ]
+    return [rng.choice(choices)() for _ in range(requests)]
+
+
+def summarize(timings, wall_time):
+    return {
+        'requests': len(timings),
+        'p50_ms': round(percentile(timings, 0.50) * 1000, 3),
+        'p99_ms': round(percentile(timings, 0.99) * 1000, 3),
+        'throughput_rps': round(len(timings) / wall_time, 1) if wall_time else None,
+    }
+
+
+def run_wsgi(paths, concurrency):
+    # Um Client por thread, como os workers de um servidor WSGI com threads.
+    def send(path):
+        try:
+            start = time.perf_counter()
+            response = Client().get(path)
+            if response.status_code >= 400:
+                raise AssertionError('%s returned %d' % (path, response.status_code))
+            return time.perf_counter() - start
+        finally:
+            connections.close_all()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        timings = list(executor.map(send, paths))
+    return summarize(timings, time.perf_counter() - start)
+
+
+async def run_asgi(paths, concurrency):
+    # Requests concorrentes num unico event loop, no urlconf das views async;
+    # cada um com o seu ThreadSensitiveContext, como no mysite/asgi.py.
+    client = AsyncClient()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send(path):
+        async with semaphore:
+            async with ThreadSensitiveContext():
+                start = time.perf_counter()
+                response = await client.get(path)
+                if response.status_code >= 400:
+                    raise AssertionError('%s returned %d' % (path, response.status_code))
+                return time.perf_counter() - start
+
+    start = time.perf_counter()
+    timings = await asyncio.gather(*[send(path) for path in paths])
+    return summarize(timings, time.perf_counter() - start)
+
+
+def run_concurrent(requests=100, concurrency=10, seed=0):
+    # Mesma mistura de leituras anonimas servida pelo WSGI (threads) e pelo ASGI.
+    paths = read_paths(requests, seed)
+    results = {}
+    get_cache().clear()
+    results['wsgi'] = run_wsgi(paths, concurrency)
+    get_cache().clear()
+    results['asgi'] = async_to_sync(run_asgi)(paths, concurrency)
+    return results
+
+
+def compare(baseline, current):
+    # Variacao percentual de cada metrica em relacao ao baseline.
+    report = {}
+    for view, metrics in current.get('views', {}).items():
+        before = baseline.get('views', {}).get(view)
+        if not before:
+            continue
+        report[view] = {
+            metric: round((value - before[metric]) * 100.0 / before[metric], 1)
+            for metric, value in metrics.items()
+            if metric in ('p50_ms', 'p90_ms', 'p99_ms', 'throughput_rps', 'queries') and before.get(metric)
+        }
+    return report
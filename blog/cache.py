@@ -0,0 +1,184 @@
+import asyncio
+import hashlib
+import math
+import time
+from datetime import datetime, timezone
+from functools import wraps
+from uuid import uuid4
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from .replicas import replica_lag
+
+KEY_PREFIX = 'blog'
+RESPONSE_TIMEOUT = getattr(settings, 'BLOG_CACHE_TIMEOUT', 60 * 60 * 24)
+
+# Cada pagina em cache depende de algumas tags ("list", "post:3",
+# "category:2", ...). Cada tag tem uma versao aleatoria que entra na chave da
+# pagina: invalidar e so trocar a versao da tag, e as paginas antigas deixam de
+# ser encontradas e expiram sozinhas. Uma tag despejada do cache ganha versao
+# nova, entao nunca se serve pagina velha por engano. A versao comeca com o
+# instante da troca (ms): e o que o Last-Modified usa para remocoes e outras
+# mudancas que nao passam pelo last_modified dos posts.
+
+
+def get_cache():
+    return caches[getattr(settings, 'BLOG_CACHE', 'default')]
+
+
+# Caches que cada processo guarda para si: um invalidate() feito no run_jobs ou
+# num comando nao chega ao servidor web.
+PER_PROCESS_BACKENDS = ('django.core.cache.backends.locmem.LocMemCache',)
+
+
+def cache_is_shared():
+    alias = getattr(settings, 'BLOG_CACHE', 'default')
+    return settings.CACHES[alias]['BACKEND'] not in PER_PROCESS_BACKENDS
+
+
+# Aviso dos comandos que invalidam tags (import_posts, render_posts, rebuild_*).
+PER_PROCESS_WARNING = ('BLOG_CACHE is a per-process cache, so this command could not invalidate the pages '
+                       'a running server has cached: restart the server, or use a shared cache.')
+
+
+def tag_key(tag):
+    return '%s:tag:%s' % (KEY_PREFIX, tag)
+
+
+def new_version():
+    return '%d.%s' % (time.time() * 1000, uuid4().hex)
+
+
+def version_time(version):
+    # Versoes antigas, so com o uuid, nao tem instante.
+    stamp, dot, _ = version.partition('.')
+    if not dot or not stamp.isdigit():
+        return None
+    return datetime.fromtimestamp(int(stamp) / 1000, timezone.utc)
+
+
+def tag_versions(tags):
+    cache = get_cache()
+    keys = [tag_key(tag) for tag in tags]
+    versions = cache.get_many(keys)
+    missing = {key: new_version() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def invalidate(*tags):
+    if tags:
+        get_cache().set_many({tag_key(tag): new_version() for tag in set(tags)}, None)
+
+
+def auth_state(request):
+    user = request.user
+    return 'user:%s' % user.pk if user.is_authenticated else 'anon'
+
+
+def response_key(request, auth, tags):
+    raw = '|'.join([request.get_full_path(), auth] + tag_versions(tags))
+    return '%s:view:%s' % (KEY_PREFIX, hashlib.md5(raw.encode()).hexdigest())
+
+
+def cache_enabled(request):
+    return request.method == 'GET' and getattr(settings, 'BLOG_CACHE_VIEWS', True)
+
+
+def caches_user(auth):
+    # Paginas de usuarios logados sao por usuario e quase nao se repetem.
+    return auth == 'anon' or not getattr(settings, 'BLOG_CACHE_ANONYMOUS_ONLY', True)
+
+
+def view_tags(request, tags, kwargs):
+    # Buscas dependem de qualquer post, entao usam a tag "search".
+    if request.GET.get('search'):
+        return ['search', 'categories']
+    return [tag.format(**kwargs) for tag in tags]
+
+
+def lookup(request, auth, tags):
+    key = response_key(request, auth, tags)
+    return key, get_cache().get(key)
+
+
+def response_timeout(response):
+    # Uma replica atrasada pode ter renderizado a pagina com dados de antes da
+    # escrita que trocou as tags: essa pagina vale so ate a replica alcancar.
+    # Uma listagem vale so ate o proximo post agendado aparecer
+    # (blog.conditional.conditional_page, expires).
+    timeout = RESPONSE_TIMEOUT
+    if getattr(response, 'read_replica', None):
+        timeout = min(timeout, replica_lag())
+    expires_at = getattr(response, 'expires_at', None)
+    if expires_at is not None:
+        timeout = min(timeout, math.ceil((expires_at - datetime.now(timezone.utc)).total_seconds()))
+    return max(0, timeout)
+
+
+def store(key, response):
+    if response.status_code == 200 and not response.streaming and not response.cookies:
+        get_cache().set(key, response, response_timeout(response))
+
+
+def revalidate(request, response):
+    # Pagina do cache com ETag/Last-Modified (blog.conditional): o 304 sai dos
+    # headers guardados, sem consultar o banco.
+    return get_conditional_response(
+        request,
+        etag=response.get('ETag'),
+        last_modified=parse_http_date_safe(response.get('Last-Modified')),
+        response=response,
+    ) or response
+
+
+async def async_auth_state(request):
+    # Sem cookie de sessao o usuario e anonimo e nao ha o que buscar no banco;
+    # com cookie, request.user consulta o banco e vai para a thread do request.
+    if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+        return 'anon'
+    return await sync_to_async(auth_state, thread_sensitive=True)(request)
+
+
+def cache_response(*tags):
+    # As tags podem usar os argumentos da url, ex.: cache_response('post:{pk}').
+    def decorator(view):
+        if asyncio.iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if not cache_enabled(request):
+                    return await view(request, *args, **kwargs)
+                auth = await async_auth_state(request)
+                if not caches_user(auth):
+                    return await view(request, *args, **kwargs)
+                # O cache nao usa a conexao do banco: roda em qualquer thread.
+                key, response = await sync_to_async(lookup, thread_sensitive=False)(
+                    request, auth, view_tags(request, tags, kwargs))
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                    await sync_to_async(store, thread_sensitive=False)(key, response)
+                    return response
+                return revalidate(request, response)
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not cache_enabled(request):
+                return view(request, *args, **kwargs)
+            auth = auth_state(request)
+            if not caches_user(auth):
+                return view(request, *args, **kwargs)
+            key, response = lookup(request, auth, view_tags(request, tags, kwargs))
+            if response is None:
+                response = view(request, *args, **kwargs)
+                store(key, response)
+                return response
+            return revalidate(request, response)
+        return wrapper
+    return decorator
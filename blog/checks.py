@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.checks import Error, Warning, register
+
+from .cache import cache_is_shared
+
+# Tarefas do run_jobs que invalidam ou aquecem o cache de paginas precisam de
+# um cache compartilhado com o servidor web (blog.cache.cache_is_shared).
+
+
+@register()
+def check_job_cache(app_configs, **kwargs):
+    if cache_is_shared():
+        return []
+    errors = []
+    if getattr(settings, 'BLOG_RELATED_IN_BACKGROUND', False):
+        errors.append(Error(
+            'BLOG_RELATED_IN_BACKGROUND needs a BLOG_CACHE shared between processes.',
+            hint='run_jobs would refresh related posts without invalidating the pages the web server '
+                 'cached. Use a file, database or memcached cache, or turn the setting off.',
+            id='blog.E001',
+        ))
+    if getattr(settings, 'BLOG_WARM_PAGES', False):
+        errors.append(Warning(
+            'BLOG_WARM_PAGES has no effect with a per-process BLOG_CACHE.',
+            hint='run_jobs would only warm its own cache.',
+            id='blog.W001',
+        ))
+    return errors
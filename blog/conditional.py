@@ -0,0 +1,121 @@
+import asyncio
+import hashlib
+from calendar import timegm
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import DateTimeField, Subquery
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .cache import auth_state, cache_enabled, caches_user, tag_versions, version_time, view_tags
+from .models import Post
+
+
+def post_last_modified(pk, **kwargs):
+    # So a coluna last_modified, sem o corpo do post.
+    return Post.objects.filter(pk=pk).values_list('last_modified', flat=True).first()
+
+
+def list_last_modified(**kwargs):
+    # O maior last_modified (post_last_modified_idx) e a data do post agendado
+    # que apareceu por ultimo (post_published_idx), numa consulta de uma linha.
+    # Remocoes e outras mudancas entram pelas versoes das tags (page_validators).
+    visible = (Post.objects.filter(published_date__lte=timezone.now())
+               .order_by('-published_date').values('published_date')[:1])
+    row = (Post.objects.order_by('-last_modified')
+           .annotate(visible=Subquery(visible, output_field=DateTimeField()))
+           .values_list('last_modified', 'visible').first())
+    return max(filter(None, row), default=None) if row else None
+
+
+def next_scheduled(**kwargs):
+    # Data do proximo post agendado (post_published_idx): a listagem muda
+    # nesse instante sem nenhuma escrita, entao a pagina guardada nao pode
+    # passar dele (blog.cache.response_timeout).
+    return (Post.objects.filter(published_date__gt=timezone.now()).order_by('published_date')
+            .values_list('published_date', flat=True).first())
+
+
+def page_expiry(request, expires, kwargs):
+    # So interessa para a pagina que o cache_response vai guardar.
+    if not (cache_enabled(request) and caches_user(auth_state(request))):
+        return None
+    return expires(**kwargs)
+
+
+def viewer(request):
+    # A pagina muda com o usuario logado; o cookie de sessao identifica o
+    # usuario sem consultar o banco.
+    session = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    return hashlib.md5(session.encode()).hexdigest() if session else 'anon'
+
+
+def last_change(modified, versions):
+    # O mais recente entre o last_modified dos posts e as trocas das tags.
+    return max([when for when in [modified, *map(version_time, versions)] if when is not None], default=None)
+
+
+def page_validators(request, tags, kwargs, modified):
+    # Versoes das tags do cache (blog.cache): mudam em qualquer alteracao que a
+    # pagina mostra, inclusive remocoes, nomes de categorias, contagens de
+    # visualizacoes e posts relacionados. Entram no ETag e, pelo instante de
+    # cada troca, no Last-Modified.
+    versions = tag_versions(view_tags(request, tags, kwargs))
+    raw = '|'.join([modified.isoformat() if modified else '', viewer(request)] + versions)
+    return quote_etag(hashlib.md5(raw.encode()).hexdigest()), last_change(modified, versions)
+
+
+def conditional_response(request, etag, modified):
+    timestamp = timegm(modified.utctimetuple()) if modified else None
+    return get_conditional_response(request, etag=etag, last_modified=timestamp), timestamp
+
+
+def set_validators(response, etag, timestamp):
+    if response.status_code in (200, 304):
+        response.setdefault('ETag', etag)
+        if timestamp is not None:
+            response.setdefault('Last-Modified', http_date(timestamp))
+    return response
+
+
+def conditional_page(*tags, last_modified, expires=None):
+    # ETag/Last-Modified com uma consulta pequena (last_modified) e 304 sem
+    # rodar a view. Usa as mesmas tags de cache_response e fica por dentro dele:
+    # a pagina guardada leva os headers, e um acerto no cache responde 304 sem
+    # consulta nenhuma (blog.cache.revalidate). expires(**kwargs) da o instante
+    # em que a pagina muda sozinha; cache_response nao a guarda alem dele.
+    def decorator(view):
+        if asyncio.iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return await view(request, *args, **kwargs)
+                modified = await sync_to_async(last_modified, thread_sensitive=True)(**kwargs)
+                etag, modified = await sync_to_async(page_validators, thread_sensitive=False)(
+                    request, tags, kwargs, modified)
+                response, timestamp = conditional_response(request, etag, modified)
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                    if expires is not None and response.status_code == 200:
+                        response.expires_at = await sync_to_async(page_expiry, thread_sensitive=True)(
+                            request, expires, kwargs)
+                return set_validators(response, etag, timestamp)
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            modified = last_modified(**kwargs)
+            etag, modified = page_validators(request, tags, kwargs, modified)
+            response, timestamp = conditional_response(request, etag, modified)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if expires is not None and response.status_code == 200:
+                    response.expires_at = page_expiry(request, expires, kwargs)
+            return set_validators(response, etag, timestamp)
+        return wrapper
+    return decorator
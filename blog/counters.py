@@ -0,0 +1,159 @@
+import asyncio
+import atexit
+import logging
+import threading
+import time
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+
+from .cache import invalidate
+from .models import Post
+
+logger = logging.getLogger('blog.counters')
+
+# Visualizacoes de postDetail. Um UPDATE por visita transformaria cada leitura
+# numa escrita (e no SQLite todas disputariam o mesmo lock); aqui as visitas se
+# acumulam num dicionario do processo e vao para o banco de tempos em tempos,
+# num UPDATE ... CASE por lote, depois de BLOG_VIEW_FLUSH_THRESHOLD visitas ou
+# BLOG_VIEW_FLUSH_INTERVAL segundos. Um timer grava as visitas que ficaram
+# paradas no buffer (nenhuma visita nova para disparar o flush; desligado nos
+# testes com BLOG_VIEW_FLUSH_TIMER, veja blog.testrunner) e o atexit
+# grava o resto quando o processo termina; so se perde o buffer de um
+# processo que morre sem passar pelo atexit.
+
+# Dois parametros por post no CASE e mais um no IN.
+FLUSH_CHUNK = 300
+
+
+class ViewBuffer:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {}
+        self.pending = 0
+        self.last_flush = time.monotonic()
+        self.timer = None
+        self.database = None
+
+    def add(self, pk):
+        # Devolve True quando e hora de gravar.
+        interval = getattr(settings, 'BLOG_VIEW_FLUSH_INTERVAL', 10)
+        with self.lock:
+            self.counts[pk] = self.counts.get(pk, 0) + 1
+            self.pending += 1
+            self.database = database_name()
+            if self.timer is None and getattr(settings, 'BLOG_VIEW_FLUSH_TIMER', True):
+                self.timer = threading.Timer(interval, timer_flush)
+                self.timer.daemon = True
+                self.timer.start()
+            return (self.pending >= getattr(settings, 'BLOG_VIEW_FLUSH_THRESHOLD', 100)
+                    or time.monotonic() - self.last_flush >= interval)
+
+    def take(self):
+        with self.lock:
+            counts, self.counts = self.counts, {}
+            self.pending = 0
+            self.last_flush = time.monotonic()
+            return counts
+
+    def restore(self, counts):
+        with self.lock:
+            for pk, count in counts.items():
+                self.counts[pk] = self.counts.get(pk, 0) + count
+                self.pending += count
+
+
+def database_name():
+    return connections[DEFAULT_DB_ALIAS].settings_dict['NAME']
+
+
+buffer = ViewBuffer()
+
+
+def counting_enabled():
+    return getattr(settings, 'BLOG_VIEW_COUNTS', True)
+
+
+def record_view(pk):
+    return buffer.add(int(pk))
+
+
+def write_counts(counts):
+    items = sorted(counts.items())
+    for start in range(0, len(items), FLUSH_CHUNK):
+        chunk = items[start:start + FLUSH_CHUNK]
+        increment = Case(*[When(pk=pk, then=Value(count)) for pk, count in chunk],
+                         output_field=PositiveIntegerField())
+        Post.objects.filter(pk__in=[pk for pk, count in chunk]).update(view_count=F('view_count') + increment)
+
+
+def flush_views():
+    # Sem last_modified: as paginas dos posts nao mostram a contagem, so a
+    # listagem mostViewed (tag "views").
+    counts = buffer.take()
+    if not counts:
+        return 0
+    try:
+        write_counts(counts)
+    except DatabaseError:
+        # banco ocupado: as contagens voltam para o proximo flush e a leitura
+        # que disparou o flush segue normalmente
+        logger.warning('Could not flush %d post views', sum(counts.values()), exc_info=True)
+        buffer.restore(counts)
+        return 0
+    invalidate('views')
+    return sum(counts.values())
+
+
+@atexit.register
+def flush_idle():
+    # Chamado pelo timer e no fim do processo. As contagens so valem para o
+    # banco em que as visitas foram feitas: nos testes o banco de teste ja foi
+    # destruido quando o processo termina.
+    with buffer.lock:
+        buffer.timer = None
+        current = buffer.database == database_name()
+    if not current:
+        buffer.take()
+        return 0
+    return flush_views()
+
+
+def timer_flush():
+    # Roda na thread do timer, que fecha as conexoes que abriu.
+    try:
+        flush_idle()
+    finally:
+        connections.close_all()
+
+
+# Requests do warm_pages (blog.tasks) nao sao visitas.
+NOT_COUNTED_HEADER = 'HTTP_X_BLOG_NOT_COUNTED'
+
+
+def counted(request, response):
+    return (counting_enabled() and request.method == 'GET' and response.status_code in (200, 304)
+            and NOT_COUNTED_HEADER not in request.META)
+
+
+def count_view(view):
+    # Fica por fora de cache_response: acertos no cache e 304 tambem contam.
+    if asyncio.iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            response = await view(request, *args, **kwargs)
+            if counted(request, response) and record_view(kwargs['pk']):
+                await sync_to_async(flush_views, thread_sensitive=True)()
+            return response
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if counted(request, response) and record_view(kwargs['pk']):
+            flush_views()
+        return response
+    return wrapper
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+def sqlite_pragmas():
+    return getattr(settings, 'BLOG_SQLITE_PRAGMAS', {})
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    # Roda uma vez por conexao nova (com CONN_MAX_AGE a conexao e reaproveitada
+    # entre requests). Usa a conexao crua do sqlite3 para nao contar como
+    # consulta da view.
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in sqlite_pragmas().items():
+        connection.connection.execute('PRAGMA %s = %s' % (name, value))
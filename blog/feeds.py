@@ -0,0 +1,171 @@
+import json
+from io import StringIO
+
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.utils.feedgenerator import rfc2822_date, rfc3339_date
+from django.utils.xmlutils import SimplerXMLGenerator
+
+from .cache import RESPONSE_TIMEOUT, cache_enabled, get_cache, response_key, tag_versions, view_tags
+from .conditional import last_change, list_last_modified
+from .models import Post
+
+FEED_TITLE = 'Minimalist'
+CONTENT_TYPES = {
+    'rss': 'application/rss+xml; charset=utf-8',
+    'atom': 'application/atom+xml; charset=utf-8',
+    'json': 'application/feed+json; charset=utf-8',
+}
+
+
+def feed_posts(**filters):
+    # Os BLOG_FEED_SIZE posts mais recentes, lidos com iterator(): nada de
+    # cache de resultados no queryset, cada item vira texto e e descartado.
+    size = getattr(settings, 'BLOG_FEED_SIZE', 20)
+    return (Post.objects.filter(published_date__lte=timezone.now(), **filters)
+            .select_related('author')
+            .only('title', 'excerpt', 'text_html', 'published_date', 'last_modified', 'author__username')
+            .order_by('-published_date', '-pk')[:size]
+            .iterator(chunk_size=size))
+
+
+class Feed:
+    def __init__(self, request, title, link, tags=()):
+        self.request = request
+        self.tags = tags
+        self.title = title
+        self.link = request.build_absolute_uri(link)
+        self.url = request.build_absolute_uri()
+
+    @cached_property
+    def updated(self):
+        # So consultado ao gerar o feed, nao quando ele vem do cache. As tags
+        # trazem as remocoes, que nao mudam o last_modified de nenhum post.
+        return last_change(list_last_modified(), tag_versions(self.tags)) or timezone.now()
+
+    def post_url(self, post):
+        return self.request.build_absolute_uri(reverse('postDetail', args=[post.pk]))
+
+
+def xml_chunks(write_start, write_item, end, feed, posts):
+    # Um pedaco de XML por post: o SimplerXMLGenerator escreve num buffer que
+    # e esvaziado a cada yield.
+    buffer = StringIO()
+    handler = SimplerXMLGenerator(buffer, 'utf-8', short_empty_elements=True)
+    handler.startDocument()
+    write_start(handler, feed)
+    for post in posts:
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        write_item(handler, feed, post)
+    yield buffer.getvalue() + end
+
+
+def rss_start(handler, feed):
+    handler.startElement('rss', {'version': '2.0', 'xmlns:atom': 'http://www.w3.org/2005/Atom'})
+    handler.startElement('channel', {})
+    handler.addQuickElement('title', feed.title)
+    handler.addQuickElement('link', feed.link)
+    handler.addQuickElement('description', feed.title)
+    handler.addQuickElement('atom:link', None, {'rel': 'self', 'href': feed.url})
+    handler.addQuickElement('language', 'pt-br')
+    handler.addQuickElement('lastBuildDate', rfc2822_date(feed.updated))
+
+
+def rss_item(handler, feed, post):
+    handler.startElement('item', {})
+    handler.addQuickElement('title', post.title)
+    handler.addQuickElement('link', feed.post_url(post))
+    handler.addQuickElement('description', post.excerpt)
+    handler.addQuickElement('pubDate', rfc2822_date(post.published_date))
+    handler.addQuickElement('guid', feed.post_url(post), {'isPermaLink': 'true'})
+    handler.endElement('item')
+
+
+def atom_start(handler, feed):
+    handler.startElement('feed', {'xmlns': 'http://www.w3.org/2005/Atom', 'xml:lang': 'pt-br'})
+    handler.addQuickElement('title', feed.title)
+    handler.addQuickElement('link', None, {'rel': 'alternate', 'href': feed.link})
+    handler.addQuickElement('link', None, {'rel': 'self', 'href': feed.url})
+    handler.addQuickElement('id', feed.link)
+    handler.addQuickElement('updated', rfc3339_date(feed.updated))
+
+
+def atom_item(handler, feed, post):
+    handler.startElement('entry', {})
+    handler.addQuickElement('title', post.title)
+    handler.addQuickElement('link', None, {'rel': 'alternate', 'href': feed.post_url(post)})
+    handler.addQuickElement('id', feed.post_url(post))
+    handler.addQuickElement('published', rfc3339_date(post.published_date))
+    handler.addQuickElement('updated', rfc3339_date(post.last_modified))
+    handler.startElement('author', {})
+    handler.addQuickElement('name', post.author.username)
+    handler.endElement('author')
+    handler.addQuickElement('summary', post.excerpt)
+    handler.addQuickElement('content', post.text_html, {'type': 'html'})
+    handler.endElement('entry')
+
+
+def json_chunks(feed, posts):
+    # JSON Feed 1.1: o cabecalho sem o fechamento, um item por vez e o "]}".
+    head = json.dumps({
+        'version': 'https://jsonfeed.org/version/1.1',
+        'title': feed.title,
+        'home_page_url': feed.link,
+        'feed_url': feed.url,
+        'language': 'pt-br',
+    })
+    yield head[:-1] + ', "items": ['
+    separator = ''
+    for post in posts:
+        yield separator + json.dumps({
+            'id': feed.post_url(post),
+            'url': feed.post_url(post),
+            'title': post.title,
+            'summary': post.excerpt,
+            'content_html': post.text_html,
+            'date_published': post.published_date.isoformat(),
+            'date_modified': post.last_modified.isoformat(),
+            'authors': [{'name': post.author.username}],
+        })
+        separator = ', '
+    yield ']}'
+
+
+def feed_chunks(feed_format, feed, posts):
+    if feed_format == 'rss':
+        return xml_chunks(rss_start, rss_item, '</channel></rss>', feed, posts)
+    if feed_format == 'atom':
+        return xml_chunks(atom_start, atom_item, '</feed>', feed, posts)
+    return json_chunks(feed, posts)
+
+
+def store_when_done(key, content_type, chunks):
+    # Guarda o feed no cache so depois de enviado por inteiro; um cliente que
+    # desconecta no meio nao deixa feed pela metade no cache.
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    get_cache().set(key, (content_type, ''.join(parts).encode('utf-8')), RESPONSE_TIMEOUT)
+
+
+def feed_response(request, feed_format, feed, tags, kwargs, filters, stream=True):
+    # Em cache ate a proxima publicacao: as tags sao as mesmas das listagens
+    # (blog.signals troca a versao delas a cada publish/edicao/remocao).
+    content_type = CONTENT_TYPES[feed_format]
+    key = response_key(request, 'feed', view_tags(request, tags, kwargs)) if cache_enabled(request) else None
+    cached = get_cache().get(key) if key else None
+    if cached is not None:
+        return HttpResponse(cached[1], content_type=cached[0])
+
+    chunks = feed_chunks(feed_format, feed, feed_posts(**filters))
+    if key:
+        chunks = store_when_done(key, content_type, chunks)
+    if not stream:
+        return HttpResponse(''.join(chunks), content_type=content_type)
+    return StreamingHttpResponse(chunks, content_type=content_type)
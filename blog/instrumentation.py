@@ -0,0 +1,112 @@
+import json
+import logging
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.backends.django import DjangoTemplates
+
+logger = logging.getLogger('blog.slow_requests')
+
+# Medicoes do request atual; ContextVar funciona tanto em threads (WSGI) quanto
+# em tarefas asyncio (ASGI).
+current_timings = ContextVar('blog_request_timings', default=None)
+
+MAX_LOGGED_QUERIES = 100
+
+
+class RequestTimings:
+    def __init__(self):
+        self.queries = []
+        self.sql_time = 0.0
+        self.template_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper: mede cada consulta, com ou sem DEBUG.
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.sql_time += duration
+            self.queries.append((context['connection'].alias, sql, duration))
+
+
+class TimedTemplate:
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        timings = current_timings.get()
+        if timings is None:
+            return self.template.render(context, request)
+        start = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            timings.template_time += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    # Backend de templates do Django que soma o tempo de render() no request
+    # atual. Inclui as consultas disparadas de dentro do template (querysets
+    # preguicosos), que tambem aparecem no tempo de SQL.
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+class QueryTimingMiddleware:
+    # Opcional: so fica ativo com BLOG_QUERY_TIMING = True.
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'BLOG_QUERY_TIMING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = getattr(settings, 'BLOG_SLOW_REQUEST_MS', 500) / 1000.0
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings))
+                response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        wall_time = time.perf_counter() - start
+
+        response['Server-Timing'] = ', '.join([
+            'db;dur=%.2f;desc="%d queries"' % (timings.sql_time * 1000, len(timings.queries)),
+            'tpl;dur=%.2f' % (timings.template_time * 1000),
+            'total;dur=%.2f' % (wall_time * 1000),
+        ])
+        if wall_time >= self.threshold:
+            self.log_slow_request(request, response, timings, wall_time)
+        return response
+
+    def log_slow_request(self, request, response, timings, wall_time):
+        logger.warning(json.dumps({
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'wall_ms': round(wall_time * 1000, 2),
+            'sql_ms': round(timings.sql_time * 1000, 2),
+            'template_ms': round(timings.template_time * 1000, 2),
+            'query_count': len(timings.queries),
+            'queries': [
+                {'db': alias, 'sql': sql, 'ms': round(duration * 1000, 3)}
+                for alias, sql, duration in timings.queries[:MAX_LOGGED_QUERIES]
+            ],
+        }))
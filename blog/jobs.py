@@ -0,0 +1,113 @@
+import logging
+import traceback
+from datetime import timedelta
+from uuid import uuid4
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger('blog.jobs')
+
+# Fila de tarefas em segundo plano guardada no banco. enqueue() so insere a
+# linha, na mesma transacao da escrita que a gerou; o comando run_jobs executa
+# os jobs, com novas tentativas (backoff exponencial) em caso de erro.
+
+RETRY_DELAY = getattr(settings, 'BLOG_JOBS_RETRY_DELAY', 30)
+# Um job "running" ha mais tempo que isso e de um worker que morreu.
+STALE_AFTER = getattr(settings, 'BLOG_JOBS_STALE_AFTER', 10 * 60)
+
+tasks = {}
+
+
+def task(name):
+    def register(function):
+        tasks[name] = function
+        return function
+    return register
+
+
+def enqueue(name, key=None, payload=None, max_attempts=3, delay=0):
+    enqueue_many(name, {key: payload or {}}, max_attempts, delay)
+
+
+def enqueue_many(name, payloads, max_attempts=3, delay=0):
+    # payloads: {key: payload}, tudo num INSERT so. Com key, um job pendente
+    # igual absorve o novo (INSERT OR IGNORE sobre o indice unico parcial); um
+    # job ja em execucao nao conta, porque pode ter lido os dados antes da
+    # escrita atual.
+    if name not in tasks:
+        raise KeyError('Unknown task: %s' % name)
+    run_after = timezone.now() + timedelta(seconds=delay)
+    Job.objects.bulk_create([
+        Job(name=name, key=key, payload=payload, max_attempts=max_attempts, run_after=run_after)
+        for key, payload in payloads.items()
+    ], ignore_conflicts=True)
+
+
+def claim(limit, worker=None):
+    # Marca ate limit jobs prontos como "running" num unico UPDATE; os jobs
+    # devolvidos sao os que tem o token deste worker, entao dois workers nunca
+    # pegam o mesmo job.
+    worker = worker or uuid4().hex
+    now = timezone.now()
+    ready = Job.objects.filter(
+        Q(status=Job.PENDING, run_after__lte=now)
+        | Q(status=Job.RUNNING, locked_at__lt=now - timedelta(seconds=STALE_AFTER))
+    ).order_by('run_after', 'pk').values('pk')[:limit]
+    with transaction.atomic():
+        Job.objects.filter(pk__in=ready).update(
+            status=Job.RUNNING, locked_by=worker, locked_at=now, attempts=F('attempts') + 1,
+        )
+        return list(Job.objects.filter(status=Job.RUNNING, locked_by=worker, locked_at=now).order_by('pk'))
+
+
+def execute(name, payload):
+    # Roda a tarefa; devolve o traceback em texto (ou None), que atravessa o
+    # ProcessPoolExecutor sem depender da excecao ser serializavel.
+    try:
+        tasks[name](**payload)
+    except Exception:
+        return traceback.format_exc()
+    return None
+
+
+def finish(job, error):
+    now = timezone.now()
+    jobs = Job.objects.filter(pk=job.pk, locked_by=job.locked_by)
+    if error is None:
+        jobs.update(status=Job.DONE, finished_date=now, locked_by=None, last_error='')
+        return True
+    logger.warning('Job %s (%s) failed, attempt %d of %d:\n%s',
+                   job.pk, job.name, job.attempts, job.max_attempts, error)
+    if job.attempts >= job.max_attempts:
+        jobs.update(status=Job.FAILED, finished_date=now, locked_by=None, last_error=error)
+    else:
+        # volta para a fila; se ja existe outro pendente com a mesma key (o
+        # indice unico recusa o update), ele faz o mesmo trabalho e este pode
+        # terminar. Checar antes com exists() deixaria outro worker enfileirar
+        # a key entre a checagem e o update.
+        delay = timedelta(seconds=RETRY_DELAY * 2 ** (job.attempts - 1))
+        try:
+            with transaction.atomic():
+                jobs.update(status=Job.PENDING, run_after=now + delay, locked_by=None, last_error=error)
+        except IntegrityError:
+            jobs.update(status=Job.DONE, finished_date=now, locked_by=None, last_error=error)
+    return False
+
+
+def run_pending(limit=100):
+    # Executa os jobs prontos no proprio processo (testes, --processes 0).
+    jobs = claim(limit)
+    for job in jobs:
+        finish(job, execute(job.name, job.payload))
+    return len(jobs)
+
+
+def purge_finished(days):
+    return Job.objects.filter(
+        status__in=[Job.DONE, Job.FAILED], finished_date__lt=timezone.now() - timedelta(days=days),
+    ).delete()[0]
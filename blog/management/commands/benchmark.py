@@ -0,0 +1,79 @@
+import json
+import os
+import platform
+import tempfile
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import (
+    override_settings, setup_databases, setup_test_environment, teardown_databases, teardown_test_environment,
+)
+
+from blog import benchmark
+
+
+class Command(BaseCommand):
+    help = ('Seeds a synthetic dataset into a throwaway SQLite database and reports latency '
+            'percentiles, throughput and query counts for the blog views as JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--requests', type=int, default=100, help='Requests per view.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--cache', action='store_true', help='Keep the page cache on.')
+        parser.add_argument('--concurrency', type=int, default=0,
+                            help='Also compare WSGI and ASGI serving the read views with this many '
+                                 'requests in flight.')
+        parser.add_argument('--output', help='Write the JSON report here instead of stdout.')
+        parser.add_argument('--compare', help='Previous JSON report to compare against.')
+
+    def handle(self, *args, **options):
+        # Banco descartavel em arquivo (nao em memoria), para medir o I/O real.
+        directory = tempfile.mkdtemp()
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        test_settings['NAME'] = os.path.join(directory, 'benchmark.sqlite3')
+
+        setup_test_environment()
+        try:
+            with override_settings(BLOG_CACHE_VIEWS=options['cache']):
+                old_config = setup_databases(verbosity=0, interactive=False, aliases={'default'})
+                try:
+                    dataset = benchmark.seed(
+                        users=options['users'], posts=options['posts'],
+                        categories=options['categories'], seed=options['seed'],
+                    )
+                    views = benchmark.run(requests=options['requests'], seed=options['seed'])
+                    if options['concurrency']:
+                        concurrent = benchmark.run_concurrent(
+                            requests=options['requests'], concurrency=options['concurrency'],
+                            seed=options['seed'],
+                        )
+                finally:
+                    teardown_databases(old_config, verbosity=0)
+        finally:
+            teardown_test_environment()
+            os.rmdir(directory)
+
+        report = {
+            'dataset': dataset,
+            'cache': options['cache'],
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'views': views,
+        }
+        if options['concurrency']:
+            report['concurrency'] = options['concurrency']
+            report['concurrent'] = concurrent
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as stream:
+                report['change_percent'] = benchmark.compare(json.load(stream), report)
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as stream:
+                stream.write(output + '\n')
+        else:
+            self.stdout.write(output)
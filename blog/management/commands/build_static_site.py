@@ -0,0 +1,79 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from blog.static_site import load_manifest, output_dir, page_fingerprints, render_page, save_manifest
+
+# paginas por tarefa do pool: poucas, para as listagens longas nao prenderem
+# um lote inteiro de posts atras delas
+CHUNK_SIZE = 16
+
+
+class Command(BaseCommand):
+    help = ('Renders the post list, post, category and author pages to static HTML files. '
+            'Only pages whose posts or categories changed since the last build are rendered again.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='Output directory (default: BLOG_STATIC_SITE_DIR).')
+        parser.add_argument('--processes', type=int, default=os.cpu_count(),
+                            help='Rendering processes (0 renders in this process).')
+        parser.add_argument('--force', action='store_true',
+                            help='Render every page, e.g. after changing templates or CSS.')
+
+    def handle(self, *args, **options):
+        directory = Path(options['output']) if options['output'] else output_dir()
+        manifest = load_manifest(directory)
+        fingerprints = page_fingerprints()
+
+        stale = [path for path in manifest if path not in fingerprints]
+        changed = [path for path, fingerprint in fingerprints.items()
+                   if options['force'] or manifest.get(path, {}).get('fingerprint') != fingerprint]
+        for path in stale:
+            self.remove_files(directory, manifest.pop(path)['files'])
+
+        render = partial(render_page, directory=str(directory))
+        previous = [manifest.get(path, {}).get('files', {}) for path in changed]
+        pool = self.make_pool(options['processes'])
+        try:
+            if pool is None:
+                results = map(render, changed, previous)
+            else:
+                results = pool.map(render, changed, previous, chunksize=CHUNK_SIZE)
+            for path, files in zip(changed, results):
+                old_files = manifest.pop(path, {}).get('files', {})
+                self.remove_files(directory, [name for name in old_files if name not in (files or {})])
+                if files:
+                    manifest[path] = {'fingerprint': fingerprints[path], 'files': files}
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            # o manifesto vale para o que ja foi gravado, mesmo se o build parar no meio
+            save_manifest(directory, manifest)
+
+        self.stdout.write(self.style.SUCCESS('Rendered %d of %d pages, removed %d, into %s.' % (
+            len(changed), len(fingerprints), len(stale), directory)))
+
+    def make_pool(self, processes):
+        if not processes:
+            return None
+        # como no run_jobs: spawn, e cada filho abre as proprias conexoes
+        connections.close_all()
+        return ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context('spawn'),
+                                   initializer=django.setup)
+
+    def remove_files(self, directory, names):
+        for name in names:
+            target = directory / name
+            if target.exists():
+                target.unlink()
+            # diretorios que ficaram vazios (post apagado, categoria removida)
+            parent = target.parent
+            while parent != directory and parent.exists() and not any(parent.iterdir()):
+                parent.rmdir()
+                parent = parent.parent
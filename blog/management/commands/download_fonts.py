@@ -0,0 +1,62 @@
+import os
+import re
+import urllib.request
+from urllib.error import URLError
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.assets import web_fonts_url
+
+# O Google Fonts escolhe o formato pelo User-Agent; este recebe woff2.
+USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64; rv:120.0) Gecko/20100101 Firefox/120.0'
+FONT_URL_RE = re.compile(r'url\((https://fonts\.gstatic\.com/[^)]+)\)')
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'static')
+
+
+def fetch(url):
+    request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return response.read()
+
+
+class Command(BaseCommand):
+    help = ('Downloads the BLOG_WEB_FONTS families from Google Fonts into blog/static/fonts and '
+            'writes blog/static/css/fonts.css pointing at the local copies (run before collectstatic).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--static-dir', default=STATIC_DIR)
+
+    def handle(self, *args, **options):
+        families = getattr(settings, 'BLOG_WEB_FONTS', [])
+        if not families:
+            raise CommandError('BLOG_WEB_FONTS is empty.')
+        static_dir = options['static_dir']
+        font_dir = os.path.join(static_dir, 'fonts')
+        os.makedirs(font_dir, exist_ok=True)
+        os.makedirs(os.path.join(static_dir, 'css'), exist_ok=True)
+
+        url = web_fonts_url()
+        try:
+            css = fetch(url).decode('utf-8')
+        except URLError as error:
+            raise CommandError('Could not fetch %s: %s' % (url, error))
+
+        count = 0
+        for url in dict.fromkeys(FONT_URL_RE.findall(css)):
+            filename = os.path.basename(urlsplit(url).path)
+            path = os.path.join(font_dir, filename)
+            if not os.path.exists(path):
+                try:
+                    data = fetch(url)
+                except URLError as error:
+                    raise CommandError('Could not fetch %s: %s' % (url, error))
+                with open(path, 'wb') as stream:
+                    stream.write(data)
+                count += 1
+            css = css.replace('url(%s)' % url, "url('../fonts/%s')" % filename)
+
+        with open(os.path.join(static_dir, 'css', 'fonts.css'), 'w', encoding='utf-8') as stream:
+            stream.write('/* Gerado por manage.py download_fonts. */\n' + css)
+        self.stdout.write(self.style.SUCCESS('Downloaded %d font files.' % count))
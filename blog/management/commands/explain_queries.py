@@ -0,0 +1,66 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.utils import timezone
+
+from blog.models import Post
+from blog.pagination import PAGE_SIZE, keyset_order
+from blog.search import match_query, ranked_sql, search_posts
+
+# "SCAN blog_post" sem "USING ... INDEX" e uma varredura completa da tabela.
+FULL_SCAN_RE = re.compile(r'\bSCAN (?:TABLE )?(\w+)(?: AS \w+)?\s*$')
+
+
+def view_querysets(pk=1, id_category=1, search='post'):
+    # Mesmos formatos de consulta que blog.views executa para a primeira pagina.
+    listing = Post.objects.for_listing()
+    return {
+        'postList': keyset_order(listing.filter(published_date__lte=timezone.now()))[:PAGE_SIZE],
+        'postDetail': Post.objects.filter(pk=pk),
+        'postFilter': keyset_order(listing.filter(category=id_category))[:PAGE_SIZE],
+        'postCategories (any)': keyset_order(listing.in_categories([id_category, id_category + 1])
+                                             .filter(published_date__lte=timezone.now()))[:PAGE_SIZE],
+        'postCategories (all)': keyset_order(listing.in_categories([id_category, id_category + 1], 'all')
+                                             .filter(published_date__lte=timezone.now()))[:PAGE_SIZE],
+        'myPosts': keyset_order(listing.filter(author=pk))[:PAGE_SIZE],
+        'postDraftList': listing.filter(published_date__isnull=True).order_by('created_date'),
+        'search': search_posts(listing, search),
+    }
+
+
+def search_sql(search='post'):
+    return ranked_sql(Post.objects.for_listing(), match_query(search), None, PAGE_SIZE + 1)
+
+
+def full_scans(plan):
+    return [match.group(1) for match in map(FULL_SCAN_RE.search, plan.splitlines()) if match]
+
+
+class Command(BaseCommand):
+    help = 'Runs EXPLAIN QUERY PLAN over the blog views querysets and fails on full table scans.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        database = options['database']
+        if connections[database].vendor != 'sqlite':
+            raise CommandError('explain_queries only understands SQLite query plans.')
+
+        plans = {name: queryset.using(database).explain() for name, queryset in view_querysets().items()}
+        with connections[database].cursor() as cursor:
+            sql, params = search_sql()
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            plans['search (ranking)'] = '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+
+        failures = []
+        for name, plan in plans.items():
+            scans = full_scans(plan)
+            self.stdout.write('%s:\n%s\n' % (name, plan))
+            if scans:
+                failures.append('%s (%s)' % (name, ', '.join(scans)))
+
+        if failures:
+            raise CommandError('Full table scan in: %s' % '; '.join(failures))
+        self.stdout.write(self.style.SUCCESS('No full table scans.'))
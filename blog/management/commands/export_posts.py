@@ -0,0 +1,60 @@
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Streams every post as one JSON object per line (JSONL).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', nargs='?', default='-', help="Output file, '-' for stdout.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        output = options['output']
+        stream = sys.stdout if output == '-' else open(output, 'w', encoding='utf-8')
+        start = time.perf_counter()
+        try:
+            count = self.export(stream, options['batch_size'], options['database'])
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+        elapsed = time.perf_counter() - start
+        self.stderr.write('Exported %d posts in %.2fs (%.0f rows/s).' % (count, elapsed, count / elapsed if elapsed else 0))
+
+    def export(self, stream, batch_size, database):
+        # Percorre por pk em lotes: memoria constante e, por lote, uma consulta
+        # para os posts e outra para as categorias.
+        through = Post.category.through
+        count, last_pk = 0, 0
+        while True:
+            posts = list(
+                Post.objects.using(database).filter(pk__gt=last_pk).order_by('pk')
+                .values_list('pk', 'author__username', 'title', 'subtitle', 'text', 'created_date', 'published_date')
+                [:batch_size]
+            )
+            if not posts:
+                return count
+            categories = {}
+            for post_id, name in (through.objects.using(database).filter(post_id__in=[post[0] for post in posts])
+                                  .order_by('pk').values_list('post_id', 'category__name')):
+                categories.setdefault(post_id, []).append(name)
+
+            for pk, author, title, subtitle, text, created_date, published_date in posts:
+                stream.write(json.dumps({
+                    'author': author,
+                    'title': title,
+                    'subtitle': subtitle,
+                    'text': text,
+                    'categories': categories.get(pk, []),
+                    'created_date': created_date.isoformat(),
+                    'published_date': published_date.isoformat() if published_date else None,
+                }, ensure_ascii=False) + '\n')
+            count += len(posts)
+            last_pk = posts[-1][0]
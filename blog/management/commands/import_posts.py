@@ -0,0 +1,130 @@
+import json
+import sys
+import time
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction, DEFAULT_DB_ALIAS
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from blog.archive import rebuild_archive
+from blog.cache import PER_PROCESS_WARNING, cache_is_shared, invalidate
+from blog.models import Category, Post
+from blog.related import rebuild_related_posts
+from blog.rendering import refresh_rendered
+from blog.stats import rebuild_category_stats
+
+
+def parse_date(value, line_number):
+    if not value:
+        return None
+    date = parse_datetime(value)
+    if date is None:
+        raise CommandError('Line %d: invalid date %r.' % (line_number, value))
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date)
+    return date
+
+
+class Command(BaseCommand):
+    help = 'Bulk imports posts from JSONL (the export_posts format), in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', nargs='?', default='-', help="Input file, '-' for stdin.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        self.database = options['database']
+        User = get_user_model()
+        self.authors = dict(User.objects.using(self.database).values_list(User.USERNAME_FIELD, 'pk'))
+        self.categories = dict(Category.objects.using(self.database).values_list('name', 'pk'))
+
+        source = options['input']
+        stream = sys.stdin if source == '-' else open(source, encoding='utf-8')
+        lines = enumerate(stream, 1)
+        start = time.perf_counter()
+        count = 0
+        try:
+            while True:
+                batch = list(islice(lines, options['batch_size']))
+                if not batch:
+                    break
+                count += self.import_batch(batch)
+                if options['verbosity'] >= 2:
+                    elapsed = time.perf_counter() - start
+                    self.stderr.write('%d posts, %.0f rows/s' % (count, count / elapsed if elapsed else 0))
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+            # Cada lote ja foi gravado: mesmo com erro no meio do arquivo, os
+            # derivados (bulk_create nao dispara signals) e o cache precisam
+            # refletir os lotes anteriores.
+            if count:
+                self.rebuild()
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            'Imported %d posts in %.2fs (%.0f rows/s).' % (count, elapsed, count / elapsed if elapsed else 0)
+        ))
+
+    def rebuild(self):
+        rebuild_category_stats(self.database)
+        rebuild_archive(self.database)
+        rebuild_related_posts(self.database)
+        invalidate('list', 'search', 'categories')
+        if not cache_is_shared():
+            self.stderr.write(self.style.WARNING(PER_PROCESS_WARNING))
+
+    def import_batch(self, batch):
+        rows = []
+        for line_number, line in batch:
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError as error:
+                raise CommandError('Line %d: %s' % (line_number, error))
+            if not isinstance(data, dict):
+                raise CommandError('Line %d: expected a JSON object.' % line_number)
+            author = self.authors.get(data.get('author'))
+            if author is None:
+                raise CommandError('Line %d: unknown author %r.' % (line_number, data.get('author')))
+            post = Post(
+                author_id=author,
+                title=data.get('title', ''),
+                subtitle=data.get('subtitle', ''),
+                text=data.get('text', ''),
+                created_date=parse_date(data.get('created_date'), line_number) or timezone.now(),
+                published_date=parse_date(data.get('published_date'), line_number),
+            )
+            refresh_rendered(post)
+            rows.append((post, data.get('categories') or []))
+
+        with transaction.atomic(using=self.database):
+            posts = [post for post, names in rows]
+            if not connections[self.database].features.can_return_rows_from_bulk_insert:
+                # Sem RETURNING (SQLite no Django 3.2) os ids sao atribuidos aqui,
+                # dentro da transacao; um insert concorrente faz o lote falhar
+                # com IntegrityError em vez de ligar categorias ao post errado.
+                next_pk = (Post.objects.using(self.database).aggregate(Max('pk'))['pk__max'] or 0) + 1
+                for offset, post in enumerate(posts):
+                    post.pk = next_pk + offset
+            Post.objects.using(self.database).bulk_create(posts)
+
+            through = Post.category.through
+            links = []
+            for post, names in rows:
+                for name in dict.fromkeys(names):
+                    links.append(through(post_id=post.pk, category_id=self.category_id(name)))
+            through.objects.using(self.database).bulk_create(links)
+        return len(rows)
+
+    def category_id(self, name):
+        pk = self.categories.get(name)
+        if pk is None:
+            pk = self.categories[name] = Category.objects.using(self.database).create(name=name).pk
+        return pk
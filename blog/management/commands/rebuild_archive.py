@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from blog.archive import rebuild_archive
+from blog.cache import PER_PROCESS_WARNING, cache_is_shared, invalidate
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the per-month published post counts of the date archive from scratch.'
+
+    def handle(self, *args, **options):
+        rows = rebuild_archive()
+        invalidate('list')
+        if not cache_is_shared():
+            self.stderr.write(self.style.WARNING(PER_PROCESS_WARNING))
+        self.stdout.write(self.style.SUCCESS('Rebuilt %d archive months.' % len(rows)))
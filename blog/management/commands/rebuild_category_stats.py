@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from blog.cache import PER_PROCESS_WARNING, cache_is_shared, invalidate
+from blog.stats import rebuild_category_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the per-category post count and latest published date from scratch.'
+
+    def handle(self, *args, **options):
+        rows = rebuild_category_stats()
+        # contagens da barra lateral e das paginas de categoria
+        invalidate('categories')
+        if not cache_is_shared():
+            self.stderr.write(self.style.WARNING(PER_PROCESS_WARNING))
+        self.stdout.write(self.style.SUCCESS('Rebuilt stats for %d categories.' % len(rows)))
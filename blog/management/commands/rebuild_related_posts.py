@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from blog.cache import PER_PROCESS_WARNING, cache_is_shared, invalidate
+from blog.related import rebuild_related_posts
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the related-posts table (shared categories) from scratch.'
+
+    def handle(self, *args, **options):
+        rows = rebuild_related_posts()
+        # todas as paginas de post tem a tag "categories"
+        invalidate('categories')
+        if not cache_is_shared():
+            self.stderr.write(self.style.WARNING(PER_PROCESS_WARNING))
+        self.stdout.write(self.style.SUCCESS('Rebuilt %d related-post entries.' % rows))
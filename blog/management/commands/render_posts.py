@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from blog.cache import PER_PROCESS_WARNING, cache_is_shared, invalidate
+from blog.models import Post
+from blog.rendering import refresh_rendered
+
+FIELDS = ['text_html', 'excerpt', 'text_hash', 'last_modified']
+
+
+class Command(BaseCommand):
+    help = ('Fills text_html/excerpt for posts whose content hash is missing or stale '
+            '(backfill, or after changing the renderer).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        checked = rendered = 0
+        batch = []
+        # bulk_update em lotes e sem signals: so os campos derivados mudam.
+        for post in Post.objects.only('pk', 'subtitle', 'text', 'text_hash').order_by('pk').iterator(chunk_size=batch_size):
+            checked += 1
+            if refresh_rendered(post):
+                # HTML novo: as paginas mudam, os ETags tambem precisam mudar.
+                post.last_modified = timezone.now()
+                batch.append(post)
+            if len(batch) >= batch_size:
+                rendered += self.save_batch(batch)
+                batch = []
+        if batch:
+            rendered += self.save_batch(batch)
+        if rendered and not cache_is_shared():
+            self.stderr.write(self.style.WARNING(PER_PROCESS_WARNING))
+
+        self.stdout.write(self.style.SUCCESS('Rendered %d of %d posts.' % (rendered, checked)))
+
+    def save_batch(self, posts):
+        with transaction.atomic():
+            Post.objects.bulk_update(posts, FIELDS)
+        invalidate(*['post:%s' % post.pk for post in posts])
+        return len(posts)
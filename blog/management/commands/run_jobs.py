@@ -0,0 +1,82 @@
+import multiprocessing
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from uuid import uuid4
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from blog.jobs import claim, execute, finish, purge_finished
+
+
+class Command(BaseCommand):
+    help = ('Runs background jobs from the blog job queue, with a pool of worker processes. '
+            'Failed jobs are retried with exponential backoff.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=2,
+                            help='Worker processes (0 runs the jobs in this process).')
+        parser.add_argument('--batch-size', type=int, default=20, help='Jobs claimed at a time.')
+        parser.add_argument('--sleep', type=float, default=1.0, help='Seconds to wait when the queue is empty.')
+        parser.add_argument('--once', action='store_true', help='Exit when the queue is empty.')
+        parser.add_argument('--purge-days', type=int, default=7,
+                            help='Delete finished jobs older than this many days on startup.')
+
+    def handle(self, *args, **options):
+        worker = uuid4().hex
+        purged = purge_finished(options['purge_days'])
+        if purged:
+            self.stdout.write('Purged %d finished jobs.' % purged)
+        pool = self.make_pool(options['processes'])
+        done = failed = 0
+        try:
+            while True:
+                jobs = claim(options['batch_size'], worker)
+                if not jobs:
+                    if options['once']:
+                        break
+                    time.sleep(options['sleep'])
+                    continue
+                for job, error in self.run_batch(pool, jobs):
+                    if finish(job, error):
+                        done += 1
+                    else:
+                        failed += 1
+                if self.broken:
+                    pool.shutdown(wait=False)
+                    pool = self.make_pool(options['processes'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        self.stdout.write(self.style.SUCCESS('Ran %d jobs, %d failed.' % (done + failed, failed)))
+
+    def make_pool(self, processes):
+        if not processes:
+            return None
+        # spawn em vez de fork: os filhos abrem as proprias conexoes em vez de
+        # herdar as do processo pai.
+        connections.close_all()
+        return ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context('spawn'),
+                                   initializer=django.setup)
+
+    def run_batch(self, pool, jobs):
+        # Um filho que morre (segfault, OOM) quebra o pool: os jobs do lote
+        # voltam para a fila como erro e o pool e recriado.
+        self.broken = False
+        if pool is None:
+            return [(job, execute(job.name, job.payload)) for job in jobs]
+        futures = {pool.submit(execute, job.name, job.payload): job for job in jobs}
+        results = []
+        for future in as_completed(futures):
+            try:
+                error = future.result()
+            except BrokenProcessPool:
+                self.broken = True
+                error = traceback.format_exc()
+            results.append((futures[future], error))
+        return results
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from blog.replicas import copy_to_replica, replica_aliases
+
+
+class Command(BaseCommand):
+    help = ('Copies the primary SQLite database over every alias in BLOG_READ_REPLICAS, '
+            'to exercise replica routing locally.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('aliases', nargs='*', help='Replicas to copy to (default: all).')
+
+    def handle(self, *args, **options):
+        aliases = options['aliases'] or replica_aliases()
+        if not aliases:
+            raise CommandError('No read replicas configured (BLOG_READ_REPLICAS is empty).')
+        for alias in [DEFAULT_DB_ALIAS] + aliases:
+            if alias not in connections:
+                raise CommandError('Unknown database alias %r.' % alias)
+            if connections[alias].vendor != 'sqlite':
+                raise CommandError('sync_replicas only copies SQLite databases; %r is %s.'
+                                   % (alias, connections[alias].vendor))
+        for alias in aliases:
+            copy_to_replica(alias)
+            self.stdout.write('Copied %s to %s.' % (DEFAULT_DB_ALIAS, alias))
+        self.stdout.write(self.style.SUCCESS('Synced %d replicas.' % len(aliases)))
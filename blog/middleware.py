@@ -0,0 +1,35 @@
+import asyncio
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.handlers.asgi import ASGIRequest
+
+
+class AsgiUrlconfMiddleware:
+    # Requests que chegam pelo ASGI resolvem pelo BLOG_ASGI_URLCONF (as views
+    # async def); os do WSGI continuam no ROOT_URLCONF. Funciona nos dois modos
+    # sem salto de thread.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.urlconf = getattr(settings, 'BLOG_ASGI_URLCONF', None)
+        if not self.urlconf:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        self.route(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        self.route(request)
+        return await self.get_response(request)
+
+    def route(self, request):
+        if isinstance(request, ASGIRequest):
+            request.urlconf = self.urlconf
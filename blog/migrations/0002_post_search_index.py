@@ -0,0 +1,18 @@
+from django.db import migrations
+
+from ._search_index import create_search_index, drop_search_index
+
+# Indice FTS5 "external content" sobre blog_post: o texto fica so na tabela
+# original e os triggers mantem o indice em dia inclusive para bulk_create,
+# update() e delete() em massa, que nao disparam signals.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0002_post_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('published_date__isnull', False)), fields=['published_date', 'id'], name='post_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('published_date__isnull', True)), fields=['created_date'], name='post_draft_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', 'published_date', 'id'], name='post_author_published_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:37
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Q
+import django.db.models.deletion
+
+
+def populate_stats(apps, schema_editor):
+    Category = apps.get_model('blog', 'Category')
+    CategoryStats = apps.get_model('blog', 'CategoryStats')
+    rows = Category.objects.annotate(
+        post_count=Count('post', filter=Q(post__published_date__isnull=False)),
+        latest_published_date=Max('post__published_date'),
+    ).values_list('pk', 'post_count', 'latest_published_date')
+    CategoryStats.objects.bulk_create([
+        CategoryStats(category_id=pk, post_count=count, latest_published_date=latest)
+        for pk, count, latest in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_post_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryStats',
+            fields=[
+                ('category', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='blog.category')),
+                ('post_count', models.PositiveIntegerField(default=0)),
+                ('latest_published_date', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.RunPython(populate_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:59
+
+from django.db import migrations, models
+
+from ._search_index import restore_search_triggers
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_categorystats'),
+    ]
+
+    # AddField refaz blog_post no SQLite e apaga os triggers do FTS5.
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_search_triggers),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=300),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(restore_search_triggers, migrations.RunPython.noop),
+    ]
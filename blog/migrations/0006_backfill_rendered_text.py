@@ -0,0 +1,50 @@
+import hashlib
+
+from django.db import migrations
+from django.template.defaultfilters import linebreaksbr
+from django.utils.text import Truncator
+
+BATCH_SIZE = 500
+
+# Copia do blog.rendering (RENDER_VERSION 2) de quando a migration foi escrita:
+# mudancas posteriores na formatacao nao mudam o que ela faz. Posts com hash de
+# outra versao sao refeitos pelo render_posts.
+RENDER_VERSION = 2
+EXCERPT_LENGTH = 300
+
+
+def refresh_rendered(post):
+    digest = hashlib.sha256(('%d|%s|%s' % (RENDER_VERSION, post.subtitle, post.text)).encode()).hexdigest()
+    if digest == post.text_hash:
+        return False
+    post.text_html = str(linebreaksbr(post.text, autoescape=True))
+    post.excerpt = Truncator(' '.join((post.subtitle or post.text).split())).chars(EXCERPT_LENGTH)
+    post.text_hash = digest
+    return True
+
+
+def backfill(apps, schema_editor):
+    # As listagens passam a mostrar o excerpt; posts anteriores ao 0005 ainda
+    # nao o tem. (manage.py render_posts faz o mesmo fora das migrations.)
+    Post = apps.get_model('blog', 'Post')
+    db = schema_editor.connection.alias
+    batch = []
+    for post in Post.objects.using(db).only('pk', 'subtitle', 'text', 'text_hash').order_by('pk').iterator():
+        if refresh_rendered(post):
+            batch.append(post)
+        if len(batch) >= BATCH_SIZE:
+            Post.objects.using(db).bulk_update(batch, ['text_html', 'excerpt', 'text_hash'])
+            batch = []
+    if batch:
+        Post.objects.using(db).bulk_update(batch, ['text_html', 'excerpt', 'text_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_post_rendered_text'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
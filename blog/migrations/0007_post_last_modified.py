@@ -0,0 +1,38 @@
+# Generated by Django 3.2.25 on 2026-10-18 14:04
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+import django.utils.timezone
+
+from ._search_index import restore_search_triggers
+
+
+def backfill(apps, schema_editor):
+    # Sem historico: a ultima mudanca conhecida e a publicacao (ou a criacao).
+    Post = apps.get_model('blog', 'Post')
+    Post.objects.using(schema_editor.connection.alias).update(
+        last_modified=Coalesce('published_date', 'created_date'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_backfill_rendered_text'),
+    ]
+
+    # AddField refaz blog_post no SQLite e apaga os triggers do FTS5.
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_search_triggers),
+        migrations.AddField(
+            model_name='post',
+            name='last_modified',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.RunPython(restore_search_triggers, migrations.RunPython.noop),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['last_modified'], name='post_last_modified_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 3.2.25 on 2026-10-18 14:22
+
+from django.db import migrations, models
+
+from ._search_index import restore_search_triggers
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_job'),
+    ]
+
+    # AddField refaz blog_post no SQLite e apaga os triggers do FTS5.
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_search_triggers),
+        migrations.AddField(
+            model_name='post',
+            name='view_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(restore_search_triggers, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['view_count', 'id'], name='post_view_count_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 3.2.25 on 2026-10-18 14:28
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from blog.related import rebuild_rows, write_rows
+
+
+def populate_related(apps, schema_editor):
+    db = schema_editor.connection.alias
+    write_rows(apps.get_model('blog', 'RelatedPost'), db, rebuild_rows(apps.get_model('blog', 'Post'), db))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_post_view_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedPost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.PositiveIntegerField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_entries', to='blog.post')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='blog.post')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='relatedpost',
+            index=models.Index(fields=['post', 'score'], name='relatedpost_lookup_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='relatedpost',
+            constraint=models.UniqueConstraint(fields=('post', 'related'), name='relatedpost_unique'),
+        ),
+        migrations.RunPython(populate_related, migrations.RunPython.noop),
+    ]
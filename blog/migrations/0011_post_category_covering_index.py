@@ -0,0 +1,18 @@
+from django.db import migrations
+
+# Indice (category_id, post_id) no through table do Post.category, que o
+# Django cria sozinho e nao tem Meta. Os filtros por categoria
+# (PostQuerySet.in_categories) respondem so com este indice, sem ler a tabela.
+INDEX_SQL = 'CREATE INDEX blog_post_category_category_post_idx ON blog_post_category (category_id, post_id)'
+DROP_SQL = 'DROP INDEX blog_post_category_category_post_idx'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_relatedpost'),
+    ]
+
+    operations = [
+        migrations.RunSQL(INDEX_SQL, DROP_SQL),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 3.2.25 on 2026-10-18 14:45
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def populate_archive(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    ArchiveBucket = apps.get_model('blog', 'ArchiveBucket')
+    rows = (Post.objects.filter(published_date__isnull=False)
+            .annotate(year=ExtractYear('published_date'), month=ExtractMonth('published_date'))
+            .values('year', 'month').annotate(count=Count('pk')).order_by()
+            .values_list('year', 'month', 'count'))
+    ArchiveBucket.objects.bulk_create([
+        ArchiveBucket(year=year, month=month, post_count=count) for year, month, count in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0011_post_category_covering_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('post_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='archivebucket',
+            constraint=models.UniqueConstraint(fields=('year', 'month'), name='archivebucket_unique'),
+        ),
+        migrations.RunPython(populate_archive, migrations.RunPython.noop),
+    ]
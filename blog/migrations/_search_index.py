@@ -0,0 +1,58 @@
+# SQL do indice FTS5 de blog_post, compartilhado pelas migrations. O SQLite do
+# Django refaz a tabela (cria, copia, apaga, renomeia) em AddField/AlterField e
+# os triggers somem junto com a tabela antiga: toda migration que refaz
+# blog_post precisa chamar restore_search_triggers no fim.
+# (Arquivos com "_" no inicio nao sao carregados como migrations.)
+
+TABLE_SQL = """CREATE VIRTUAL TABLE blog_post_fts USING fts5(
+    title, subtitle, text,
+    content='blog_post', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+)"""
+
+TRIGGER_SQL = [
+    """CREATE TRIGGER IF NOT EXISTS blog_post_fts_ai AFTER INSERT ON blog_post BEGIN
+        INSERT INTO blog_post_fts(rowid, title, subtitle, text)
+        VALUES (new.id, new.title, new.subtitle, new.text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS blog_post_fts_ad AFTER DELETE ON blog_post BEGIN
+        INSERT INTO blog_post_fts(blog_post_fts, rowid, title, subtitle, text)
+        VALUES ('delete', old.id, old.title, old.subtitle, old.text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS blog_post_fts_au AFTER UPDATE OF title, subtitle, text ON blog_post BEGIN
+        INSERT INTO blog_post_fts(blog_post_fts, rowid, title, subtitle, text)
+        VALUES ('delete', old.id, old.title, old.subtitle, old.text);
+        INSERT INTO blog_post_fts(rowid, title, subtitle, text)
+        VALUES (new.id, new.title, new.subtitle, new.text);
+    END""",
+]
+
+REBUILD_SQL = "INSERT INTO blog_post_fts(blog_post_fts) VALUES ('rebuild')"
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS blog_post_fts_au",
+    "DROP TRIGGER IF EXISTS blog_post_fts_ad",
+    "DROP TRIGGER IF EXISTS blog_post_fts_ai",
+    "DROP TABLE IF EXISTS blog_post_fts",
+]
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in [TABLE_SQL] + TRIGGER_SQL + [REBUILD_SQL]:
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+def restore_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in TRIGGER_SQL:
+        schema_editor.execute(sql)
@@ -2,12 +2,40 @@ from django.conf import settings
 from django.db import models
 from django.utils import timezone
 
+from .rendering import EXCERPT_LENGTH, refresh_rendered
+
 class Category(models.Model):
     name = models.CharField(max_length=200)
 
     def __str__(self):
         return self.name
 
+RENDERED_SOURCE_FIELDS = {'subtitle', 'text'}
+# Escrito so pelo flush de blog.counters; save() nunca grava o valor lido.
+COUNTER_FIELDS = {'view_count'}
+
+class PostQuerySet(models.QuerySet):
+    def for_listing(self, *fields):
+        # Somente o que postList.html mostra: autor e categorias em consultas
+        # fixas por pagina, em vez de duas consultas por post. subtitle, text e
+        # text_html ficam adiados; a listagem mostra o excerpt (tamanho
+        # limitado), entao memoria e bytes lidos crescem com a pagina e nao com
+        # o tamanho dos artigos.
+        return (self.select_related('author')
+                .prefetch_related(models.Prefetch('category', queryset=Category.objects.only('name')))
+                .only('title', 'excerpt', 'published_date', 'author__username', *fields))
+
+    def in_categories(self, category_ids, mode='any'):
+        # Um semi-join no through table (pk IN (SELECT post_id ...)), sem um JOIN
+        # por categoria nem DISTINCT. "all": GROUP BY post_id HAVING COUNT = n.
+        # As duas leem so o indice (category_id, post_id) do through table.
+        category_ids = set(category_ids)
+        links = self.model.category.through.objects.filter(category_id__in=category_ids)
+        if mode == 'all':
+            links = (links.values('post_id').annotate(matched=models.Count('category_id'))
+                     .filter(matched=len(category_ids)))
+        return self.filter(pk__in=links.values('post_id'))
+
 class Post(models.Model):
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     title = models.CharField(max_length=200)
@@ -16,6 +44,51 @@ class Post(models.Model):
     text = models.TextField()
     created_date = models.DateTimeField(default=timezone.now)
     published_date = models.DateTimeField(blank=True, null=True)
+    # Derivados de subtitle/text, refeitos no save() so quando text_hash muda.
+    text_html = models.TextField(blank=True, editable=False)
+    excerpt = models.CharField(max_length=EXCERPT_LENGTH, blank=True, editable=False)
+    text_hash = models.CharField(max_length=64, blank=True, editable=False)
+    # Qualquer mudanca visivel na pagina do post (save, categorias); base do
+    # ETag/Last-Modified em blog.conditional.
+    last_modified = models.DateTimeField(default=timezone.now, editable=False)
+    # Visualizacoes de postDetail, somadas em memoria e gravadas em lote
+    # (blog.counters); pode estar alguns segundos atrasado.
+    view_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = PostQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # postList: published_date <= agora, ordenado por (published_date, pk)
+            models.Index(fields=['published_date', 'id'], name='post_published_idx',
+                         condition=models.Q(published_date__isnull=False)),
+            # postDraftList: published_date IS NULL, ordenado por created_date
+            models.Index(fields=['created_date'], name='post_draft_idx',
+                         condition=models.Q(published_date__isnull=True)),
+            # myPosts: author = pk, ordenado por (published_date, pk)
+            models.Index(fields=['author', 'published_date', 'id'], name='post_author_published_idx'),
+            # Last-Modified das listagens: MAX(last_modified) direto do indice
+            models.Index(fields=['last_modified'], name='post_last_modified_idx'),
+            # mostViewed: ordenado por (view_count, pk) decrescente
+            models.Index(fields=['view_count', 'id'], name='post_view_count_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if kwargs.get('update_fields') is None and not self._state.adding and not kwargs.get('force_insert'):
+            # Um post carregado antes de um flush regravaria o view_count antigo.
+            # Campos adiados tambem ficam de fora, como o Django ja faz.
+            skip = COUNTER_FIELDS | self.get_deferred_fields()
+            kwargs['update_fields'] = [field.name for field in self._meta.concrete_fields
+                                       if not field.primary_key and field.attname not in skip]
+        update_fields = kwargs.get('update_fields')
+        if (not RENDERED_SOURCE_FIELDS & self.get_deferred_fields()
+                and (update_fields is None or RENDERED_SOURCE_FIELDS & set(update_fields))):
+            if refresh_rendered(self) and update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'text_html', 'excerpt', 'text_hash'}
+        self.last_modified = timezone.now()
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = set(kwargs['update_fields']) | {'last_modified'}
+        super().save(*args, **kwargs)
 
     def publish(self):
         self.published_date = timezone.now()
@@ -23,4 +96,83 @@ class Post(models.Model):
         #self.save_m2m()
 
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return self.title
+
+class CategoryStats(models.Model):
+    # Resumo mantido por blog.stats a cada publicacao/remocao/mudanca de
+    # categoria, para nao contar o through table do M2M em cada leitura.
+    category = models.OneToOneField(Category, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    post_count = models.PositiveIntegerField(default=0)
+    latest_published_date = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return '%s (%d)' % (self.category_id, self.post_count)
+
+class ArchiveBucket(models.Model):
+    # Posts publicados por mes (no fuso de TIME_ZONE), mantido por blog.archive
+    # a cada publicacao/remocao; o arquivo lateral le daqui em vez de agrupar
+    # blog_post por strftime.
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    post_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['year', 'month'], name='archivebucket_unique'),
+        ]
+
+    def __str__(self):
+        return '%04d-%02d (%d)' % (self.year, self.month, self.post_count)
+
+class Job(models.Model):
+    # Fila de tarefas em segundo plano (blog.jobs), processada pelo comando
+    # run_jobs. Um job pendente com a mesma key nao e enfileirado de novo.
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(PENDING, 'Pending'), (RUNNING, 'Running'), (DONE, 'Done'), (FAILED, 'Failed')]
+
+    name = models.CharField(max_length=100)
+    key = models.CharField(max_length=200, blank=True, null=True)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=64, blank=True, null=True)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+    created_date = models.DateTimeField(default=timezone.now)
+    finished_date = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['key'], condition=models.Q(status='pending'), name='job_pending_key_unique'),
+        ]
+        indexes = [
+            # proximo lote: status = pending, ordenado por run_after
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx'),
+        ]
+
+    def __str__(self):
+        return '%s (%s)' % (self.name, self.status)
+
+class RelatedPost(models.Model):
+    # Posts parecidos com post (categorias em comum), mantidos por blog.related
+    # para o postDetail nao fazer o self-join do M2M a cada leitura.
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='related_entries')
+    related = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='+')
+    score = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'related'], name='relatedpost_unique'),
+        ]
+        indexes = [
+            # postDetail: post = pk, ordenado por score
+            models.Index(fields=['post', 'score'], name='relatedpost_lookup_idx'),
+        ]
+
+    def __str__(self):
+        return '%s -> %s (%d)' % (self.post_id, self.related_id, self.score)
@@ -0,0 +1,79 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import archive, related, signals, stats
+from .cache import invalidate
+from .models import Post
+from .tasks import queue_related, warm_post_pages
+
+ACTIONS = ('publish', 'unpublish', 'delete')
+
+# Limite de ids por pedido; tambem mantem o "IN (...)" abaixo do limite de
+# variaveis do SQLite.
+MAX_BATCH = getattr(settings, 'BLOG_MODERATION_MAX_BATCH', 500)
+
+
+class ModerationError(Exception):
+    def __init__(self, message, ids=()):
+        super().__init__(message)
+        self.ids = sorted(ids)
+
+
+def owned_posts(user, ids):
+    # Uma consulta so: (pk, author_id) de todos os ids pedidos. Ids que nao
+    # existem sao ignorados (repetir um delete nao falha); posts de outro autor
+    # fazem o pedido inteiro ser recusado, a menos que o usuario seja staff.
+    ids = set(ids)
+    if len(ids) > MAX_BATCH:
+        raise ModerationError('At most %d posts per request' % MAX_BATCH)
+    rows = dict(Post.objects.filter(pk__in=ids).values_list('pk', 'author_id'))
+    if not user.is_staff:
+        foreign = [pk for pk, author_id in rows.items() if author_id != user.pk]
+        if foreign:
+            raise ModerationError('Not allowed to moderate posts of other authors', foreign)
+    return rows
+
+
+def moderate(action, rows):
+    # rows: {pk: author_id}, como devolvido por owned_posts. Tudo numa transacao
+    # com update()/delete() no conjunto; os signals por objeto ficam de fora e a
+    # invalidacao e as estatisticas sao feitas uma vez para o lote todo.
+    if action not in ACTIONS:
+        raise ModerationError('Unknown action: %s' % action)
+    ids = list(rows)
+    if not ids:
+        return 0
+    now = timezone.now()
+    with transaction.atomic():
+        category_ids = set(Post.category.through.objects.filter(post_id__in=ids)
+                           .values_list('category_id', flat=True))
+        posts = Post.objects.filter(pk__in=ids)
+        # meses do arquivo que perdem posts (despublicar/apagar) ou ganham (agora)
+        buckets = {archive.bucket(now)} if action == 'publish' else {
+            archive.bucket(date) for date in posts.filter(published_date__isnull=False)
+            .values_list('published_date', flat=True)
+        }
+        if action == 'publish':
+            count = posts.filter(published_date__isnull=True).update(published_date=now, last_modified=now)
+        elif action == 'unpublish':
+            count = posts.filter(published_date__isnull=False).update(published_date=None, last_modified=now)
+        else:
+            linking = related.linking_posts(ids)
+            with signals.batch():
+                count = posts.delete()[1].get(Post._meta.label, 0)
+        if count:
+            stats.refresh_category_stats(category_ids)
+            archive.refresh_buckets(buckets)
+            if action == 'delete':
+                invalidate(*['post:%s' % pk for pk in linking])
+            else:
+                queue_related(ids)
+            warm_post_pages(ids, set(rows.values()), category_ids, deleted=action == 'delete')
+
+    if count:
+        tags = ['post:%s' % pk for pk in ids]
+        tags += ['author:%s' % pk for pk in set(rows.values())]
+        tags += ['category:%s' % pk for pk in category_ids]
+        invalidate('list', 'search', *tags)
+    return count
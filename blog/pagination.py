@@ -0,0 +1,135 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as DecodeError
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
+
+PAGE_SIZE = getattr(settings, 'BLOG_PAGE_SIZE', 10)
+
+# Paginacao por cursor (keyset) em (published_date, pk) -- ou (search_rank, pk)
+# nas buscas: cada pagina e uma busca no indice a partir da ultima linha vista,
+# sem OFFSET.
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class KeysetPage:
+    def __init__(self, object_list, has_next, has_previous, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def _encode_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, float):
+        return 'f' + repr(value)
+    return 'd' + value.isoformat()
+
+
+def _decode_value(value):
+    if not value:
+        return None
+    if value[0] == 'f':
+        return float(value[1:])
+    date = parse_datetime(value[1:]) if value[0] == 'd' else None
+    if date is None:
+        raise ValueError(value)
+    return date
+
+
+def encode_cursor(direction, post, field='published_date'):
+    raw = '%s|%s|%s' % (direction, _encode_value(getattr(post, field)), post.pk)
+    return urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    if not token:
+        return None
+    try:
+        raw = urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        direction, value, pk = raw.split('|')
+        cursor = direction, _decode_value(value), int(pk)
+    except (DecodeError, UnicodeDecodeError, ValueError):
+        return None
+    if direction not in (NEXT, PREVIOUS):
+        return None
+    return cursor
+
+
+def _after(field, date, pk, inclusive=False):
+    pk_q = Q(pk__gte=pk) if inclusive else Q(pk__gt=pk)
+    if date is None:
+        return Q(**{field + '__isnull': False}) | (Q(**{field + '__isnull': True}) & pk_q)
+    return Q(**{field + '__gt': date}) | (Q(**{field: date}) & pk_q)
+
+
+def _before(field, date, pk):
+    if date is None:
+        return Q(**{field + '__isnull': True, 'pk__lt': pk})
+    return (Q(**{field + '__isnull': True}) | Q(**{field + '__lt': date})
+            | Q(**{field: date, 'pk__lt': pk}))
+
+
+def keyset_order(queryset, field='published_date'):
+    # NULLs primeiro (rascunhos), como o SQLite ja ordena por padrao.
+    return queryset.order_by(F(field).asc(nulls_first=True), 'pk')
+
+
+def paginate(queryset, token, per_page=PAGE_SIZE, field='published_date'):
+    ascending = keyset_order(queryset, field)
+    descending = queryset.order_by(F(field).desc(nulls_last=True), '-pk')
+    cursor = decode_cursor(token)
+    if cursor is not None and isinstance(cursor[1], float):
+        # cursor de busca (bm25) numa listagem por data: volta a primeira pagina
+        cursor = None
+
+    if cursor is None:
+        object_list = ascending[:per_page]
+    elif cursor[0] == NEXT:
+        object_list = ascending.filter(_after(field, cursor[1], cursor[2]))[:per_page]
+    else:
+        # Volta per_page linhas a partir do cursor lendo so as chaves e
+        # reabre a pagina em ordem crescente a partir da menor delas.
+        keys = list(descending.filter(_before(field, cursor[1], cursor[2]))
+                    .values_list(field, 'pk')[:per_page])
+        if keys:
+            start = keys[-1]
+            object_list = ascending.filter(_after(field, start[0], start[1], inclusive=True))[:per_page]
+        else:
+            object_list = ascending[:per_page]
+
+    rows = list(object_list)
+    if not rows:
+        return KeysetPage(object_list, False, False, None, None)
+
+    # Quem chegou por um cursor sabe que existe pagina do lado de onde veio;
+    # so o outro lado precisa de um EXISTS.
+    first, last = rows[0], rows[-1]
+    if cursor is not None and cursor[0] == PREVIOUS:
+        has_next = True
+    else:
+        has_next = ascending.filter(_after(field, getattr(last, field), last.pk)).exists()
+    if cursor is None:
+        has_previous = False
+    elif cursor[0] == NEXT:
+        has_previous = True
+    else:
+        has_previous = ascending.filter(_before(field, getattr(first, field), first.pk)).exists()
+    return KeysetPage(
+        object_list,
+        has_next,
+        has_previous,
+        encode_cursor(NEXT, last, field) if has_next else None,
+        encode_cursor(PREVIOUS, first, field) if has_previous else None,
+    )
@@ -0,0 +1,161 @@
+import heapq
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .cache import invalidate
+from .models import Post, RelatedPost
+
+# Posts relacionados por categorias em comum (score = quantas). Cada post
+# guarda os KEEP mais parecidos entre os publicados; refresh_related atualiza
+# so os posts que mudaram (e as entradas que apontam para eles) a cada escrita,
+# e rebuild_related_posts refaz tudo.
+
+KEEP = getattr(settings, 'BLOG_RELATED_KEEP', 20)
+SHOWN = getattr(settings, 'BLOG_RELATED_SHOWN', 5)
+
+TOP_SQL = '''
+SELECT post_id, related_id, score FROM (
+    SELECT mine.post_id AS post_id, other.post_id AS related_id, COUNT(*) AS score,
+           ROW_NUMBER() OVER (PARTITION BY mine.post_id
+                              ORDER BY COUNT(*) DESC, other.post_id DESC) AS position
+    FROM {through} mine
+    JOIN {through} other ON other.category_id = mine.category_id AND other.post_id <> mine.post_id
+    JOIN {post} p ON p.id = other.post_id AND p.published_date IS NOT NULL
+    WHERE mine.post_id IN ({pks})
+    GROUP BY mine.post_id, other.post_id
+) ranked
+WHERE position <= %s
+'''
+
+SHARED_SQL = '''
+SELECT a.post_id, b.post_id, COUNT(*) FROM {through} a
+JOIN {through} b ON b.category_id = a.category_id
+WHERE a.post_id IN ({left}) AND b.post_id IN ({right})
+GROUP BY a.post_id, b.post_id
+'''
+
+
+def placeholders(values):
+    return ', '.join(['%s'] * len(values))
+
+
+def top_sql(post_model, pks):
+    # Os KEEP mais parecidos de cada post em pks (ROW_NUMBER sobre o self-join
+    # do M2M, so nas categorias destes posts).
+    return TOP_SQL.format(
+        through=post_model.category.through._meta.db_table,
+        post=post_model._meta.db_table,
+        pks=placeholders(pks),
+    )
+
+
+def top_related(categories, members, keep=KEEP):
+    # Mesma ordem do TOP_SQL, sem o self-join (que no rebuild passa por
+    # sum(tamanho da categoria ** 2) linhas). categories: {post: [categorias]};
+    # members: {categoria: [posts publicados, do maior id para o menor]}.
+    # Score >= 2 so pode vir das intersecoes de pares de categorias; o resto
+    # tem score 1 e desempata pelo id, entao basta intercalar as listas.
+    sets = {category: set(ids) for category, ids in members.items()}
+    for pk, mine in categories.items():
+        scores = {}
+        for position, first in enumerate(mine):
+            for second in mine[position + 1:]:
+                for other in sets.get(first, set()) & sets.get(second, set()):
+                    if other != pk and other not in scores:
+                        scores[other] = sum(other in sets.get(category, ()) for category in mine)
+        top = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))[:keep]
+        seen = set(scores) | {pk}
+        if len(top) < keep:
+            for other in heapq.merge(*[members.get(category, []) for category in mine], reverse=True):
+                if other not in seen:
+                    seen.add(other)
+                    top.append((other, 1))
+                    if len(top) >= keep:
+                        break
+        yield pk, top
+
+
+def rebuild_rows(post_model, using):
+    through = post_model.category.through.objects.using(using)
+    categories, members = {}, {}
+    for post_id, category_id in through.order_by('post_id', 'category_id').values_list('post_id', 'category_id'):
+        categories.setdefault(post_id, []).append(category_id)
+    published = (through.filter(post__published_date__isnull=False).order_by('-post_id')
+                 .values_list('category_id', 'post_id'))
+    for category_id, post_id in published:
+        members.setdefault(category_id, []).append(post_id)
+    for pk, top in top_related(categories, members):
+        for other, score in top:
+            yield pk, other, score
+
+
+def write_rows(related_model, using, rows):
+    with connections[using].cursor() as cursor:
+        cursor.executemany('INSERT INTO %s (post_id, related_id, score) VALUES (%%s, %%s, %%s)'
+                           % related_model._meta.db_table, list(rows))
+        return cursor.rowcount
+
+
+def rebuild_related_posts(using='default'):
+    with transaction.atomic(using=using):
+        RelatedPost.objects.using(using).all().delete()
+        return write_rows(RelatedPost, using, rebuild_rows(Post, using))
+
+
+def fetch(sql, params):
+    with connections[RelatedPost.objects.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def refresh_related(pks):
+    # Refaz a lista de cada post em pks e, para os publicados, os coloca na
+    # lista dos posts da propria lista e atualiza o score onde ja estavam. As
+    # listas dos outros podem passar de KEEP ate o proximo rebuild; o
+    # postDetail so le as SHOWN primeiras. Numero fixo de consultas, qualquer
+    # que seja o tamanho de pks (moderacao em lote).
+    pks = sorted(set(pks))
+    if not pks:
+        return
+    published = set(Post.objects.filter(pk__in=pks, published_date__isnull=False).values_list('pk', flat=True))
+    linked = set(RelatedPost.objects.filter(related_id__in=pks).values_list('post_id', 'related_id'))
+
+    top = fetch(top_sql(Post, pks), pks + [KEEP])
+    scores = {(pk, other): score for pk, other, score in top}
+    scores.update({(other, pk): score for pk, other, score in top if pk in published})
+    earlier = [(post_id, related_id) for post_id, related_id in linked
+               if related_id in published and (post_id, related_id) not in scores]
+    if earlier:
+        left = sorted({post_id for post_id, related_id in earlier})
+        right = sorted({related_id for post_id, related_id in earlier})
+        through = Post.category.through._meta.db_table
+        shared = fetch(SHARED_SQL.format(through=through, left=placeholders(left), right=placeholders(right)),
+                       left + right)
+        wanted = set(earlier)
+        scores.update({(a, b): score for a, b, score in shared if (a, b) in wanted})
+
+    with transaction.atomic():
+        RelatedPost.objects.filter(Q(post_id__in=pks) | Q(related_id__in=pks)).delete()
+        RelatedPost.objects.bulk_create([
+            RelatedPost(post_id=post_id, related_id=related_id, score=score)
+            for (post_id, related_id), score in scores.items()
+        ], ignore_conflicts=True)
+
+    # Paginas que mostravam ou passam a mostrar estes posts
+    pages = set(pks) | {post_id for post_id, related_id in linked} | {post_id for post_id, related_id in scores}
+    invalidate(*['post:%s' % pk for pk in pages])
+
+
+def linking_posts(pks):
+    return set(RelatedPost.objects.filter(related_id__in=pks).values_list('post_id', flat=True))
+
+
+def related_posts(pk, count=SHOWN):
+    # Uma consulta pelo relatedpost_lookup_idx, com titulo e data do outro post.
+    return [entry.related for entry in RelatedPost.objects
+            .filter(post_id=pk, related__published_date__lte=timezone.now())
+            .select_related('related').only('related__title', 'related__published_date')
+            .order_by('-score', '-related_id')[:count]]
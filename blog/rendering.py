@@ -0,0 +1,35 @@
+import hashlib
+
+from django.template.defaultfilters import linebreaksbr
+from django.utils.text import Truncator
+
+# Mude quando a formatacao mudar: o hash muda junto e "render_posts" refaz
+# todos os posts.
+RENDER_VERSION = 2
+EXCERPT_LENGTH = 300
+
+
+def content_hash(subtitle, text):
+    return hashlib.sha256(('%d|%s|%s' % (RENDER_VERSION, subtitle, text)).encode()).hexdigest()
+
+
+def render_text(text):
+    # O mesmo que {{ post.text|linebreaksbr }} fazia a cada request.
+    return str(linebreaksbr(text, autoescape=True))
+
+
+def make_excerpt(text, length=EXCERPT_LENGTH):
+    return Truncator(' '.join(text.split())).chars(length)
+
+
+def refresh_rendered(post):
+    # Preenche text_html/excerpt so quando subtitle/text (ou RENDER_VERSION)
+    # mudaram. O excerpt e o resumo das listagens: o subtitulo, ou o comeco do
+    # texto se nao houver subtitulo, limitado a EXCERPT_LENGTH.
+    digest = content_hash(post.subtitle, post.text)
+    if digest == post.text_hash:
+        return False
+    post.text_html = render_text(post.text)
+    post.excerpt = make_excerpt(post.subtitle or post.text)
+    post.text_hash = digest
+    return True
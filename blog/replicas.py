@@ -0,0 +1,112 @@
+import asyncio
+import itertools
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_KEY = 'blog_primary_until'
+
+# Replica escolhida para o request atual (None: tudo no primario).
+current_replica = ContextVar('blog_current_replica', default=None)
+_next_replica = itertools.count()
+
+
+def replica_aliases():
+    return getattr(settings, 'BLOG_READ_REPLICAS', [])
+
+
+def choose_replica():
+    # Round-robin por request, nao por consulta: as leituras de uma mesma pagina
+    # vem de uma replica so e portanto de um mesmo momento da replicacao.
+    aliases = replica_aliases()
+    return aliases[next(_next_replica) % len(aliases)] if aliases else None
+
+
+def pin_to_primary(request):
+    # Read your own writes: depois de gravar, a sessao le do primario ate as
+    # replicas terem tempo de alcancar (BLOG_REPLICA_LAG_SECONDS).
+    if replica_aliases():
+        request.session[PIN_KEY] = time.time() + replica_lag()
+
+
+def pinned(request):
+    if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+        return False
+    return request.session.get(PIN_KEY, 0) > time.time()
+
+
+async def async_pinned(request):
+    if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+        return False
+    return await sync_to_async(pinned, thread_sensitive=True)(request)
+
+
+def mark_replica(response, alias):
+    # Para o cache_response (por fora) saber que a pagina veio de uma replica.
+    response.read_replica = alias
+    return response
+
+
+def replica_lag():
+    return getattr(settings, 'BLOG_REPLICA_LAG_SECONDS', 5)
+
+
+def read_from_replica(view):
+    # Para views somente de leitura: as consultas feitas durante a view (e o
+    # render, que avalia os querysets) vao para uma replica.
+    if asyncio.iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            if not replica_aliases() or await async_pinned(request):
+                return await view(request, *args, **kwargs)
+            alias = choose_replica()
+            token = current_replica.set(alias)
+            try:
+                return mark_replica(await view(request, *args, **kwargs), alias)
+            finally:
+                current_replica.reset(token)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not replica_aliases() or pinned(request):
+            return view(request, *args, **kwargs)
+        alias = choose_replica()
+        token = current_replica.set(alias)
+        try:
+            return mark_replica(view(request, *args, **kwargs), alias)
+        finally:
+            current_replica.reset(token)
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return current_replica.get()
+
+    def db_for_write(self, model, **hints):
+        # Objetos lidos de uma replica sao gravados no primario.
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db in replica_aliases():
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+def copy_to_replica(alias, source=DEFAULT_DB_ALIAS):
+    # Replicacao "manual" para SQLite (desenvolvimento e testes): copia o banco
+    # inteiro com a API de backup do sqlite3, que e consistente mesmo com
+    # gravacoes em andamento no primario.
+    primary, replica = connections[source], connections[alias]
+    primary.ensure_connection()
+    replica.ensure_connection()
+    primary.connection.backup(replica.connection)
@@ -0,0 +1,116 @@
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+from .pagination import NEXT, PAGE_SIZE, PREVIOUS, KeysetPage, decode_cursor, encode_cursor, paginate
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Colunas title, subtitle, text: um termo no titulo pesa mais que no corpo.
+BM25_WEIGHTS = (10.0, 4.0, 1.0)
+RANK = 'bm25(blog_post_fts, %s, %s, %s)' % BM25_WEIGHTS
+
+
+def tokenize(terms):
+    return TOKEN_RE.findall(terms or '')
+
+
+def match_query(terms):
+    # Cada palavra vira um prefixo entre aspas ("algo"*), o que tambem escapa
+    # a sintaxe do FTS5 digitada pelo usuario; as palavras sao combinadas com AND.
+    tokens = tokenize(terms)
+    if not tokens:
+        return None
+    return ' '.join('"%s"*' % token for token in tokens)
+
+
+def uses_fulltext(queryset):
+    return (getattr(settings, 'BLOG_FULLTEXT_SEARCH', True)
+            and connections[queryset.db].vendor == 'sqlite')
+
+
+def search_posts(queryset, terms):
+    # So o filtro, sem ordem de relevancia.
+    query = match_query(terms)
+    if query is None:
+        return queryset.none()
+
+    if uses_fulltext(queryset):
+        return queryset.filter(
+            pk__in=RawSQL('SELECT rowid FROM blog_post_fts WHERE blog_post_fts MATCH %s', (query,)),
+        )
+
+    # Outros bancos: cada palavra em qualquer um dos campos (LIKE), sem ranking.
+    condition = Q()
+    for token in tokenize(terms):
+        condition &= (Q(title__icontains=token) | Q(subtitle__icontains=token)
+                      | Q(text__icontains=token))
+    return queryset.filter(condition)
+
+
+def ranked_sql(queryset, query, cursor, limit):
+    # Uma unica consulta ao FTS5 devolve (rowid, bm25) ja ordenada e com o
+    # keyset aplicado. Os filtros do queryset entram como "+rowid IN (...)":
+    # o "+" impede o FTS5 de usar o IN como lista de rowids, o que refaria o
+    # MATCH uma vez para cada post.
+    sql = 'SELECT rowid, ' + RANK + ' AS search_rank FROM blog_post_fts WHERE blog_post_fts MATCH %s'
+    params = [query]
+    if queryset.query.where:
+        scope_sql, scope_params = queryset.order_by().values('pk').query.sql_with_params()
+        sql += ' AND +rowid IN (' + scope_sql + ')'
+        params += list(scope_params)
+    order = 'search_rank, rowid'
+    if cursor is not None:
+        direction, rank, pk = cursor
+        if direction == NEXT:
+            sql += ' AND (search_rank > %s OR (search_rank = %s AND rowid > %s))'
+        else:
+            sql += ' AND (search_rank < %s OR (search_rank = %s AND rowid < %s))'
+            order = 'search_rank DESC, rowid DESC'
+        params += [rank, rank, pk]
+    return sql + ' ORDER BY ' + order + ' LIMIT %s', params + [limit]
+
+
+def search_page(queryset, terms, token, per_page=PAGE_SIZE):
+    query = match_query(terms)
+    if query is None or not uses_fulltext(queryset):
+        return paginate(search_posts(queryset, terms), token, per_page)
+
+    cursor = decode_cursor(token)
+    if cursor is not None and not isinstance(cursor[1], float):
+        cursor = None
+    with connections[queryset.db].cursor() as db:
+        db.execute(*ranked_sql(queryset, query, cursor, per_page + 1))
+        rows = db.fetchall()
+
+    # Uma linha a mais diz se ha pagina seguinte (ou anterior) sem outro EXISTS.
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    backward = cursor is not None and cursor[0] == PREVIOUS
+    if backward:
+        rows.reverse()
+    ranks = dict(rows)
+    ids = [pk for pk, rank in rows]
+
+    object_list = queryset.filter(pk__in=ids).order_by(
+        Case(*[When(pk=pk, then=Value(position)) for position, pk in enumerate(ids)],
+             output_field=IntegerField())
+    ) if ids else queryset.none()
+    posts = list(object_list)
+    if not posts:
+        return KeysetPage(object_list, False, False, None, None)
+    for post in posts:
+        post.search_rank = ranks[post.pk]
+
+    has_next = more if not backward else True
+    has_previous = more if backward else cursor is not None
+    return KeysetPage(
+        object_list,
+        has_next,
+        has_previous,
+        encode_cursor(NEXT, posts[-1], 'search_rank') if has_next else None,
+        encode_cursor(PREVIOUS, posts[0], 'search_rank') if has_previous else None,
+    )
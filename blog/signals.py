@@ -0,0 +1,156 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import archive, related, stats
+from .cache import invalidate
+from .models import Category, Post
+from .tasks import queue_related, warm_post_pages
+
+
+# Operacoes em lote (blog.moderation) fazem a invalidacao e as estatisticas de
+# uma vez so; enquanto isso os signals de delete do Post nao fazem nada.
+batch_mode = ContextVar('blog_signals_batch_mode', default=False)
+
+
+@contextmanager
+def batch():
+    token = batch_mode.set(True)
+    try:
+        yield
+    finally:
+        batch_mode.reset(token)
+
+
+def post_category_ids(post):
+    return list(Post.category.through.objects.filter(post_id=post.pk).values_list('category_id', flat=True))
+
+
+def post_tags(post, category_ids, published):
+    tags = ['post:%s' % post.pk, 'author:%s' % post.author_id, 'search']
+    tags += ['category:%s' % pk for pk in category_ids]
+    if published:
+        tags.append('list')
+    return tags
+
+
+def touch_posts(pks):
+    # update() em vez de save(): so a data, sem disparar os signals do Post.
+    Post.objects.filter(pk__in=pks).update(last_modified=timezone.now())
+
+
+@receiver(pre_save, sender=Post)
+def remember_post(sender, instance, raw=False, **kwargs):
+    instance._previous = None
+    if instance.pk and not raw:
+        instance._previous = Post.objects.filter(pk=instance.pk).values('author_id', 'published_date').first()
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous', None)
+    was_published = previous['published_date'] if previous else None
+    is_published = instance.published_date
+    # Post novo ainda nao tem categorias: o m2m_changed do save_m2m cuida delas.
+    category_ids = [] if created else post_category_ids(instance)
+
+    tags = post_tags(instance, category_ids, bool(is_published or was_published))
+    if previous and previous['author_id'] != instance.author_id:
+        tags.append('author:%s' % previous['author_id'])
+    invalidate(*tags)
+    if is_published or was_published:
+        author_ids = {instance.author_id, previous['author_id']} if previous else {instance.author_id}
+        warm_post_pages([instance.pk], author_ids, category_ids)
+
+    if bool(is_published) != bool(was_published) and not created:
+        queue_related([instance.pk])
+    elif is_published:
+        # titulo ou data mudaram nas paginas que listam este post como relacionado
+        invalidate(*['post:%s' % pk for pk in related.linking_posts([instance.pk])])
+
+    archive.move_published(was_published, is_published)
+    if is_published and not was_published:
+        stats.add_published(category_ids, is_published)
+    elif was_published and not is_published:
+        stats.remove_published(category_ids)
+    elif is_published and is_published != was_published:
+        if is_published > was_published:
+            stats.move_latest(category_ids, is_published)
+        else:
+            stats.refresh_latest(category_ids)
+
+
+@receiver(pre_delete, sender=Post)
+def remember_post_categories(sender, instance, **kwargs):
+    if batch_mode.get():
+        return
+    instance._category_ids = post_category_ids(instance)
+    instance._linking_ids = related.linking_posts([instance.pk])
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    if batch_mode.get():
+        return
+    category_ids = getattr(instance, '_category_ids', [])
+    invalidate(*post_tags(instance, category_ids, instance.published_date is not None))
+    invalidate(*['post:%s' % pk for pk in getattr(instance, '_linking_ids', [])])
+    if instance.published_date:
+        warm_post_pages([], [instance.author_id], category_ids, deleted=True)
+        stats.remove_published(category_ids)
+        archive.remove_published(instance.published_date)
+
+
+@receiver(m2m_changed, sender=Post.category.through)
+def post_categories_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        # Category.post_set.add(...): raro, invalida tudo que mostra categorias.
+        if action == 'pre_clear':
+            instance._post_ids = list(Post.objects.filter(category=instance).values_list('pk', flat=True))
+        elif action.startswith('post_'):
+            if action == 'post_clear':
+                pk_set = getattr(instance, '_post_ids', [])
+            if pk_set:
+                touch_posts(pk_set)
+                queue_related(pk_set)
+            invalidate('categories')
+            stats.refresh_category_stats([instance.pk])
+        return
+
+    if action == 'pre_clear':
+        instance._category_ids = post_category_ids(instance)
+        return
+    if action == 'pre_remove':
+        # O post_remove recebe todos os ids pedidos, mesmo os que nao eram
+        # categorias do post; o post_add ja recebe so os novos.
+        instance._removed_ids = set(post_category_ids(instance)) & set(pk_set)
+        return
+    if action == 'post_clear':
+        pk_set = getattr(instance, '_category_ids', [])
+    elif action == 'post_remove':
+        pk_set = getattr(instance, '_removed_ids', set())
+    elif action != 'post_add':
+        return
+    if not pk_set:
+        return
+
+    touch_posts([instance.pk])
+    queue_related([instance.pk])
+    invalidate(*post_tags(instance, pk_set, instance.published_date is not None))
+    if instance.published_date:
+        warm_post_pages([instance.pk], [instance.author_id], pk_set)
+        if action == 'post_add':
+            stats.add_published(pk_set, instance.published_date)
+        else:
+            stats.remove_published(pk_set)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_categories(sender, **kwargs):
+    invalidate('categories')
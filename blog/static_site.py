@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import re
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from .counters import NOT_COUNTED_HEADER
+from .models import ArchiveBucket, Category, Post, RelatedPost
+from .tasks import warm_host
+
+# Exportacao do blog em HTML estatico (comando build_static_site). Cada pagina
+# (postList, postDetail, postFilter, myPosts) vira <caminho>/index.html; as
+# paginas seguintes da listagem viram <caminho>/cursor/<cursor>.html, para o
+# servidor web mapear ?cursor=... para o arquivo. O manifesto guarda, por
+# pagina, uma impressao digital dos dados que ela mostra e o hash de cada
+# arquivo: a proxima execucao so renderiza as paginas cujas impressoes mudaram
+# e so regrava os arquivos cujo HTML mudou.
+
+MANIFEST = '.manifest.json'
+
+# Links de paginacao do postList.html; fora dos testes o Client nao guarda o contexto.
+NEXT_RE = re.compile(rb'class="pageNext" href="\?cursor=([\w-]+)')
+PREVIOUS_RE = re.compile(rb'class="pagePrevious" href="\?cursor=([\w-]+)')
+
+_client = None
+
+
+def output_dir():
+    return Path(getattr(settings, 'BLOG_STATIC_SITE_DIR', settings.BASE_DIR / 'site'))
+
+
+def _digest(*parts):
+    return hashlib.md5(json.dumps(parts, default=str).encode()).hexdigest()
+
+
+def page_fingerprints(now=None):
+    # {caminho: impressao}, com um punhado de consultas para o blog todo e sem
+    # renderizar nada. As listagens dependem tambem da barra lateral (nomes
+    # das categorias e contagens do arquivo).
+    now = now or timezone.now()
+    posts = {pk: row for pk, *row in Post.objects.order_by('pk').values_list(
+        'pk', 'author_id', 'last_modified', 'published_date')}
+    usernames = dict(User.objects.filter(post__isnull=False).distinct().values_list('pk', 'username'))
+    categories = dict(Category.objects.order_by('pk').values_list('pk', 'name'))
+    post_categories = defaultdict(list)
+    for post_id, category_id in Post.category.through.objects.order_by('post_id', 'category_id').values_list(
+            'post_id', 'category_id'):
+        post_categories[post_id].append(category_id)
+    related = defaultdict(list)
+    for post_id, related_id in RelatedPost.objects.order_by('post_id', '-score', '-related_id').values_list(
+            'post_id', 'related_id'):
+        related[post_id].append(related_id)
+    sidebar = _digest(categories, list(ArchiveBucket.objects.order_by('year', 'month').values_list(
+        'year', 'month', 'post_count')))
+
+    def entry(pk):
+        author_id, last_modified, published_date = posts[pk]
+        return pk, usernames.get(author_id), last_modified, published_date, post_categories[pk]
+
+    def published(pk):
+        return posts[pk][2] is not None and posts[pk][2] <= now
+
+    # listagens primeiro: sao as mais longas (seguem o cursor pagina a pagina)
+    # e nao devem ficar para o fim do pool
+    pages = {reverse('postList'): _digest(sidebar, [entry(pk) for pk in posts if published(pk)])}
+    by_category = defaultdict(list)
+    for pk, category_ids in post_categories.items():
+        for category_id in category_ids:
+            by_category[category_id].append(pk)
+    for category_id in categories:
+        pages[reverse('postFilter', args=[category_id])] = _digest(
+            sidebar, [entry(pk) for pk in sorted(by_category[category_id])])
+    by_author = defaultdict(list)
+    for pk, (author_id, last_modified, published_date) in posts.items():
+        by_author[author_id].append(pk)
+    for author_id, pks in by_author.items():
+        pages[reverse('myPosts', args=[author_id])] = _digest(sidebar, [entry(pk) for pk in pks])
+    for pk in posts:
+        if published(pk):
+            # os relacionados aparecem com titulo e so se ja publicados
+            shown = [(other, posts[other][1], published(other)) for other in related[pk]]
+            pages[reverse('postDetail', args=[pk])] = _digest(
+                entry(pk), [categories.get(category_id) for category_id in post_categories[pk]], shown)
+    return pages
+
+
+def load_manifest(directory):
+    try:
+        with open(directory / MANIFEST) as manifest:
+            return json.load(manifest)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(directory, manifest):
+    _write(directory / MANIFEST, json.dumps(manifest, indent=1, sort_keys=True).encode())
+
+
+def _write(target, content):
+    # Grava ao lado e troca de uma vez: o servidor nunca le um arquivo pela metade.
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temporary = target.with_name('.%s.tmp' % target.name)
+    temporary.write_bytes(content)
+    os.replace(temporary, target)
+
+
+def _file_name(path, cursor=None):
+    base = path.strip('/')
+    name = 'index.html' if cursor is None else 'cursor/%s.html' % cursor
+    return '%s/%s' % (base, name) if base else name
+
+
+def _save(directory, previous_files, files, name, content):
+    digest = hashlib.sha256(content).hexdigest()
+    if previous_files.get(name) != digest or not (directory / name).exists():
+        _write(directory / name, content)
+    files[name] = digest
+
+
+def render_page(path, previous_files, directory):
+    # Roda nos processos do pool: renderiza a pagina (e as seguintes, seguindo
+    # o cursor da listagem) com o mesmo Client do warm_pages e devolve
+    # {arquivo: hash}, ou None se a pagina nao existe mais. Arquivos com o
+    # mesmo hash da execucao anterior nao sao regravados.
+    global _client
+    if _client is None:
+        _client = Client(HTTP_HOST=warm_host(), **{NOT_COUNTED_HEADER: '1'})
+    directory = Path(directory)
+    files = {}
+    cursor = last = None
+    while True:
+        response = _client.get(path, {'cursor': cursor} if cursor else {})
+        if response.status_code != 200:
+            return files or None
+        content = response.content
+        _save(directory, previous_files, files, _file_name(path, cursor), content)
+        previous = PREVIOUS_RE.search(content)
+        if previous and last is not None:
+            # O link "Anteriores" usa um cursor proprio, que abre exatamente a
+            # pagina anterior: o arquivo dele e uma copia dela.
+            _save(directory, previous_files, files, _file_name(path, previous.group(1).decode()), last)
+        following = NEXT_RE.search(content)
+        if following is None:
+            return files
+        cursor, last = following.group(1).decode(), content
@@ -0,0 +1,71 @@
+from django.db import transaction
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery
+
+from .models import Category, CategoryStats, Post
+
+# Contagem e data do ultimo post publicado por categoria. As funcoes abaixo
+# ajustam so as categorias afetadas; rebuild_category_stats refaz tudo.
+
+
+def _ensure_rows(category_ids):
+    CategoryStats.objects.bulk_create(
+        [CategoryStats(category_id=pk) for pk in category_ids], ignore_conflicts=True,
+    )
+
+
+def refresh_latest(category_ids):
+    latest = (Post.objects.filter(category=OuterRef('category_id'), published_date__isnull=False)
+              .order_by('-published_date').values('published_date')[:1])
+    CategoryStats.objects.filter(category_id__in=category_ids).update(latest_published_date=Subquery(latest))
+
+
+def add_published(category_ids, published_date):
+    category_ids = list(category_ids)
+    if not category_ids:
+        return
+    _ensure_rows(category_ids)
+    CategoryStats.objects.filter(category_id__in=category_ids).update(post_count=F('post_count') + 1)
+    move_latest(category_ids, published_date)
+
+
+def remove_published(category_ids):
+    category_ids = list(category_ids)
+    if not category_ids:
+        return
+    _ensure_rows(category_ids)
+    CategoryStats.objects.filter(category_id__in=category_ids, post_count__gt=0).update(post_count=F('post_count') - 1)
+    refresh_latest(category_ids)
+
+
+def move_latest(category_ids, published_date):
+    # Data mais nova so pode avancar o "ultimo post"; qualquer outra mudanca
+    # pede o MAX de novo.
+    CategoryStats.objects.filter(
+        Q(latest_published_date__isnull=True) | Q(latest_published_date__lt=published_date),
+        category_id__in=category_ids,
+    ).update(latest_published_date=published_date)
+
+
+def _aggregate(categories):
+    return categories.annotate(
+        post_count=Count('post', filter=Q(post__published_date__isnull=False)),
+        latest_published_date=Max('post__published_date'),
+    ).values_list('pk', 'post_count', 'latest_published_date')
+
+
+def refresh_category_stats(category_ids):
+    # Recalcula do zero so as categorias indicadas.
+    with transaction.atomic():
+        for pk, count, latest in _aggregate(Category.objects.filter(pk__in=list(category_ids))):
+            CategoryStats.objects.update_or_create(
+                category_id=pk, defaults={'post_count': count, 'latest_published_date': latest},
+            )
+
+
+def rebuild_category_stats(using='default'):
+    with transaction.atomic(using=using):
+        CategoryStats.objects.using(using).all().delete()
+        return CategoryStats.objects.using(using).bulk_create([
+            CategoryStats(category_id=pk, post_count=count, latest_published_date=latest)
+            for pk, count, latest in _aggregate(Category.objects.using(using).all())
+        ])
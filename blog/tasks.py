@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.test import Client
+from django.urls import reverse
+
+from . import related
+from .counters import NOT_COUNTED_HEADER
+from .jobs import enqueue_many, task
+
+# Tarefas do blog para o run_jobs. warm_pages regera no cache as paginas que
+# uma escrita acabou de invalidar, para o proximo visitante nao pagar o custo.
+# Precisa de um cache compartilhado entre processos (arquivo, memcached...):
+# com o LocMemCache o worker aquece so o proprio cache. refresh_related
+# recalcula os posts relacionados fora da requisicao que publicou ou mudou as
+# categorias.
+
+
+def warm_host():
+    hosts = [host for host in settings.ALLOWED_HOSTS if not host.startswith('.') and host != '*']
+    return getattr(settings, 'BLOG_WARM_HOST', hosts[0] if hosts else 'localhost')
+
+
+@task('warm_pages')
+def warm_pages(paths):
+    client = Client(HTTP_HOST=warm_host(), **{NOT_COUNTED_HEADER: '1'})
+    for path in paths:
+        client.get(path)
+
+
+def page_paths(post_ids, author_ids, category_ids, deleted=False):
+    paths = [reverse('postList')]
+    paths += [reverse('myPosts', args=[pk]) for pk in author_ids]
+    paths += [reverse('postFilter', args=[pk]) for pk in category_ids]
+    if not deleted:
+        paths += [reverse('postDetail', args=[pk]) for pk in post_ids]
+    return paths
+
+
+def warm_post_pages(post_ids, author_ids, category_ids, deleted=False):
+    # Um job por pagina: a key junta varias escritas seguidas na mesma pagina
+    # num unico job pendente.
+    if not getattr(settings, 'BLOG_WARM_PAGES', False):
+        return
+    enqueue_many('warm_pages', {
+        'warm:%s' % path: {'paths': [path]}
+        for path in page_paths(post_ids, author_ids, category_ids, deleted)
+    })
+
+
+@task('refresh_related')
+def refresh_related_posts(pks):
+    related.refresh_related(pks)
+
+
+def queue_related(pks):
+    # Sem BLOG_RELATED_IN_BACKGROUND o calculo roda na hora, dentro da escrita.
+    # Com ele, um job por post: varias escritas seguidas no mesmo post viram um
+    # job pendente so, e o job le os dados do momento em que roda.
+    if not getattr(settings, 'BLOG_RELATED_IN_BACKGROUND', False):
+        related.refresh_related(pks)
+        return
+    enqueue_many('refresh_related', {'related:%s' % pk: {'pks': [pk]} for pk in pks})
@@ -0,0 +1,42 @@
+from django import template
+from django.utils.html import format_html_join
+
+from ..archive import archive_tree
+from ..assets import bundle_urls
+from ..cache import get_cache, tag_versions
+from ..models import Category
+
+register = template.Library()
+
+
+@register.inclusion_tag('blog/categorySidebar.html')
+def category_sidebar():
+    # A chave usa a versao da tag "categories", trocada a cada save/delete de
+    # Category (blog.signals); em regime normal o bloco nao faz consultas.
+    cache = get_cache()
+    key = 'blog:sidebar:%s' % tag_versions(['categories'])[0]
+    categories = cache.get(key)
+    if categories is None:
+        categories = list(Category.objects.values('id', 'name'))
+        cache.set(key, categories, None)
+    return {'category': categories}
+
+
+@register.inclusion_tag('blog/archiveSidebar.html')
+def archive_sidebar():
+    # Contagens por ano/mes ja agregadas (blog.archive), guardadas ate a
+    # proxima troca da tag "list" (publicar, despublicar ou apagar um post).
+    cache = get_cache()
+    key = 'blog:archive:%s' % tag_versions(['list'])[0]
+    years = cache.get(key)
+    if years is None:
+        years = archive_tree()
+        cache.set(key, years, None)
+    return {'years': years}
+
+
+@register.simple_tag
+def css_bundle(name):
+    # Um <link> para o CSS da pagina ja juntado, minificado e com hash
+    # (blog.assets); antes do collectstatic, um <link> por arquivo de origem.
+    return format_html_join('\n', '<link rel="stylesheet" href="{}">', ((url,) for url in bundle_urls(name)))
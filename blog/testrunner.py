@@ -0,0 +1,12 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class BlogTestRunner(DiscoverRunner):
+    # O timer do blog.counters gravaria as visitas de uma thread propria no
+    # banco de teste, no meio de outros testes (e com a tabela travada pela
+    # transacao do TestCase). Os testes que usam o timer ligam de volta com
+    # override_settings.
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        settings.BLOG_VIEW_FLUSH_TIMER = False
@@ -0,0 +1,114 @@
+from datetime import datetime
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+from ..archive import archive_tree, rebuild_archive
+from ..models import ArchiveBucket, Category, Post
+from ..moderation import moderate
+
+
+def date(year, month, day=10):
+    return timezone.make_aware(datetime(year, month, day, 12))
+
+
+class ArchiveTest(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.user = User.objects.create_user(username="testuser", password="password")
+
+    def create(self, title, published_date):
+        return Post.objects.create(author=self.user, title=title, subtitle="s", text="t",
+                                   published_date=published_date)
+
+    def counts(self):
+        return {(row.year, row.month): row.post_count for row in ArchiveBucket.objects.filter(post_count__gt=0)}
+
+    def titles(self, response):
+        return sorted(post.title for post in response.context['posts'])
+
+    def test_publish_unpublish_and_delete(self):
+        first = self.create("Janeiro", date(2023, 1))
+        self.create("Janeiro 2", date(2023, 1, 20))
+        draft = self.create("Rascunho", None)
+        self.assertEqual(self.counts(), {(2023, 1): 2})
+
+        draft.published_date = date(2023, 3)
+        draft.save()
+        self.assertEqual(self.counts(), {(2023, 1): 2, (2023, 3): 1})
+
+        first.published_date = date(2022, 12)
+        first.save()
+        self.assertEqual(self.counts(), {(2022, 12): 1, (2023, 1): 1, (2023, 3): 1})
+
+        draft.published_date = None
+        draft.save()
+        first.delete()
+        self.assertEqual(self.counts(), {(2023, 1): 1})
+
+    def test_moderation(self):
+        posts = [self.create("Post %d" % n, date(2023, 5)) for n in range(3)]
+        rows = {post.pk: post.author_id for post in posts}
+        moderate('unpublish', {posts[0].pk: self.user.pk})
+        self.assertEqual(self.counts(), {(2023, 5): 2})
+        moderate('publish', rows)
+        now = timezone.localtime()
+        self.assertEqual(self.counts(), {(2023, 5): 2, (now.year, now.month): 1})
+        moderate('delete', rows)
+        self.assertEqual(self.counts(), {})
+
+    def test_rebuild_matches_incremental(self):
+        self.create("A", date(2021, 2))
+        self.create("B", date(2021, 2))
+        self.create("C", date(2022, 7))
+        incremental = self.counts()
+        ArchiveBucket.objects.update(post_count=0)
+        rebuild_archive()
+        self.assertEqual(self.counts(), incremental)
+        self.assertEqual(archive_tree(), [(2022, 1, [(7, 1)]), (2021, 2, [(2, 2)])])
+
+    def test_month_and_year_pages(self):
+        self.create("Fevereiro", date(2021, 2))
+        self.create("Dezembro", date(2021, 12, 31))
+        self.create("Outro ano", date(2022, 1, 1))
+        self.create("Rascunho", None)
+        response = self.client.get(reverse('postArchiveMonth', args=[2021, 12]))
+        self.assertEqual(self.titles(response), ["Dezembro"])
+        response = self.client.get(reverse('postArchiveYear', args=[2021]))
+        self.assertEqual(self.titles(response), ["Dezembro", "Fevereiro"])
+        self.assertContains(response, 'class="archiveSidebar"')
+        self.assertContains(response, reverse('postArchiveMonth', args=[2022, 1]))
+
+    def test_invalid_period(self):
+        self.assertEqual(self.client.get(reverse('postArchiveMonth', args=[2021, 13])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('postArchiveYear', args=[0])).status_code, 404)
+
+    def test_sidebar_is_cached_until_list_changes(self):
+        self.create("A", date(2021, 2))
+        self.client.get(reverse('postList'))
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('postArchiveYear', args=[2021]))
+        self.assertFalse([q for q in queries if 'blog_archivebucket' in q['sql']])
+        self.create("B", date(2021, 3))
+        response = self.client.get(reverse('postArchiveYear', args=[2021]))
+        self.assertContains(response, reverse('postArchiveMonth', args=[2021, 3]))
+
+    def test_sidebar_on_category_and_author_pages(self):
+        # publicar em outra categoria (e por outro autor) so muda a barra lateral
+        python = Category.objects.create(name="Python")
+        sql = Category.objects.create(name="SQL")
+        self.create("A", date(2021, 2)).category.add(python)
+        other = User.objects.create_user(username="other", password="password")
+        pages = [reverse('postFilter', args=[python.pk]), reverse('myPosts', args=[self.user.pk])]
+        etags = [self.client.get(path)['ETag'] for path in pages]
+        post = Post.objects.create(author=other, title="B", subtitle="s", text="t")
+        post.category.add(sql)
+        post.published_date = date(2021, 3)
+        post.save()
+        for path, etag in zip(pages, etags):
+            response = self.client.get(path)
+            self.assertContains(response, reverse('postArchiveMonth', args=[2021, 3]))
+            self.assertEqual(self.client.get(path, HTTP_IF_NONE_MATCH=etag).status_code, 200)
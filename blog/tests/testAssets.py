@@ -0,0 +1,125 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.template import Context, Template
+from .. import assets
+from ..management.commands import download_fonts
+
+FONTS_CSS = """@font-face {
+  font-family: 'Roboto';
+  font-display: swap;
+  src: url('../fonts/roboto.woff2') format('woff2');
+}
+"""
+
+class MinifyTest(SimpleTestCase):
+    def test_minify_css(self):
+        css = "/* comentario */\n.post a:hover ,  .log  > a {\n  color : #000;\n  margin: 0 auto;\n}\n"
+        self.assertEqual(assets.minify_css(css), ".post a:hover,.log>a{color :#000;margin:0 auto}")
+
+class AssetPipelineTest(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        source = os.path.join(self.root, 'source')
+        os.makedirs(os.path.join(source, 'css'))
+        os.makedirs(os.path.join(source, 'fonts'))
+        with open(os.path.join(source, 'css', 'fonts.css'), 'w') as stream:
+            stream.write(FONTS_CSS)
+        with open(os.path.join(source, 'fonts', 'roboto.woff2'), 'wb') as stream:
+            stream.write(b'wOF2')
+        self.static_root = os.path.join(self.root, 'static')
+        settings = override_settings(STATIC_ROOT=self.static_root, STATICFILES_DIRS=[source])
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def collect(self):
+        call_command('collectstatic', interactive=False, verbosity=0)
+        with open(os.path.join(self.static_root, 'staticfiles.json')) as stream:
+            return json.load(stream)['paths']
+
+    def read(self, name):
+        with open(os.path.join(self.static_root, name), 'rb') as stream:
+            return stream.read()
+
+    def test_bundles_are_minified_hashed_and_compressed(self):
+        paths = self.collect()
+        bundle = paths['css/postList.bundle.css']
+        self.assertRegex(bundle, r'^css/postList\.bundle\.[0-9a-f]{12}\.css$')
+        content = self.read(bundle).decode()
+        self.assertNotIn('\n', content)
+        self.assertIn(paths['fonts/roboto.woff2'].split('/')[-1], content)
+        self.assertIn('.pageHeader{', content)
+        self.assertEqual(gzip.decompress(self.read(bundle + '.gz')), content.encode())
+        self.assertFalse(os.path.exists(os.path.join(self.static_root, paths['fonts/roboto.woff2'] + '.gz')))
+
+    def test_template_links_one_hashed_bundle(self):
+        paths = self.collect()
+        html = Template("{% load blog_tags %}{% css_bundle 'postDetail' %}").render(Context())
+        self.assertEqual(html, '<link rel="stylesheet" href="/static/%s">' % paths['css/postDetail.bundle.css'])
+
+    def test_serve_precompressed_with_immutable_cache(self):
+        paths = self.collect()
+        request = RequestFactory().get('/static/x', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        response = assets.serve(request, paths['css/postList.bundle.css'])
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(b''.join(response.streaming_content), self.read(paths['css/postList.bundle.css'] + '.gz'))
+
+        response = assets.serve(RequestFactory().get('/static/x'), 'css/postList.css')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertNotIn('immutable', response['Cache-Control'])
+
+    def test_missing_fonts_css_falls_back_to_web_fonts(self):
+        os.remove(os.path.join(self.root, 'source', 'css', 'fonts.css'))
+        paths = self.collect()
+        self.assertNotIn('@font-face', self.read(paths['css/postList.bundle.css']).decode())
+        html = Template("{% load blog_tags %}{% css_bundle 'postList' %}").render(Context())
+        self.assertIn('href="https://fonts.googleapis.com/css2?family=', html)
+        self.assertIn('href="/static/%s"' % paths['css/postList.bundle.css'], html)
+
+class SourceLinksTest(SimpleTestCase):
+    def test_without_manifest_links_each_source(self):
+        source = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, source)
+        os.makedirs(os.path.join(source, 'css'))
+        with open(os.path.join(source, 'css', 'fonts.css'), 'w') as stream:
+            stream.write(FONTS_CSS)
+        with override_settings(STATICFILES_DIRS=[source]):
+            html = Template("{% load blog_tags %}{% css_bundle 'postNew' %}").render(Context())
+        self.assertIn('href="/static/css/fonts.css"', html)
+        self.assertIn('href="/static/css/postNew.css"', html)
+        self.assertNotIn('googleapis', html)
+
+    def test_without_downloaded_fonts_links_web_fonts(self):
+        with override_settings(STATICFILES_DIRS=[]):
+            html = Template("{% load blog_tags %}{% css_bundle 'postNew' %}").render(Context())
+        self.assertNotIn('/static/css/fonts.css', html)
+        self.assertIn('href="https://fonts.googleapis.com/css2?family=Libre+Baskerville&amp;', html)
+        self.assertIn('href="/static/css/postNew.css"', html)
+
+class DownloadFontsTest(SimpleTestCase):
+    def test_fonts_are_stored_locally(self):
+        css = ("@font-face { font-family: 'Roboto'; font-display: swap; "
+               "src: url(https://fonts.gstatic.com/s/roboto/v30/abc.woff2) format('woff2'); }")
+        responses = {'https://fonts.gstatic.com/s/roboto/v30/abc.woff2': b'wOF2'}
+
+        def fetch(url):
+            return responses.get(url, css.encode())
+
+        static_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, static_dir)
+        with mock.patch.object(download_fonts, 'fetch', side_effect=fetch):
+            call_command('download_fonts', static_dir=static_dir, stdout=StringIO())
+        with open(os.path.join(static_dir, 'css', 'fonts.css')) as stream:
+            self.assertIn("url('../fonts/abc.woff2')", stream.read())
+        with open(os.path.join(static_dir, 'fonts', 'abc.woff2'), 'rb') as stream:
+            self.assertEqual(stream.read(), b'wOF2')
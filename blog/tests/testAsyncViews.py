@@ -0,0 +1,71 @@
+import asyncio
+from asgiref.sync import async_to_sync
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.urls import resolve
+from ..models import Category, Post
+from .. import async_views
+
+# o flush das visualizacoes mudaria a contagem de consultas
+@override_settings(BLOG_VIEW_COUNTS=False)
+class AsyncViewsTest(TestCase):
+    def get(self, path):
+        # Chamada sincrona ao AsyncClient, para usar assertNumQueries e force_login.
+        async def request():
+            return await self.async_client.get(path)
+        return async_to_sync(request)()
+
+    def setUp(self):
+        caches['default'].clear()
+        self.user = User.objects.create_user(username="testuser", password="password")
+        self.category = Category.objects.create(name="Technology")
+        self.post = Post.objects.create(
+            author=self.user,
+            title="Post 1",
+            subtitle="subtitle",
+            text="content",
+        )
+        self.post.category.add(self.category)
+        self.post.publish()
+
+    def test_asgi_urlconf_uses_async_views(self):
+        for path, view in [('/', async_views.postList), ('/post/1/', async_views.postDetail),
+                           ('/post/category/1/', async_views.postFilter), ('/post/1/myPosts/', async_views.myPosts)]:
+            match = resolve(path, urlconf='mysite.asgi_urls')
+            self.assertIs(match.func, view)
+            self.assertTrue(asyncio.iscoroutinefunction(match.func))
+        self.assertFalse(asyncio.iscoroutinefunction(resolve('/').func))
+
+    async def test_postList(self):
+        response = await self.async_client.get('/')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Post 1")
+
+    async def test_postDetail(self):
+        response = await self.async_client.get('/post/%d/' % self.post.pk)
+        self.assertContains(response, "content")
+        response = await self.async_client.get('/post/999/')
+        self.assertEqual(response.status_code, 404)
+
+    async def test_postFilter_and_myPosts(self):
+        response = await self.async_client.get('/post/category/%d/' % self.category.pk)
+        self.assertContains(response, "Post 1")
+        response = await self.async_client.get('/post/%d/myPosts/' % self.user.pk)
+        self.assertContains(response, "Post 1")
+
+    async def test_search(self):
+        response = await self.async_client.get('/', {'search': 'post'})
+        self.assertContains(response, "Post 1")
+
+    def test_cache_hit_skips_the_database(self):
+        self.get('/')
+        with self.assertNumQueries(0):
+            response = self.get('/')
+        self.assertContains(response, "Post 1")
+
+    @override_settings(BLOG_CACHE_ANONYMOUS_ONLY=False)
+    def test_logged_in_user_sees_own_buttons(self):
+        self.async_client.force_login(self.user)
+        response = self.get('/post/%d/' % self.post.pk)
+        self.assertContains(response, "Editar Post")
@@ -0,0 +1,45 @@
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from ..models import Category, CategoryStats, Post
+from .. import benchmark
+
+class BenchmarkTest(TestCase):
+    def seeded(self, seed):
+        # as datas sao relativas ao momento do seed; o resto tem que bater
+        benchmark.seed(users=2, posts=30, categories=4, seed=seed, batch_size=7)
+        rows = [(post.pk, post.author_id, post.title, post.subtitle, post.text, post.published_date is None,
+                 sorted(post.category.values_list('pk', flat=True)))
+                for post in Post.objects.order_by('pk')]
+        Post.objects.all().delete()
+        Category.objects.all().delete()
+        User.objects.all().delete()
+        return rows
+
+    def test_seed_creates_dataset(self):
+        dataset = benchmark.seed(users=2, posts=30, categories=4, seed=1, batch_size=7)
+        self.assertEqual(dataset["posts"], 30)
+        self.assertEqual(Post.objects.count(), 30)
+        self.assertEqual(Category.objects.count(), 4)
+        self.assertEqual(CategoryStats.objects.count(), 4)
+        self.assertTrue(Post.objects.filter(published_date__isnull=True).exists())
+
+    def test_seed_is_reproducible(self):
+        first = self.seeded(1)
+        self.assertEqual(len(first), 30)
+        self.assertEqual(self.seeded(1), first)
+        self.assertNotEqual(self.seeded(2), first)
+
+    @override_settings(BLOG_CACHE_VIEWS=False)
+    def test_run_reports_every_view(self):
+        benchmark.seed(users=2, posts=30, categories=4)
+        results = benchmark.run(requests=3)
+        self.assertEqual(set(results), {"postList", "postDetail", "postFilter", "search", "postNew"})
+        for metrics in results.values():
+            self.assertEqual(metrics["requests"], 3)
+            self.assertLessEqual(metrics["p50_ms"], metrics["max_ms"])
+            self.assertGreater(metrics["queries"], 0)
+
+    def test_compare(self):
+        baseline = {"views": {"postList": {"p50_ms": 10.0, "queries": 4}}}
+        current = {"views": {"postList": {"p50_ms": 5.0, "queries": 4}}}
+        self.assertEqual(benchmark.compare(baseline, current), {"postList": {"p50_ms": -50.0, "queries": 0.0}})
@@ -0,0 +1,128 @@
+import tempfile
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from ..models import Category, Post
+from django.urls import reverse
+
+class ResponseCacheTest(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.user = User.objects.create_user(username="testuser", password="password")
+        self.category = Category.objects.create(name="Technology")
+        self.post = Post.objects.create(
+            author=self.user,
+            title="Post 1",
+            subtitle="subtitle",
+            text="content",
+        )
+        self.post.category.add(self.category)
+        self.post.publish()
+        self.other = Post.objects.create(
+            author=self.user,
+            title="Post 2",
+            subtitle="subtitle",
+            text="content",
+        )
+        self.other.publish()
+
+    def test_second_hit_is_served_from_cache(self):
+        self.client.get(reverse('postList'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('postList'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Post 1")
+
+    def test_search_term_is_part_of_the_key(self):
+        self.client.get(reverse('postList'))
+        response = self.client.get(reverse('postList'), {"search": "Post 2"})
+        self.assertIsNotNone(response.context)
+        self.assertEqual(list(response.context['posts']), [self.other])
+
+    def test_publish_invalidates_list(self):
+        self.client.get(reverse('postList'))
+        draft = Post.objects.create(author=self.user, title="Novo post", subtitle="s", text="t")
+        response = self.client.get(reverse('postList'))
+        self.assertIsNone(response.context)
+        draft.publish()
+        response = self.client.get(reverse('postList'))
+        self.assertContains(response, "Novo post")
+
+    def test_edit_invalidates_only_that_detail(self):
+        self.client.get(reverse('postDetail', args=[self.post.pk]))
+        self.client.get(reverse('postDetail', args=[self.other.pk]))
+        self.post.title = "Post 1 editado"
+        self.post.save()
+        response = self.client.get(reverse('postDetail', args=[self.post.pk]))
+        self.assertContains(response, "Post 1 editado")
+        response = self.client.get(reverse('postDetail', args=[self.other.pk]))
+        self.assertIsNone(response.context)
+
+    def test_remove_invalidates_category_and_author_pages(self):
+        self.client.get(reverse('postFilter', args=[self.category.pk]))
+        self.client.get(reverse('myPosts', args=[self.user.pk]))
+        self.post.delete()
+        response = self.client.get(reverse('postFilter', args=[self.category.pk]))
+        self.assertNotContains(response, "Post 1")
+        response = self.client.get(reverse('myPosts', args=[self.user.pk]))
+        self.assertNotContains(response, "Post 1")
+
+    def test_category_change_invalidates_pages(self):
+        self.client.get(reverse('postDetail', args=[self.post.pk]))
+        self.category.name = "Tecnologia"
+        self.category.save()
+        response = self.client.get(reverse('postDetail', args=[self.post.pk]))
+        self.assertContains(response, "Tecnologia")
+
+    def test_logged_in_requests_are_not_cached(self):
+        self.client.login(username='testuser', password='password')
+        self.client.get(reverse('postList'))
+        response = self.client.get(reverse('postList'))
+        self.assertIsNotNone(response.context)
+
+    @override_settings(BLOG_CACHE_ANONYMOUS_ONLY=False)
+    def test_auth_state_is_part_of_the_key(self):
+        self.client.get(reverse('postDetail', args=[self.post.pk]))
+        self.client.login(username='testuser', password='password')
+        response = self.client.get(reverse('postDetail', args=[self.post.pk]))
+        self.assertContains(response, "Editar Post")
+        response = self.client.get(reverse('postDetail', args=[self.post.pk]))
+        self.assertIsNone(response.context)
+
+    def test_file_based_backend(self):
+        with tempfile.TemporaryDirectory() as location:
+            backend = {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': location,
+            }
+            with override_settings(CACHES={'default': backend, 'blog': backend}, BLOG_CACHE='blog'):
+                self.client.get(reverse('postList'))
+                response = self.client.get(reverse('postList'))
+                self.assertIsNone(response.context)
+                self.other.delete()
+                response = self.client.get(reverse('postList'))
+                self.assertNotContains(response, "Post 2")
+
+class CategorySidebarTest(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.category = Category.objects.create(name="Technology")
+
+    @override_settings(BLOG_CACHE_VIEWS=False)
+    def test_sidebar_costs_no_queries_when_warm(self):
+        self.client.get(reverse('postList'))
+        # so o Last-Modified e a consulta dos posts (sem posts, nem prefetch
+        # nem EXISTS)
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('postList'))
+        self.assertContains(response, "Technology")
+
+    @override_settings(BLOG_CACHE_VIEWS=False)
+    def test_sidebar_follows_category_changes(self):
+        self.client.get(reverse('postList'))
+        Category.objects.create(name="Algorithms")
+        response = self.client.get(reverse('postList'))
+        self.assertContains(response, "Algorithms")
+        self.category.delete()
+        response = self.client.get(reverse('postList'))
+        self.assertNotContains(response, "Technology")
@@ -0,0 +1,102 @@
+from datetime import timedelta
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+from ..models import Category, Post
+from ..pagination import PAGE_SIZE
+
+
+class CategoryFilterTest(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.user = User.objects.create_user(username="testuser", password="password")
+        self.python = Category.objects.create(name="Python")
+        self.django = Category.objects.create(name="Django")
+        self.sql = Category.objects.create(name="SQL")
+        self.both = self.create("Python e Django", self.python, self.django)
+        self.python_only = self.create("So Python", self.python)
+        self.django_only = self.create("So Django", self.django)
+        self.other = self.create("Consultas", self.sql)
+
+    def create(self, title, *categories, published=True):
+        post = Post.objects.create(author=self.user, title=title, subtitle="s", text="t",
+                                   published_date=timezone.now() if published else None)
+        post.category.add(*categories)
+        return post
+
+    def get(self, *ids, **params):
+        return self.client.get(reverse('postCategories'), {'c': [str(pk) for pk in ids], **params})
+
+    def titles(self, response):
+        return sorted(post.title for post in response.context['posts'])
+
+    def test_any(self):
+        response = self.get(self.python.pk, self.django.pk)
+        self.assertEqual(self.titles(response), ["Python e Django", "So Django", "So Python"])
+
+    def test_all(self):
+        response = self.get(self.python.pk, self.django.pk, mode='all')
+        self.assertEqual(self.titles(response), ["Python e Django"])
+
+    def test_single_category_all(self):
+        response = self.get(self.sql.pk, mode='all')
+        self.assertEqual(self.titles(response), ["Consultas"])
+
+    def test_repeated_ids_count_once(self):
+        response = self.get(self.python.pk, self.python.pk, mode='all')
+        self.assertEqual(self.titles(response), ["Python e Django", "So Python"])
+
+    def test_drafts_are_hidden(self):
+        self.create("Rascunho", self.python, published=False)
+        response = self.get(self.python.pk)
+        self.assertNotIn("Rascunho", self.titles(response))
+
+    def test_no_valid_category(self):
+        self.assertEqual(self.get().status_code, 404)
+        self.assertEqual(self.client.get(reverse('postCategories'), {'c': 'x'}).status_code, 404)
+        for value in ('\u00b2', '99999999999999999999999', '-1', '0'):
+            self.assertEqual(self.client.get(reverse('postCategories'), {'c': value}).status_code, 404)
+        response = self.get(self.sql.pk, 2 ** 63, ' %d ' % self.python.pk)
+        self.assertEqual(self.titles(response), ["Consultas", "Python e Django", "So Python"])
+
+    def test_single_grouped_query(self):
+        with CaptureQueriesContext(connection) as context:
+            self.get(self.python.pk, self.django.pk, self.sql.pk, mode='all')
+        listing = [query['sql'] for query in context.captured_queries if 'HAVING' in query['sql']]
+        self.assertEqual(len(listing), 1)
+        self.assertEqual(listing[0].count('blog_post_category'), 1)
+
+    def test_uses_covering_index(self):
+        plan = Post.objects.in_categories([self.python.pk, self.django.pk], 'all').explain()
+        self.assertIn('COVERING INDEX blog_post_category_category_post_idx', plan)
+
+    def test_search_is_scoped_to_categories(self):
+        response = self.get(self.python.pk, search="Django")
+        self.assertEqual(self.titles(response), ["Python e Django"])
+
+    def test_search_form_keeps_filter(self):
+        response = self.get(self.python.pk, self.django.pk, mode='all')
+        self.assertContains(response, '<input type="hidden" name="c" value="%s">' % self.python.pk, html=True)
+        self.assertContains(response, '<input type="hidden" name="mode" value="all">', html=True)
+
+    def test_pagination_keeps_filter(self):
+        start = timezone.now() - timedelta(days=1)
+        for i in range(PAGE_SIZE):
+            post = self.create("Extra %d" % i, self.python)
+            Post.objects.filter(pk=post.pk).update(published_date=start + timedelta(minutes=i))
+        response = self.get(self.python.pk, mode='all')
+        self.assertTrue(response.context['page'].has_next)
+        self.assertContains(response, 'c=%s&amp;mode=all' % self.python.pk)
+        response = self.client.get(reverse('postCategories'), {
+            'c': self.python.pk, 'mode': 'all', 'cursor': response.context['page'].next_cursor,
+        })
+        self.assertEqual(len(response.context['posts']), 2)
+
+    def test_sidebar_form(self):
+        response = self.client.get(reverse('postList'))
+        self.assertContains(response, 'action="%s"' % reverse('postCategories'))
+        self.assertContains(response, 'value="%s"' % self.sql.pk)
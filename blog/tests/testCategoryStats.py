@@ -0,0 +1,82 @@
+from io import StringIO
+from datetime import timedelta
+from django.core.management import call_command
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.utils import timezone
+from ..models import Category, CategoryStats, Post
+from django.urls import reverse
+
+class CategoryStatsTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="password")
+        self.category = Category.objects.create(name="Technology")
+        self.category2 = Category.objects.create(name="Algorithms")
+        self.post = Post.objects.create(
+            author=self.user,
+            title="Post 1",
+            subtitle="subtitle",
+            text="content",
+        )
+        self.post.category.add(self.category)
+
+    def stats(self, category):
+        return CategoryStats.objects.filter(category=category).values_list(
+            'post_count', 'latest_published_date').first() or (0, None)
+
+    def test_draft_is_not_counted(self):
+        self.assertEqual(self.stats(self.category), (0, None))
+
+    def test_publish_and_unpublish(self):
+        self.post.publish()
+        self.assertEqual(self.stats(self.category), (1, self.post.published_date))
+        self.post.published_date = None
+        self.post.save()
+        self.assertEqual(self.stats(self.category), (0, None))
+
+    def test_latest_follows_newest_post(self):
+        self.post.publish()
+        newer = Post.objects.create(author=self.user, title="Post 2", subtitle="s", text="t",
+                                    published_date=timezone.now() + timedelta(days=1))
+        newer.category.add(self.category)
+        self.assertEqual(self.stats(self.category), (2, newer.published_date))
+        newer.delete()
+        self.assertEqual(self.stats(self.category), (1, self.post.published_date))
+
+    def test_category_changes_on_published_post(self):
+        self.post.publish()
+        self.post.category.add(self.category2)
+        self.assertEqual(self.stats(self.category2)[0], 1)
+        self.post.category.remove(self.category)
+        self.assertEqual(self.stats(self.category), (0, None))
+        self.post.category.clear()
+        self.assertEqual(self.stats(self.category2), (0, None))
+        self.category2.post_set.add(self.post)
+        self.assertEqual(self.stats(self.category2)[0], 1)
+
+    def test_removing_unlinked_category_keeps_count(self):
+        self.post.publish()
+        other = Post.objects.create(author=self.user, title="Post 2", subtitle="s", text="t")
+        other.category.add(self.category2)
+        other.publish()
+        # category2 nao e categoria do self.post: nada muda
+        self.post.category.remove(self.category2)
+        self.post.category.remove(self.category, self.category2)
+        self.assertEqual(self.stats(self.category), (0, None))
+        self.assertEqual(self.stats(self.category2), (1, other.published_date))
+
+    def test_rebuild_matches_incremental(self):
+        self.post.publish()
+        for i in range(3):
+            post = Post.objects.create(author=self.user, title="Post %d" % i, subtitle="s", text="t")
+            post.category.add(self.category, self.category2)
+            post.publish()
+        expected = sorted(CategoryStats.objects.values_list('category', 'post_count', 'latest_published_date'))
+        CategoryStats.objects.update(post_count=0)
+        call_command('rebuild_category_stats', stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(sorted(CategoryStats.objects.values_list('category', 'post_count', 'latest_published_date')), expected)
+
+    def test_postFilter_shows_count(self):
+        self.post.publish()
+        response = self.client.get(reverse('postFilter', args=[self.category.pk]))
+        self.assertContains(response, "1 post ")
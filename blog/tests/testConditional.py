@@ -0,0 +1,169 @@
+import time
+from datetime import timedelta
+from unittest import mock
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.contrib.auth.models import User
+from django.utils import timezone
+from .. import cache
+from ..counters import flush_views, record_view
+from ..models import Category, Post
+from django.urls import reverse
+
+
+def later(seconds=2):
+    # As datas do HTTP sao em segundos: a troca das tags vai para depois do
+    # Last-Modified ja enviado.
+    clock = mock.Mock(time=lambda: time.time() + seconds)
+    return mock.patch.object(cache, 'time', clock)
+
+# o flush das visualizacoes mudaria a contagem de consultas
+@override_settings(BLOG_VIEW_COUNTS=False)
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.user = User.objects.create_user(username="testuser", password="password")
+        self.category = Category.objects.create(name="Technology")
+        self.post = Post.objects.create(
+            author=self.user,
+            title="Post 1",
+            subtitle="subtitle",
+            text="content",
+        )
+        self.post.category.add(self.category)
+        self.post.publish()
+        self.url = reverse('postDetail', args=[self.post.pk])
+
+    def revalidate(self, url, response):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_validators_are_sent(self):
+        response = self.client.get(self.url)
+        self.assertTrue(response.has_header('ETag'))
+        self.assertTrue(response.has_header('Last-Modified'))
+
+    @override_settings(BLOG_CACHE_VIEWS=False)
+    def test_detail_304_costs_one_small_query(self):
+        response = self.client.get(self.url)
+        with CaptureQueriesContext(connection) as context:
+            response = self.revalidate(self.url, response)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(context.captured_queries), 1)
+        sql = context.captured_queries[0]['sql']
+        self.assertIn('"blog_post"."last_modified"', sql)
+        self.assertNotIn('"blog_post"."text"', sql)
+
+    @override_settings(BLOG_CACHE_VIEWS=False)
+    def test_list_304_costs_one_small_query(self):
+        url = reverse('postList')
+        response = self.client.get(url)
+        with self.assertNumQueries(1):
+            response = self.revalidate(url, response)
+        self.assertEqual(response.status_code, 304)
+
+    def test_cached_page_304_costs_no_queries(self):
+        response = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.revalidate(self.url, response)
+        self.assertEqual(response.status_code, 304)
+
+    def test_if_modified_since(self):
+        response = self.client.get(self.url)
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_edit_changes_etag(self):
+        first = self.client.get(self.url)
+        self.post.text = "novo texto"
+        self.post.save()
+        response = self.revalidate(self.url, first)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+
+    def test_category_change_updates_last_modified(self):
+        before = Post.objects.get(pk=self.post.pk).last_modified
+        self.post.category.add(Category.objects.create(name="Algorithms"))
+        self.assertGreater(Post.objects.get(pk=self.post.pk).last_modified, before)
+
+    def test_delete_changes_list_etag(self):
+        url = reverse('postList')
+        first = self.client.get(url)
+        self.post.delete()
+        self.assertEqual(self.revalidate(url, first).status_code, 200)
+
+    def test_logged_in_user_gets_own_etag(self):
+        anonymous = self.client.get(self.url)
+        self.client.login(username="testuser", password="password")
+        response = self.revalidate(self.url, anonymous)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Editar Post")
+
+    def modified_since(self, url, response):
+        return self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+
+    def test_delete_changes_list_last_modified(self):
+        url = reverse('postList')
+        Post.objects.create(author=self.user, title="Antigo", subtitle="s", text="t",
+                            published_date=timezone.now() - timedelta(days=1))
+        first = self.client.get(url)
+        with later():
+            self.post.delete()
+        self.assertEqual(self.modified_since(url, first).status_code, 200)
+
+    def test_related_change_changes_detail_last_modified(self):
+        first = self.client.get(self.url)
+        other = Post.objects.create(author=self.user, title="Post 2", subtitle="s", text="t")
+        other.category.add(self.category)
+        Post.objects.filter(pk=other.pk).update(last_modified=timezone.now() - timedelta(hours=1))
+        with later():
+            other.publish()
+        response = self.modified_since(self.url, first)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Post 2")
+
+    @override_settings(BLOG_VIEW_COUNTS=True)
+    def test_flush_changes_most_viewed_last_modified(self):
+        url = reverse('mostViewed')
+        first = self.client.get(url)
+        record_view(self.post.pk)
+        with later():
+            flush_views()
+        self.assertEqual(self.modified_since(url, first).status_code, 200)
+
+    @override_settings(BLOG_CACHE_VIEWS=False)
+    def test_scheduled_post_changes_list_etag(self):
+        url = reverse('postList')
+        scheduled = Post.objects.create(author=self.user, title="Agendado", subtitle="s", text="t",
+                                        published_date=timezone.now() + timedelta(hours=1))
+        Post.objects.update(last_modified=timezone.now() - timedelta(hours=2),
+                            published_date=timezone.now() - timedelta(days=1))
+        Post.objects.filter(pk=scheduled.pk).update(published_date=timezone.now() + timedelta(hours=1))
+        first = self.client.get(url)
+        self.assertNotContains(first, "Agendado")
+        # o horario chega sem nenhuma escrita (nem troca de tags)
+        Post.objects.filter(pk=scheduled.pk).update(published_date=timezone.now() - timedelta(minutes=1))
+        response = self.revalidate(url, first)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Agendado")
+
+    def test_scheduled_post_expires_cached_list(self):
+        url = reverse('postList')
+        scheduled = Post.objects.create(author=self.user, title="Agendado", subtitle="s", text="t",
+                                        published_date=timezone.now() + timedelta(hours=1))
+        Post.objects.update(last_modified=timezone.now() - timedelta(hours=2),
+                            published_date=timezone.now() - timedelta(days=1))
+        Post.objects.filter(pk=scheduled.pk).update(published_date=timezone.now() + timedelta(hours=1))
+        first = self.client.get(url)
+        self.assertNotContains(first, "Agendado")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.revalidate(url, first).status_code, 304)
+        # o horario chega: a pagina guardada expira junto, sem nenhuma escrita
+        Post.objects.filter(pk=scheduled.pk).update(published_date=timezone.now() - timedelta(minutes=1))
+        clock = mock.Mock(time=lambda: time.time() + 2 * 60 * 60)
+        with mock.patch('django.core.cache.backends.locmem.time', clock):
+            response = self.revalidate(url, first)
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, "Agendado")
+
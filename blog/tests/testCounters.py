@@ -0,0 +1,125 @@
+from asgiref.sync import async_to_sync
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from django.urls import reverse
+from ..counters import buffer, flush_idle, flush_views
+from ..models import Post
+
+# Sem flush automatico; os testes chamam flush_views quando querem.
+@override_settings(BLOG_VIEW_FLUSH_INTERVAL=3600, BLOG_VIEW_FLUSH_THRESHOLD=1000)
+class ViewCounterTest(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        buffer.take()
+        if buffer.timer:
+            buffer.timer.cancel()
+            buffer.timer = None
+        self.user = User.objects.create_user(username="testuser", password="password")
+        self.posts = []
+        for i in range(3):
+            post = Post.objects.create(author=self.user, title="Post %d" % i, subtitle="s", text="t")
+            post.publish()
+            self.posts.append(post)
+
+    def view(self, post, times=1):
+        for _ in range(times):
+            self.client.get(reverse('postDetail', args=[post.pk]))
+
+    def counts(self):
+        return list(Post.objects.order_by('pk').values_list('view_count', flat=True))
+
+    def test_views_are_buffered_until_flush(self):
+        self.view(self.posts[0], 3)
+        self.view(self.posts[2])
+        self.assertEqual(self.counts(), [0, 0, 0])
+        self.assertEqual(flush_views(), 4)
+        self.assertEqual(self.counts(), [3, 0, 1])
+        self.assertEqual(flush_views(), 0)
+
+    def test_flush_is_one_update(self):
+        for post in self.posts:
+            self.view(post)
+        with CaptureQueriesContext(connection) as context:
+            flush_views()
+        self.assertEqual(len(context.captured_queries), 1)
+        self.assertIn('CASE', context.captured_queries[0]['sql'])
+
+    def test_cached_page_still_counts(self):
+        self.view(self.posts[0])
+        with self.assertNumQueries(0):
+            self.view(self.posts[0])
+        flush_views()
+        self.assertEqual(self.counts()[0], 2)
+
+    def test_missing_post_is_not_counted(self):
+        self.client.get(reverse('postDetail', args=[9999]))
+        self.assertEqual(flush_views(), 0)
+
+    @override_settings(BLOG_VIEW_FLUSH_THRESHOLD=2)
+    def test_threshold_flushes(self):
+        self.view(self.posts[1], 2)
+        self.assertEqual(self.counts(), [0, 2, 0])
+
+    @override_settings(BLOG_VIEW_COUNTS=False)
+    def test_disabled(self):
+        self.view(self.posts[0])
+        self.assertEqual(flush_views(), 0)
+
+    def test_timer_is_off_in_tests(self):
+        self.view(self.posts[0])
+        self.assertIsNone(buffer.timer)
+
+    @override_settings(BLOG_VIEW_FLUSH_TIMER=True)
+    def test_idle_views_are_flushed_by_timer(self):
+        self.view(self.posts[0])
+        timer = buffer.timer
+        self.assertTrue(timer.is_alive())
+        self.view(self.posts[0])
+        self.assertIs(buffer.timer, timer)
+        # o timer chama flush_idle depois de BLOG_VIEW_FLUSH_INTERVAL segundos
+        timer.cancel()
+        self.assertEqual(flush_idle(), 2)
+        self.assertEqual(self.counts()[0], 2)
+        self.assertIsNone(buffer.timer)
+
+    def test_views_from_another_database_are_dropped(self):
+        self.view(self.posts[0])
+        buffer.database = 'other.sqlite3'
+        self.assertEqual(flush_idle(), 0)
+        self.assertEqual(flush_views(), 0)
+        self.assertEqual(self.counts()[0], 0)
+
+    def test_save_does_not_overwrite_flushed_counts(self):
+        stale = Post.objects.get(pk=self.posts[0].pk)
+        self.view(self.posts[0], 2)
+        flush_views()
+        stale.title = "Edited"
+        stale.save()
+        self.assertEqual(self.counts()[0], 2)
+
+    def test_async_view_counts(self):
+        async def request():
+            return await self.async_client.get(reverse('postDetail', args=[self.posts[0].pk]))
+        async_to_sync(request)()
+        self.assertEqual(flush_views(), 1)
+
+    def test_most_viewed(self):
+        self.view(self.posts[2], 3)
+        self.view(self.posts[0], 1)
+        draft = Post.objects.create(author=self.user, title="Draft", subtitle="s", text="t")
+        self.view(draft, 5)
+        flush_views()
+        response = self.client.get(reverse('mostViewed'))
+        self.assertEqual(list(response.context['posts']), [self.posts[2], self.posts[0], self.posts[1]])
+        self.assertContains(response, "3 visualizações")
+
+    def test_flush_invalidates_most_viewed(self):
+        self.client.get(reverse('mostViewed'))
+        self.view(self.posts[1])
+        flush_views()
+        response = self.client.get(reverse('mostViewed'))
+        self.assertIsNotNone(response.context)
+        self.assertEqual(response.context['posts'][0], self.posts[1])
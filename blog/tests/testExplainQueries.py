@@ -0,0 +1,44 @@
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.contrib.auth.models import User
+from ..management.commands.explain_queries import full_scans
+from ..models import Category, Post
+
+class ExplainQueriesTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="password")
+        self.category = Category.objects.create(name="Technology")
+        self.post = Post.objects.create(
+            author=self.user,
+            title="Post 1",
+            subtitle="subtitle",
+            text="content",
+        )
+        self.post.category.add(self.category)
+
+    def test_full_scans(self):
+        plan = "\n".join([
+            "2 0 0 SCAN blog_post",
+            "3 0 0 SCAN TABLE auth_user AS U0",
+            "4 0 0 SCAN blog_post USING INDEX post_draft_idx",
+            "5 0 0 SEARCH blog_post USING INTEGER PRIMARY KEY (rowid=?)",
+            "6 0 0 SCAN blog_post_fts VIRTUAL TABLE INDEX 0:M3",
+        ])
+        self.assertEqual(full_scans(plan), ["blog_post", "auth_user"])
+
+    def test_views_do_not_scan_tables(self):
+        out = StringIO()
+        call_command('explain_queries', stdout=out)
+        self.assertIn('post_published_idx', out.getvalue())
+        self.assertIn('post_author_published_idx', out.getvalue())
+        self.assertIn('post_draft_idx', out.getvalue())
+
+    def test_fails_without_indexes(self):
+        from django.db import connection
+        with connection.cursor() as cursor:
+            cursor.execute('DROP INDEX post_author_published_idx')
+            cursor.execute('DROP INDEX blog_post_author_id_dd7a8485')
+        with self.assertRaisesMessage(CommandError, 'myPosts'):
+            call_command('explain_queries', stdout=StringIO())
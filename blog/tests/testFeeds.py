@@ -0,0 +1,114 @@
+import json
+from xml.dom import minidom
+from asgiref.sync import async_to_sync
+from django.core.cache import caches
+from django.http import StreamingHttpResponse
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from .testConditional import later
+from ..models import Category, Post
+from django.urls import reverse
+
+class FeedTest(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.user = User.objects.create_user(username="testuser", password="password")
+        self.other = User.objects.create_user(username="other", password="password")
+        self.category = Category.objects.create(name="Technology")
+        self.post = self.create_post(self.user, "Post <1>", "linha 1\nlinha 2")
+        self.post.category.add(self.category)
+        self.other_post = self.create_post(self.other, "Post 2", "content")
+        Post.objects.create(author=self.user, title="Rascunho", subtitle="s", text="t")
+
+    def create_post(self, author, title, text):
+        post = Post.objects.create(author=author, title=title, subtitle="subtitle", text=text)
+        post.publish()
+        return post
+
+    def content(self, response):
+        if isinstance(response, StreamingHttpResponse):
+            return b''.join(response.streaming_content)
+        return response.content
+
+    def test_rss(self):
+        response = self.client.get(reverse('postFeed', args=['rss']))
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(response['Content-Type'], 'application/rss+xml; charset=utf-8')
+        document = minidom.parseString(self.content(response))
+        titles = [node.firstChild.data for node in document.getElementsByTagName('item')[0].getElementsByTagName('title')]
+        self.assertEqual(titles, ["Post 2"])
+        self.assertEqual(len(document.getElementsByTagName('item')), 2)
+        self.assertNotIn(b"Rascunho", self.content(self.client.get(reverse('postFeed', args=['rss']))))
+
+    def test_atom_has_html_content(self):
+        response = self.client.get(reverse('postFeed', args=['atom']))
+        document = minidom.parseString(self.content(response))
+        entries = document.getElementsByTagName('entry')
+        self.assertEqual(len(entries), 2)
+        content = entries[1].getElementsByTagName('content')[0]
+        self.assertEqual(content.getAttribute('type'), 'html')
+        self.assertEqual(content.firstChild.data, "linha 1<br>linha 2")
+        self.assertEqual(entries[1].getElementsByTagName('title')[0].firstChild.data, "Post <1>")
+
+    def test_json_feed(self):
+        response = self.client.get(reverse('postFeed', args=['json']))
+        data = json.loads(self.content(response))
+        self.assertEqual(data['version'], 'https://jsonfeed.org/version/1.1')
+        self.assertEqual([item['title'] for item in data['items']], ["Post 2", "Post <1>"])
+        self.assertEqual(data['items'][0]['authors'], [{'name': 'other'}])
+        self.assertTrue(data['items'][0]['url'].startswith('http://testserver/post/'))
+
+    def test_category_and_author_feeds(self):
+        response = self.client.get(reverse('categoryFeed', args=[self.category.pk, 'json']))
+        data = json.loads(self.content(response))
+        self.assertEqual(data['title'], "Minimalist - Technology")
+        self.assertEqual([item['title'] for item in data['items']], ["Post <1>"])
+
+        response = self.client.get(reverse('authorFeed', args=[self.other.pk, 'json']))
+        data = json.loads(self.content(response))
+        self.assertEqual([item['title'] for item in data['items']], ["Post 2"])
+
+    def test_unknown_format_and_scope(self):
+        self.assertEqual(self.client.get(reverse('postFeed', args=['xml'])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('categoryFeed', args=[999, 'rss'])).status_code, 404)
+
+    def test_cached_until_next_publish(self):
+        url = reverse('postFeed', args=['json'])
+        self.content(self.client.get(url))
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(len(json.loads(response.content)['items']), 2)
+
+        self.create_post(self.user, "Post 3", "content")
+        data = json.loads(self.content(self.client.get(url)))
+        self.assertEqual(data['items'][0]['title'], "Post 3")
+
+    def test_conditional_get(self):
+        url = reverse('postFeed', args=['rss'])
+        response = self.client.get(url)
+        self.content(response)
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_delete_moves_feed_updated(self):
+        def updated():
+            response = self.client.get(reverse('postFeed', args=['atom']))
+            document = minidom.parseString(self.content(response))
+            return document.getElementsByTagName('updated')[0].firstChild.data
+        before = updated()
+        with later():
+            self.other_post.delete()
+        self.assertGreater(updated(), before)
+
+    @override_settings(BLOG_FEED_SIZE=1)
+    def test_feed_size(self):
+        data = json.loads(self.content(self.client.get(reverse('postFeed', args=['json']))))
+        self.assertEqual(len(data['items']), 1)
+
+    def test_async_feed_is_not_streamed(self):
+        async def get():
+            return await self.async_client.get(reverse('postFeed', args=['atom']))
+        response = async_to_sync(get)()
+        self.assertNotIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(len(minidom.parseString(response.content).getElementsByTagName('entry')), 2)
@@ -0,0 +1,109 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.utils import timezone
+from ..models import ArchiveBucket, Category, CategoryStats, Post
+from ..search import search_posts
+
+class ImportExportTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="password")
+        self.category = Category.objects.create(name="Technology")
+        self.post = Post.objects.create(
+            author=self.user,
+            title="Post 1",
+            subtitle="subtitle",
+            text="content",
+            published_date=timezone.now(),
+        )
+        self.post.category.add(self.category)
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "posts.jsonl")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_lines(self, rows):
+        with open(self.path, "w", encoding="utf-8") as stream:
+            for row in rows:
+                stream.write(json.dumps(row) + "\n")
+
+    def test_export_writes_one_post_per_line(self):
+        call_command('export_posts', self.path, batch_size=1, stderr=StringIO())
+        with open(self.path, encoding="utf-8") as stream:
+            rows = [json.loads(line) for line in stream]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["author"], "testuser")
+        self.assertEqual(rows[0]["categories"], ["Technology"])
+
+    def test_roundtrip(self):
+        call_command('export_posts', self.path, stderr=StringIO())
+        call_command('import_posts', self.path, batch_size=1, stdout=StringIO(), stderr=StringIO())
+        posts = Post.objects.filter(title="Post 1").order_by('pk')
+        self.assertEqual(posts.count(), 2)
+        self.assertEqual(posts[1].published_date, self.post.published_date)
+        self.assertEqual(list(posts[1].category.all()), [self.category])
+
+    def test_import_warns_about_per_process_cache(self):
+        call_command('export_posts', self.path, stderr=StringIO())
+        err = StringIO()
+        call_command('import_posts', self.path, stdout=StringIO(), stderr=err)
+        self.assertIn("per-process cache", err.getvalue())
+        file_cache = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                                  'LOCATION': os.path.join(self.directory.name, 'cache')}}
+        with override_settings(CACHES=file_cache):
+            err = StringIO()
+            call_command('import_posts', self.path, stdout=StringIO(), stderr=err)
+        self.assertEqual(err.getvalue(), "")
+
+    def test_import_batches_and_derived_data(self):
+        rows = [{
+            "author": "testuser",
+            "title": "Importado %d" % i,
+            "subtitle": "s",
+            "text": "texto importado",
+            "categories": ["Technology", "Nova categoria"],
+            "published_date": timezone.now().isoformat(),
+        } for i in range(7)]
+        self.write_lines(rows)
+        out = StringIO()
+        call_command('import_posts', self.path, batch_size=3, stdout=out, stderr=StringIO())
+        self.assertIn("Imported 7 posts", out.getvalue())
+        self.assertEqual(Post.objects.filter(title__startswith="Importado").count(), 7)
+        new_category = Category.objects.get(name="Nova categoria")
+        self.assertEqual(new_category.post_set.count(), 7)
+        self.assertEqual(CategoryStats.objects.get(category=self.category).post_count, 8)
+        self.assertEqual(search_posts(Post.objects.all(), "importado").count(), 7)
+
+    def test_unknown_author(self):
+        self.write_lines([{"author": "ninguem", "title": "x"}])
+        with self.assertRaisesMessage(CommandError, "Line 1: unknown author"):
+            call_command('import_posts', self.path, stdout=StringIO(), stderr=StringIO())
+        self.assertFalse(Post.objects.filter(title="x").exists())
+
+    def test_failed_import_rebuilds_committed_batches(self):
+        row = {"author": "testuser", "title": "Importado", "subtitle": "s", "text": "t",
+               "categories": ["Technology"], "published_date": timezone.now().isoformat()}
+        self.write_lines([row, row, {"author": "ninguem", "title": "x"}])
+        with self.assertRaisesMessage(CommandError, "Line 3: unknown author"):
+            call_command('import_posts', self.path, batch_size=2, stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(Post.objects.filter(title="Importado").count(), 2)
+        self.assertEqual(CategoryStats.objects.get(category=self.category).post_count, 3)
+        self.assertEqual(sum(ArchiveBucket.objects.values_list('post_count', flat=True)), 3)
+
+    def test_line_that_is_not_an_object(self):
+        with open(self.path, "w", encoding="utf-8") as stream:
+            stream.write("[1]\n")
+        with self.assertRaisesMessage(CommandError, "Line 1: expected a JSON object"):
+            call_command('import_posts', self.path, stdout=StringIO(), stderr=StringIO())
+
+    def test_export_from_database(self):
+        call_command('export_posts', self.path, database='default', stderr=StringIO())
+        with open(self.path, encoding="utf-8") as stream:
+            self.assertEqual(len(stream.readlines()), 1)
+
@@ -0,0 +1,54 @@
+import json
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from ..models import Category, Post
+from django.urls import reverse
+
+@override_settings(BLOG_QUERY_TIMING=True, BLOG_CACHE_VIEWS=False, BLOG_VIEW_COUNTS=False)
+class QueryTimingMiddlewareTest(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.user = User.objects.create_user(username="testuser", password="password")
+        self.category = Category.objects.create(name="Technology")
+        self.post = Post.objects.create(
+            author=self.user,
+            title="Post 1",
+            subtitle="subtitle",
+            text="content",
+        )
+        self.post.category.add(self.category)
+        self.post.publish()
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('postList'))
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertRegex(timing, r'tpl;dur=[\d.]+')
+        self.assertRegex(timing, r'total;dur=[\d.]+')
+
+    def test_query_count_matches(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('postDetail', args=[self.post.pk]))
+        self.assertIn('desc="%d queries"' % len(context.captured_queries), response['Server-Timing'])
+
+    @override_settings(BLOG_SLOW_REQUEST_MS=0)
+    def test_slow_request_is_logged_with_sql(self):
+        with self.assertLogs('blog.slow_requests', 'WARNING') as logs:
+            self.client.get(reverse('postList'))
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual(entry['path'], '/')
+        self.assertEqual(entry['status'], 200)
+        self.assertEqual(entry['query_count'], len(entry['queries']))
+        self.assertIn('blog_post', entry['queries'][0]['sql'])
+
+    def test_fast_request_is_not_logged(self):
+        with self.assertNoLogs('blog.slow_requests', 'WARNING'):
+            self.client.get(reverse('postList'))
+
+    @override_settings(BLOG_QUERY_TIMING=False)
+    def test_disabled_by_default(self):
+        response = self.client.get(reverse('postList'))
+        self.assertFalse(response.has_header('Server-Timing'))
@@ -0,0 +1,162 @@
+from datetime import timedelta
+from io import StringIO
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+from ..checks import check_job_cache
+from ..jobs import claim, enqueue, execute, finish, run_pending, task
+from ..models import Category, Job, Post
+
+calls = []
+
+
+@task('test_record')
+def record(value):
+    calls.append(value)
+
+
+@task('test_fail')
+def fail():
+    raise ValueError('boom')
+
+
+class JobQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_run_pending(self):
+        enqueue('test_record', payload={'value': 1})
+        enqueue('test_record', payload={'value': 2})
+        self.assertEqual(run_pending(), 2)
+        self.assertEqual(calls, [1, 2])
+        self.assertEqual(Job.objects.filter(status=Job.DONE).count(), 2)
+
+    def test_pending_key_is_enqueued_once(self):
+        enqueue('test_record', key='k', payload={'value': 1})
+        enqueue('test_record', key='k', payload={'value': 1})
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_running_key_does_not_absorb_new_job(self):
+        enqueue('test_record', key='k', payload={'value': 1})
+        claim(10)
+        enqueue('test_record', key='k', payload={'value': 2})
+        self.assertEqual(Job.objects.filter(status=Job.PENDING).count(), 1)
+
+    def test_claim_does_not_repeat_jobs(self):
+        for value in range(3):
+            enqueue('test_record', payload={'value': value})
+        first = claim(2)
+        second = claim(2)
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 1)
+        self.assertFalse({job.pk for job in first} & {job.pk for job in second})
+        self.assertEqual(claim(2), [])
+
+    def test_delayed_job_waits(self):
+        enqueue('test_record', payload={'value': 1}, delay=60)
+        self.assertEqual(run_pending(), 0)
+
+    def test_stale_running_job_is_reclaimed(self):
+        enqueue('test_record', payload={'value': 1})
+        claim(10)
+        Job.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(calls, [1])
+
+    def test_failed_job_is_retried_then_fails(self):
+        enqueue('test_fail', max_attempts=2)
+        with self.assertLogs('blog.jobs', 'WARNING'):
+            run_pending()
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), (Job.PENDING, 1))
+        self.assertIn('ValueError: boom', job.last_error)
+        self.assertGreater(job.run_after, timezone.now())
+
+        Job.objects.update(run_after=timezone.now())
+        with self.assertLogs('blog.jobs', 'WARNING'):
+            run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    def test_retry_with_key_already_pending(self):
+        enqueue('test_fail', key='k')
+        job = claim(10)[0]
+        error = execute(job.name, job.payload)
+        # outro worker enfileira a mesma key enquanto este roda: o indice unico
+        # recusa a volta deste para a fila
+        enqueue('test_fail', key='k')
+        with self.assertLogs('blog.jobs', 'WARNING'):
+            self.assertFalse(finish(job, error))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(Job.objects.filter(key='k', status=Job.PENDING).count(), 1)
+
+    def test_unknown_task(self):
+        with self.assertRaises(KeyError):
+            enqueue('nope')
+
+    def test_command_runs_until_empty(self):
+        enqueue('test_record', payload={'value': 1})
+        enqueue('test_fail', max_attempts=1)
+        out = StringIO()
+        with self.assertLogs('blog.jobs', 'WARNING'):
+            call_command('run_jobs', '--once', '--processes', '0', stdout=out)
+        self.assertIn('Ran 2 jobs, 1 failed.', out.getvalue())
+        self.assertEqual(calls, [1])
+
+
+class WarmPagesTest(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.user = User.objects.create_user(username="testuser", password="password")
+        self.category = Category.objects.create(name="Technology")
+        self.post = Post.objects.create(author=self.user, title="Post 1", subtitle="s", text="t")
+        self.post.category.add(self.category)
+
+    def test_disabled_by_default(self):
+        self.post.publish()
+        self.assertFalse(Job.objects.exists())
+
+    @override_settings(BLOG_WARM_PAGES=True)
+    def test_publish_warms_pages(self):
+        self.post.publish()
+        self.post.publish()
+        paths = set(Job.objects.values_list('key', flat=True))
+        self.assertEqual(paths, {
+            'warm:' + reverse('postList'),
+            'warm:' + reverse('myPosts', args=[self.user.pk]),
+            'warm:' + reverse('postFilter', args=[self.category.pk]),
+            'warm:' + reverse('postDetail', args=[self.post.pk]),
+        })
+        run_pending()
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('postList'))
+        self.assertContains(response, "Post 1")
+
+    @override_settings(BLOG_WARM_PAGES=True)
+    def test_draft_does_not_warm(self):
+        Post.objects.create(author=self.user, title="Draft", subtitle="s", text="t")
+        self.assertFalse(Job.objects.exists())
+
+
+FILE_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                          'LOCATION': '/tmp/blog-test-cache'}}
+
+
+class JobCacheCheckTest(TestCase):
+    def ids(self):
+        return [message.id for message in check_job_cache(None)]
+
+    def test_defaults(self):
+        self.assertEqual(self.ids(), [])
+
+    @override_settings(BLOG_RELATED_IN_BACKGROUND=True, BLOG_WARM_PAGES=True)
+    def test_per_process_cache(self):
+        self.assertEqual(self.ids(), ['blog.E001', 'blog.W001'])
+
+    @override_settings(BLOG_RELATED_IN_BACKGROUND=True, BLOG_WARM_PAGES=True, CACHES=FILE_CACHE)
+    def test_shared_cache(self):
+        self.assertEqual(self.ids(), [])
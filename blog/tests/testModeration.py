@@ -0,0 +1,119 @@
+import json
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from django.urls import reverse
+from ..cache import get_cache, tag_versions
+from ..models import Category, CategoryStats, Post
+
+
+class PostModerationTest(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.user = User.objects.create_user(username="testuser", password="password")
+        self.other = User.objects.create_user(username="other", password="password")
+        self.category = Category.objects.create(name="Technology")
+        self.drafts = []
+        for i in range(5):
+            post = Post.objects.create(author=self.user, title="Draft %d" % i, subtitle="s", text="t")
+            post.category.add(self.category)
+            self.drafts.append(post)
+        self.foreign = Post.objects.create(author=self.other, title="Other", subtitle="s", text="t")
+        self.client.login(username="testuser", password="password")
+
+    def moderate(self, action, ids):
+        return self.client.post(reverse('postModerate'), json.dumps({'action': action, 'ids': ids}),
+                                content_type='application/json')
+
+    def ids(self):
+        return [post.pk for post in self.drafts]
+
+    def post_count(self):
+        return CategoryStats.objects.get(category=self.category).post_count
+
+    def test_publish_many(self):
+        response = self.moderate('publish', self.ids())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 5)
+        self.assertEqual(Post.objects.filter(pk__in=self.ids(), published_date__isnull=False).count(), 5)
+        self.assertEqual(self.post_count(), 5)
+
+    def test_unpublish_many(self):
+        self.moderate('publish', self.ids())
+        response = self.moderate('unpublish', self.ids()[:2])
+        self.assertEqual(response.json()['count'], 2)
+        self.assertEqual(self.post_count(), 3)
+
+    def test_delete_many(self):
+        self.moderate('publish', self.ids())
+        response = self.moderate('delete', self.ids())
+        self.assertEqual(response.json()['count'], 5)
+        self.assertFalse(Post.objects.filter(pk__in=self.ids()).exists())
+        self.assertEqual(self.post_count(), 0)
+
+    def test_form_post(self):
+        response = self.client.post(reverse('postModerate'), {'action': 'publish', 'ids': self.ids()[:3]})
+        self.assertEqual(response.json()['count'], 3)
+
+    def test_query_count_does_not_grow_with_batch(self):
+        def queries(action, ids):
+            with CaptureQueriesContext(connection) as context:
+                self.moderate(action, ids)
+            return len(context.captured_queries)
+
+        # o primeiro lote cria a linha de CategoryStats
+        self.moderate('publish', self.ids()[:1])
+        small = queries('publish', self.ids()[1:2])
+        large = queries('publish', self.ids()[2:])
+        self.assertEqual(small, large)
+        small = queries('delete', self.ids()[:1])
+        large = queries('delete', self.ids()[1:])
+        self.assertEqual(small, large)
+
+    def test_foreign_posts_reject_whole_batch(self):
+        response = self.moderate('delete', self.ids() + [self.foreign.pk])
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()['ids'], [self.foreign.pk])
+        self.assertEqual(Post.objects.count(), 6)
+
+    def test_staff_moderates_any_post(self):
+        self.user.is_staff = True
+        self.user.save()
+        response = self.moderate('delete', [self.foreign.pk])
+        self.assertEqual(response.json()['count'], 1)
+
+    def test_missing_ids_are_ignored(self):
+        response = self.moderate('delete', self.ids()[:1] + [9999])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['ids'], self.ids()[:1])
+
+    def test_bad_requests(self):
+        self.assertEqual(self.moderate('archive', self.ids()).status_code, 400)
+        response = self.client.post(reverse('postModerate'), 'nope', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get(reverse('postModerate')).status_code, 405)
+
+    def test_invalidates_tags(self):
+        tags = ['list', 'search', 'post:%s' % self.drafts[0].pk, 'author:%s' % self.user.pk,
+                'category:%s' % self.category.pk]
+        before = tag_versions(tags)
+        self.moderate('publish', self.ids()[:1])
+        after = tag_versions(tags)
+        self.assertTrue(all(old != new for old, new in zip(before, after)))
+
+    def test_login_required(self):
+        self.client.logout()
+        response = self.moderate('delete', self.ids())
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Post.objects.count(), 6)
+
+    def test_admin_action(self):
+        self.user.is_staff = True
+        self.user.is_superuser = True
+        self.user.save()
+        response = self.client.post(reverse('admin:blog_post_changelist'), {
+            'action': 'publish_posts', '_selected_action': self.ids(),
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.post_count(), 5)
@@ -0,0 +1,81 @@
+from base64 import urlsafe_b64encode
+from datetime import timedelta
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.utils import timezone
+from ..models import Category, Post
+from ..pagination import paginate, decode_cursor
+from django.urls import reverse
+
+class PaginationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="password")
+        self.category = Category.objects.create(name="Technology")
+        now = timezone.now()
+        # dois posts com a mesma data para exercitar o desempate por pk
+        dates = [now - timedelta(days=i // 2) for i in range(25)]
+        for i, date in enumerate(dates):
+            post = Post.objects.create(
+                author=self.user,
+                title="Post %d" % i,
+                subtitle="subtitle",
+                text="content",
+                published_date=date,
+            )
+            post.category.add(self.category)
+        self.ordered = list(Post.objects.order_by('published_date', 'pk'))
+
+    def test_first_page(self):
+        page = paginate(Post.objects.all(), None, per_page=10)
+        self.assertEqual(list(page), self.ordered[:10])
+        self.assertTrue(page.has_next)
+        self.assertFalse(page.has_previous)
+
+    def test_walk_forward_and_back(self):
+        page = paginate(Post.objects.all(), None, per_page=10)
+        seen = list(page)
+        while page.has_next:
+            page = paginate(Post.objects.all(), page.next_cursor, per_page=10)
+            seen += list(page)
+        self.assertEqual(seen, self.ordered)
+
+        page = paginate(Post.objects.all(), page.previous_cursor, per_page=10)
+        self.assertEqual(list(page), self.ordered[10:20])
+        page = paginate(Post.objects.all(), page.previous_cursor, per_page=10)
+        self.assertEqual(list(page), self.ordered[:10])
+        self.assertFalse(page.has_previous)
+
+    def test_drafts_sort_first(self):
+        draft = Post.objects.create(author=self.user, title="Draft", subtitle="s", text="t")
+        page = paginate(Post.objects.all(), None, per_page=10)
+        self.assertEqual(page.object_list[0], draft)
+        page = paginate(Post.objects.all(), page.next_cursor, per_page=10)
+        page = paginate(Post.objects.all(), page.previous_cursor, per_page=10)
+        self.assertEqual(page.object_list[0], draft)
+
+    def test_invalid_cursor_is_first_page(self):
+        self.assertIsNone(decode_cursor("not-a-cursor"))
+        page = paginate(Post.objects.all(), "not-a-cursor", per_page=10)
+        self.assertEqual(list(page), self.ordered[:10])
+
+    def test_search_cursor_on_date_listing_is_first_page(self):
+        for raw in ('n|f1.5|3', 'p|f1e308|3'):
+            token = urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+            page = paginate(Post.objects.all(), token, per_page=10)
+            self.assertEqual(list(page), self.ordered[:10])
+            for url in (reverse('postList'), reverse('postArchiveYear', args=[timezone.now().year])):
+                self.assertEqual(self.client.get(url, {'cursor': token}).status_code, 200)
+
+    def test_postList_view_paginates(self):
+        response = self.client.get(reverse('postList'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['posts']), 10)
+        page = response.context['page']
+        response = self.client.get(reverse('postList'), {'cursor': page.next_cursor})
+        self.assertEqual(list(response.context['posts']), self.ordered[10:20])
+
+    def test_page_query_count_is_constant(self):
+        with self.assertNumQueries(4):
+            page = paginate(Post.objects.all(), None, per_page=10)
+            page = paginate(Post.objects.all(), page.next_cursor, per_page=10)
+            self.assertEqual(len(page), 10)
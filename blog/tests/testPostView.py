@@ -1,4 +1,6 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
 from ..models import Category, Post
 from django.urls import reverse
@@ -200,4 +202,45 @@ class PostViewTest(TestCase):
         self.assertEqual(response.context['posts'].count(), 2)
 
         response = self.client.get(reverse('postList'), {"search":"Post 1 Algorithmns"})    
-        self.assertEqual(response.context['posts'].count(), 0)
\ No newline at end of file
+        self.assertEqual(response.context['posts'].count(), 0)
+
+    @override_settings(BLOG_CACHE_VIEWS=False)
+    def test_postList_query_count_is_constant(self):
+        self.post.publish()
+        self.client.get(reverse('postList'))
+        with self.assertNumQueries(4) as context:
+            self.client.get(reverse('postList'))
+
+        for i in range(8):
+            post = Post.objects.create(author=self.user, title="Post %d" % i, subtitle="subtitle", text="content")
+            post.category.add(self.category)
+            post.publish()
+        # publicar troca a tag "list": a barra do arquivo e recarregada uma vez
+        query_count = len(context.captured_queries)
+        self.client.get(reverse('postList'))
+
+        with self.assertNumQueries(query_count):
+            response = self.client.get(reverse('postList'))
+        self.assertEqual(len(response.context['posts']), 9)
+
+    @override_settings(BLOG_CACHE_VIEWS=False)
+    def test_postList_does_not_load_post_bodies(self):
+        self.post.publish()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('postList'))
+        listing = [query['sql'] for query in context.captured_queries if 'FROM "blog_post"' in query['sql']]
+        self.assertTrue(listing)
+        for sql in listing:
+            self.assertNotIn('"blog_post"."text"', sql)
+            self.assertNotIn('"blog_post"."subtitle"', sql)
+            self.assertNotIn('"blog_post"."text_html"', sql)
+        self.assertContains(response, self.post.excerpt)
+
+    def test_listing_queryset_previous_page(self):
+        for i in range(12):
+            post = Post.objects.create(author=self.user, title="Post %d" % i, subtitle="subtitle", text="content")
+            post.publish()
+        response = self.client.get(reverse('postList'))
+        response = self.client.get(reverse('postList'), {'cursor': response.context['page'].next_cursor})
+        response = self.client.get(reverse('postList'), {'cursor': response.context['page'].previous_cursor})
+        self.assertEqual(len(response.context['posts']), 10)
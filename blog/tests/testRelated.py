@@ -0,0 +1,117 @@
+from io import StringIO
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from django.urls import reverse
+from ..jobs import run_pending
+from ..models import Category, Job, Post, RelatedPost
+from ..related import rebuild_related_posts, refresh_related, related_posts
+
+
+class RelatedPostsTest(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.user = User.objects.create_user(username="testuser", password="password")
+        self.python = Category.objects.create(name="Python")
+        self.django = Category.objects.create(name="Django")
+        self.sql = Category.objects.create(name="SQL")
+        self.post = self.create("Post", self.python, self.django)
+        self.both = self.create("Both", self.python, self.django)
+        self.one = self.create("One", self.python)
+        self.other = self.create("Other", self.sql)
+
+    def create(self, title, *categories, published=True):
+        post = Post.objects.create(author=self.user, title=title, subtitle="s", text="t")
+        post.category.add(*categories)
+        if published:
+            post.publish()
+        return post
+
+    def entries(self, post):
+        return list(RelatedPost.objects.filter(post=post).order_by('-score', '-related_id')
+                    .values_list('related__title', 'score'))
+
+    def test_ranked_by_shared_categories(self):
+        self.assertEqual(self.entries(self.post), [("Both", 2), ("One", 1)])
+        self.assertEqual(self.entries(self.other), [])
+
+    def test_incremental_matches_rebuild(self):
+        expected = {post.pk: self.entries(post) for post in Post.objects.all()}
+        rebuild_related_posts()
+        self.assertEqual({post.pk: self.entries(post) for post in Post.objects.all()}, expected)
+
+    def test_drafts_are_not_suggested(self):
+        draft = self.create("Draft", self.python, self.django, published=False)
+        self.assertNotIn("Draft", [title for title, score in self.entries(self.post)])
+        self.assertEqual(self.entries(draft), [("Both", 2), ("Post", 2), ("One", 1)])
+        draft.publish()
+        self.assertEqual(self.entries(self.post)[0], ("Draft", 2))
+
+    def test_unpublish_removes_suggestion(self):
+        self.both.published_date = None
+        self.both.save()
+        self.assertEqual(self.entries(self.post), [("One", 1)])
+
+    def test_category_change_moves_post(self):
+        self.other.category.add(self.python, self.django)
+        self.assertEqual(self.entries(self.post)[0], ("Other", 2))
+        self.other.category.clear()
+        self.assertNotIn("Other", [title for title, score in self.entries(self.post)])
+
+    def test_reverse_category_add(self):
+        self.sql.post_set.add(self.post)
+        self.assertEqual(self.entries(self.other), [("Post", 1)])
+
+    def test_delete_cascades(self):
+        self.both.delete()
+        self.assertEqual(self.entries(self.post), [("One", 1)])
+
+    def test_lookup_is_one_query(self):
+        with self.assertNumQueries(1):
+            posts = related_posts(self.post.pk)
+            self.assertEqual([post.title for post in posts], ["Both", "One"])
+
+    def test_refresh_query_count_does_not_grow(self):
+        def queries(pks):
+            with CaptureQueriesContext(connection) as context:
+                refresh_related(pks)
+            return len(context.captured_queries)
+        self.assertEqual(queries([self.post.pk]), queries([self.post.pk, self.both.pk, self.one.pk]))
+
+    def test_detail_page_shows_related(self):
+        response = self.client.get(reverse('postDetail', args=[self.post.pk]))
+        self.assertContains(response, 'Posts relacionados')
+        self.assertEqual(list(response.context['related_posts']), [self.both, self.one])
+
+    def test_title_change_invalidates_related_pages(self):
+        self.client.get(reverse('postDetail', args=[self.post.pk]))
+        self.both.title = "Renamed"
+        self.both.save()
+        response = self.client.get(reverse('postDetail', args=[self.post.pk]))
+        self.assertContains(response, "Renamed")
+
+    def test_batch_publish_updates_related(self):
+        draft = self.create("Draft", self.python, self.django, published=False)
+        self.client.login(username="testuser", password="password")
+        self.client.post(reverse('postModerate'), {'action': 'publish', 'ids': [draft.pk]})
+        self.assertEqual(self.entries(self.post)[0], ("Draft", 2))
+
+    @override_settings(BLOG_RELATED_IN_BACKGROUND=True)
+    def test_background_refresh(self):
+        draft = self.create("Draft", self.python, self.django, published=False)
+        draft.category.remove(self.django)
+        draft.publish()
+        self.assertEqual(list(Job.objects.values_list('key', flat=True)), ['related:%s' % draft.pk])
+        self.assertNotIn("Draft", [title for title, score in self.entries(self.post)])
+        run_pending()
+        self.assertEqual(self.entries(draft), [("One", 1), ("Both", 1), ("Post", 1)])
+        self.assertIn(("Draft", 1), self.entries(self.post))
+
+    def test_command(self):
+        RelatedPost.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_related_posts', stdout=out, stderr=StringIO())
+        self.assertIn('Rebuilt 6 related-post entries.', out.getvalue())
@@ -0,0 +1,98 @@
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.test import TestCase
+from django.contrib.auth.models import User
+from ..models import Category, Post
+from .. import rendering
+from django.urls import reverse
+
+class RenderedTextTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="password")
+        self.category = Category.objects.create(name="Technology")
+        self.post = Post.objects.create(
+            author=self.user,
+            title="Post 1",
+            subtitle="subtitle",
+            text="linha 1\nlinha <b>2</b>",
+        )
+        self.post.category.add(self.category)
+        self.post.publish()
+
+    def test_rendered_on_save(self):
+        self.assertEqual(self.post.text_html, "linha 1<br>linha &lt;b&gt;2&lt;/b&gt;")
+        self.assertEqual(self.post.excerpt, "subtitle")
+        self.assertEqual(self.post.text_hash, rendering.content_hash(self.post.subtitle, self.post.text))
+
+    def test_excerpt_is_bounded(self):
+        self.post.subtitle = "palavra " * 200
+        self.post.save()
+        self.assertLessEqual(len(self.post.excerpt), rendering.EXCERPT_LENGTH)
+        self.assertTrue(self.post.excerpt.endswith("…"))
+
+    def test_excerpt_falls_back_to_text(self):
+        self.post.subtitle = ""
+        self.post.save()
+        self.assertEqual(self.post.excerpt, "linha 1 linha <b>2</b>")
+
+    def test_subtitle_change_updates_excerpt(self):
+        self.post.subtitle = "novo subtitulo"
+        self.post.save(update_fields=['subtitle'])
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.excerpt, "novo subtitulo")
+
+    def test_only_rerendered_when_text_changes(self):
+        with mock.patch.object(rendering, 'render_text', wraps=rendering.render_text) as render:
+            self.post.title = "Outro titulo"
+            self.post.save()
+            self.assertFalse(render.called)
+            self.post.text = "novo texto"
+            self.post.save()
+            self.assertEqual(render.call_count, 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.text_html, "novo texto")
+
+    def test_update_fields_includes_rendered_fields(self):
+        self.post.text = "novo texto"
+        self.post.save(update_fields=['text'])
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.text_html, "novo texto")
+
+    def test_postEdit_rerenders(self):
+        self.client.login(username="testuser", password="password")
+        self.client.post(reverse('postEdit', args=[self.post.pk]), {
+            'title': 'Post 1',
+            'subtitle': 'subtitle',
+            'category': [self.category.pk],
+            'text': 'editado\nagora',
+        })
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.text_html, "editado<br>agora")
+
+    def test_postDetail_uses_rendered_html(self):
+        response = self.client.get(reverse('postDetail', args=[self.post.pk]))
+        self.assertContains(response, "linha 1<br>linha &lt;b&gt;2&lt;/b&gt;")
+
+    def test_postDetail_before_backfill(self):
+        Post.objects.filter(pk=self.post.pk).update(text_html='', excerpt='', text_hash='')
+        response = self.client.get(reverse('postDetail', args=[self.post.pk]))
+        self.assertContains(response, "linha 1<br>linha &lt;b&gt;2&lt;/b&gt;")
+
+    def test_render_posts_backfills(self):
+        Post.objects.filter(pk=self.post.pk).update(text_html='', excerpt='', text_hash='')
+        output = StringIO()
+        call_command('render_posts', stdout=output, stderr=StringIO())
+        self.assertIn("Rendered 1 of 1 posts.", output.getvalue())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.text_html, "linha 1<br>linha &lt;b&gt;2&lt;/b&gt;")
+
+        output = StringIO()
+        call_command('render_posts', stdout=output, stderr=StringIO())
+        self.assertIn("Rendered 0 of 1 posts.", output.getvalue())
+
+    def test_render_version_change_rerenders(self):
+        with mock.patch.object(rendering, 'RENDER_VERSION', rendering.RENDER_VERSION + 1):
+            output = StringIO()
+            call_command('render_posts', stdout=output, stderr=StringIO())
+        self.assertIn("Rendered 1 of 1 posts.", output.getvalue())
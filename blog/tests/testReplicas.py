@@ -0,0 +1,121 @@
+import os
+import shutil
+import tempfile
+from asgiref.sync import async_to_sync
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections, router
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from django.urls import reverse
+from ..cache import RESPONSE_TIMEOUT, response_timeout
+from ..models import Category, Post
+
+REPLICAS = ['replica1', 'replica2']
+
+@override_settings(BLOG_READ_REPLICAS=REPLICAS, BLOG_CACHE_VIEWS=False, BLOG_VIEW_COUNTS=False)
+class ReplicaRoutingTest(TransactionTestCase):
+    # As replicas sao arquivos SQLite temporarios, copiados do banco de teste
+    # com sync_replicas (TransactionTestCase: o backup do sqlite3 nao copia de
+    # uma conexao com transacao aberta); o que for gravado depois so existe no
+    # primario.
+    def setUp(self):
+        caches['default'].clear()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        for alias in REPLICAS:
+            connections.databases[alias] = dict(
+                connections.databases[DEFAULT_DB_ALIAS], NAME=os.path.join(directory, alias + '.sqlite3'),
+            )
+            self.addCleanup(self.remove_alias, alias)
+
+        self.user = User.objects.create_user(username="testuser", password="password")
+        self.category = Category.objects.create(name="Technology")
+        self.post = self.create_post("Post 1")
+        call_command('sync_replicas', stdout=open(os.devnull, 'w'))
+
+    def remove_alias(self, alias):
+        connections[alias].close()
+        del connections[alias]
+        del connections.databases[alias]
+
+    def create_post(self, title):
+        post = Post.objects.create(author=self.user, title=title, subtitle="subtitle", text="content")
+        post.category.add(self.category)
+        post.publish()
+        return post
+
+    def test_reads_go_to_replicas_round_robin(self):
+        with CaptureQueriesContext(connections['replica1']) as first, \
+             CaptureQueriesContext(connections['replica2']) as second, \
+             CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as primary:
+            self.client.get(reverse('postList'))
+            self.client.get(reverse('postList'))
+        self.assertGreater(len(first.captured_queries), 0)
+        self.assertGreater(len(second.captured_queries), 0)
+        self.assertEqual(len(primary.captured_queries), 0)
+
+    def test_replica_lag_is_visible_to_other_sessions(self):
+        post = self.create_post("Post 2")
+        response = self.client.get(reverse('postDetail', args=[post.pk]))
+        self.assertEqual(response.status_code, 404)
+        call_command('sync_replicas', stdout=open(os.devnull, 'w'))
+        response = self.client.get(reverse('postDetail', args=[post.pk]))
+        self.assertContains(response, "Post 2")
+
+    def test_read_your_own_writes(self):
+        self.client.login(username="testuser", password="password")
+        response = self.client.post(reverse('postNew'), {
+            'title': 'Novo post',
+            'subtitle': 'subtitle',
+            'category': [self.category.pk],
+            'text': 'content',
+        }, follow=True)
+        self.assertContains(response, "Novo post")
+        response = self.client.get(reverse('myPosts', args=[self.user.pk]))
+        self.assertContains(response, "Novo post")
+
+        other = self.client_class()
+        post = Post.objects.get(title='Novo post')
+        self.assertEqual(other.get(reverse('postDetail', args=[post.pk])).status_code, 404)
+
+    @override_settings(BLOG_REPLICA_LAG_SECONDS=-1)
+    def test_pin_expires(self):
+        self.client.login(username="testuser", password="password")
+        self.client.post(reverse('postNew'), {
+            'title': 'Novo post',
+            'subtitle': 'subtitle',
+            'category': [self.category.pk],
+            'text': 'content',
+        })
+        response = self.client.get(reverse('myPosts', args=[self.user.pk]))
+        self.assertNotContains(response, "Novo post")
+
+    def test_async_views_read_from_replicas(self):
+        post = self.create_post("Post 2")
+        async def get():
+            return await self.async_client.get(reverse('postDetail', args=[post.pk]))
+        self.assertEqual(async_to_sync(get)().status_code, 404)
+
+    @override_settings(BLOG_CACHE_VIEWS=True, BLOG_REPLICA_LAG_SECONDS=0)
+    def test_cached_page_from_lagging_replica_is_not_kept(self):
+        # a escrita troca as tags, mas a pagina nova ainda sai da replica atrasada
+        self.create_post("Post 2")
+        self.assertNotContains(self.client.get(reverse('postList')), "Post 2")
+        call_command('sync_replicas', stdout=open(os.devnull, 'w'))
+        self.assertContains(self.client.get(reverse('postList')), "Post 2")
+
+    @override_settings(BLOG_CACHE_VIEWS=True)
+    def test_replica_pages_are_cached_for_the_lag(self):
+        response = self.client.get(reverse('postList'))
+        self.assertIn(response.read_replica, REPLICAS)
+        self.assertEqual(response_timeout(response), 5)
+        del response.read_replica
+        self.assertEqual(response_timeout(response), RESPONSE_TIMEOUT)
+
+    def test_writes_go_to_primary(self):
+        post = Post.objects.using('replica1').get(pk=self.post.pk)
+        self.assertEqual(router.db_for_write(Post, instance=post), DEFAULT_DB_ALIAS)
+        self.assertEqual(router.db_for_read(Post), DEFAULT_DB_ALIAS)
+
@@ -0,0 +1,98 @@
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.utils import timezone
+from ..models import Category, Post
+from ..search import match_query, search_page, search_posts
+from django.urls import reverse
+
+class SearchTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="password")
+        self.category = Category.objects.create(name="Technology")
+        self.title_match = Post.objects.create(
+            author=self.user,
+            title="Algoritmos de ordenação",
+            subtitle="subtitle",
+            text="content",
+            published_date=timezone.now(),
+        )
+        self.text_match = Post.objects.create(
+            author=self.user,
+            title="Outro post",
+            subtitle="subtitle",
+            text="Um texto que fala de algoritmos no meio do corpo",
+            published_date=timezone.now(),
+        )
+        self.other = Post.objects.create(
+            author=self.user,
+            title="Redes",
+            subtitle="subtitle",
+            text="content",
+            published_date=timezone.now(),
+        )
+
+    def test_match_query_escapes_syntax(self):
+        self.assertEqual(match_query('algo "OR" NEAR('), '"algo"* "OR"* "NEAR"*')
+        self.assertIsNone(match_query('  ()" '))
+
+    def test_searches_title_subtitle_and_text(self):
+        results = list(search_posts(Post.objects.all(), "algoritmos"))
+        self.assertCountEqual(results, [self.title_match, self.text_match])
+
+    def test_title_match_ranks_first(self):
+        page = search_page(Post.objects.all(), "algoritmos", None)
+        self.assertEqual(list(page), [self.title_match, self.text_match])
+        self.assertLess(page.object_list[0].search_rank, page.object_list[1].search_rank)
+
+    def test_search_page_query_count(self):
+        with self.assertNumQueries(3):
+            page = search_page(Post.objects.for_listing(), "algoritmos", None)
+            self.assertEqual(len(page), 2)
+
+    def test_prefix_and_diacritics(self):
+        results = list(search_posts(Post.objects.all(), "ordenacao"))
+        self.assertEqual(results, [self.title_match])
+        results = list(search_posts(Post.objects.all(), "algo ord"))
+        self.assertEqual(results, [self.title_match])
+
+    def test_index_follows_edits_and_deletes(self):
+        self.other.title = "Algoritmos em redes"
+        self.other.save()
+        self.assertIn(self.other, search_posts(Post.objects.all(), "algoritmos"))
+        self.title_match.delete()
+        self.assertNotIn(self.title_match, search_posts(Post.objects.all(), "algoritmos"))
+        Post.objects.filter(pk=self.text_match.pk).update(text="nada")
+        self.assertEqual(list(search_posts(Post.objects.all(), "algoritmos")), [self.other])
+
+    @override_settings(BLOG_FULLTEXT_SEARCH=False)
+    def test_fallback_without_fulltext(self):
+        results = list(search_posts(Post.objects.all(), "algoritmos"))
+        self.assertCountEqual(results, [self.title_match, self.text_match])
+
+    def test_search_view_paginates_by_rank(self):
+        response = self.client.get(reverse('postList'), {"search": "algoritmos"})
+        self.assertEqual(list(response.context['posts']), [self.title_match, self.text_match])
+
+    def test_search_pages_follow_rank_cursor(self):
+        for i in range(15):
+            Post.objects.create(author=self.user, title="Algoritmos %d" % i, subtitle="s", text="t")
+        response = self.client.get(reverse('postList'), {"search": "algoritmos"})
+        first = list(response.context['posts'])
+        next_cursor = response.context['page'].next_cursor
+        response = self.client.get(reverse('postList'), {"search": "algoritmos", "cursor": next_cursor})
+        second = list(response.context['posts'])
+        self.assertEqual(len(first + second), 17)
+        self.assertEqual(set(first + second), set(search_posts(Post.objects.all(), "algoritmos")))
+        self.assertLessEqual(first[-1].search_rank, second[0].search_rank)
+        self.assertFalse(response.context['page'].has_next)
+
+        previous_cursor = response.context['page'].previous_cursor
+        response = self.client.get(reverse('postList'), {"search": "algoritmos", "cursor": previous_cursor})
+        self.assertEqual(list(response.context['posts']), first)
+        self.assertFalse(response.context['page'].has_previous)
+
+    def test_search_page_respects_queryset(self):
+        self.text_match.published_date = None
+        self.text_match.save()
+        page = search_page(Post.objects.filter(published_date__isnull=False), "algoritmos", None)
+        self.assertEqual(list(page), [self.title_match])
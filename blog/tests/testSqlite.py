@@ -0,0 +1,89 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import SimpleTestCase, override_settings
+
+PRAGMAS = {
+    'busy_timeout': 200,
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -2000,
+    'mmap_size': 1024 * 1024,
+}
+
+class SqlitePragmasTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.settings_dict = dict(connection.settings_dict, NAME=os.path.join(directory, 'db.sqlite3'))
+        self.connections = []
+
+    def tearDown(self):
+        for wrapper in self.connections:
+            wrapper.close()
+
+    def open(self):
+        wrapper = DatabaseWrapper(self.settings_dict, alias='pragmas')
+        wrapper.ensure_connection()
+        self.connections.append(wrapper)
+        return wrapper
+
+    def pragma(self, wrapper, name):
+        return wrapper.connection.execute('PRAGMA %s' % name).fetchone()[0]
+
+    @override_settings(BLOG_SQLITE_PRAGMAS=PRAGMAS)
+    def test_pragmas_applied_on_connect(self):
+        wrapper = self.open()
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'wal')
+        self.assertEqual(self.pragma(wrapper, 'synchronous'), 1)
+        self.assertEqual(self.pragma(wrapper, 'cache_size'), -2000)
+        self.assertEqual(self.pragma(wrapper, 'busy_timeout'), 200)
+        self.assertEqual(self.pragma(wrapper, 'mmap_size'), 1024 * 1024)
+
+    @override_settings(BLOG_SQLITE_PRAGMAS={})
+    def test_empty_profile_keeps_defaults(self):
+        self.assertEqual(self.pragma(self.open(), 'journal_mode'), 'delete')
+
+    def read_during_write(self):
+        writer = self.open()
+        writer.connection.execute('CREATE TABLE post (id INTEGER PRIMARY KEY)')
+        writer.connection.execute('INSERT INTO post VALUES (1)')
+        reader = self.open()
+        result = {}
+
+        def read():
+            start = time.perf_counter()
+            try:
+                result['count'] = reader.connection.execute('SELECT count(*) FROM post').fetchone()[0]
+            except sqlite3.OperationalError as error:
+                result['error'] = error
+            result['seconds'] = time.perf_counter() - start
+
+        # Gravacao em andamento (como um postNew no meio do commit).
+        writer.connection.execute('BEGIN EXCLUSIVE')
+        writer.connection.execute('INSERT INTO post VALUES (2)')
+        try:
+            thread = threading.Thread(target=read)
+            thread.start()
+            thread.join()
+        finally:
+            writer.connection.execute('COMMIT')
+        return result
+
+    @override_settings(BLOG_SQLITE_PRAGMAS=PRAGMAS)
+    def test_readers_do_not_stall_during_writes(self):
+        result = self.read_during_write()
+        self.assertNotIn('error', result)
+        self.assertEqual(result['count'], 1)
+        self.assertLess(result['seconds'], 0.1)
+
+    @override_settings(BLOG_SQLITE_PRAGMAS=dict(PRAGMAS, journal_mode='DELETE'))
+    def test_rollback_journal_blocks_readers(self):
+        result = self.read_during_write()
+        self.assertIn('locked', str(result['error']))
+        self.assertGreaterEqual(result['seconds'], 0.2)
@@ -0,0 +1,96 @@
+import shutil
+import tempfile
+from io import StringIO
+from pathlib import Path
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+from ..models import Category, Post
+from ..pagination import PAGE_SIZE
+from ..static_site import load_manifest
+
+
+@override_settings(BLOG_VIEW_COUNTS=False)
+class StaticSiteTest(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.user = User.objects.create_user(username="testuser", password="password")
+        self.python = Category.objects.create(name="Python")
+        self.post = self.create("Primeiro", self.python)
+
+    def create(self, title, *categories, published=True):
+        post = Post.objects.create(author=self.user, title=title, subtitle="s", text="t",
+                                   published_date=timezone.now() if published else None)
+        post.category.add(*categories)
+        return post
+
+    def build(self, *args):
+        output = StringIO()
+        call_command('build_static_site', '--output', str(self.directory), '--processes', '0', *args, stdout=output)
+        return output.getvalue()
+
+    def read(self, name):
+        return (self.directory / name).read_text()
+
+    def test_renders_every_page(self):
+        draft = self.create("Rascunho", published=False)
+        self.build()
+        self.assertIn("Primeiro", self.read('index.html'))
+        self.assertIn("Primeiro", self.read('post/%d/index.html' % self.post.pk))
+        self.assertIn("Primeiro", self.read('post/category/%d/index.html' % self.python.pk))
+        self.assertIn("Primeiro", self.read('post/%d/myPosts/index.html' % self.user.pk))
+        self.assertFalse((self.directory / ('post/%d/index.html' % draft.pk)).exists())
+        self.assertIn(reverse('postDetail', args=[self.post.pk]), load_manifest(self.directory))
+
+    def test_only_changed_pages_are_rendered_again(self):
+        other = Category.objects.create(name="SQL")
+        self.create("Consultas", other)
+        self.build()
+        self.assertIn("Rendered 0 of", self.build())
+        self.assertIn("Rendered 6 of 6", self.build('--force'))
+
+        self.post.title = "Primeiro editado"
+        self.post.save()
+        manifest = load_manifest(self.directory)
+        output = self.build()
+        changed = {path for path, page in load_manifest(self.directory).items()
+                   if page['fingerprint'] != manifest[path]['fingerprint']}
+        self.assertEqual(changed, {reverse('postList'), reverse('postDetail', args=[self.post.pk]),
+                                   reverse('postFilter', args=[self.python.pk]),
+                                   reverse('myPosts', args=[self.user.pk])})
+        self.assertIn("Rendered 4 of", output)
+        self.assertIn("Primeiro editado", self.read('post/%d/index.html' % self.post.pk))
+
+    def test_category_rename_rerenders_listings(self):
+        self.build()
+        self.python.name = "Python 3"
+        self.python.save()
+        self.build()
+        self.assertIn("Python 3", self.read('index.html'))
+        self.assertIn("Python 3", self.read('post/%d/index.html' % self.post.pk))
+
+    def test_deleted_post_is_removed(self):
+        self.build()
+        pk = self.post.pk
+        self.post.delete()
+        self.build()
+        self.assertFalse((self.directory / 'post' / str(pk)).exists())
+        self.assertNotIn(reverse('postDetail', args=[pk]), load_manifest(self.directory))
+        self.assertNotIn("Primeiro", self.read('index.html'))
+
+    def test_pagination_files(self):
+        for i in range(PAGE_SIZE):
+            self.create("Post %d" % i, self.python)
+        self.build()
+        # a segunda pagina pelo cursor "n" e a primeira de volta pelo cursor "p"
+        names = sorted(path.name for path in (self.directory / 'cursor').iterdir())
+        self.assertEqual(len(names), 2)
+        for name in names:
+            response = self.client.get(reverse('postList'), {'cursor': name[:-len('.html')]})
+            self.assertEqual(self.read('cursor/' + name), response.content.decode())
+        self.assertIn(self.read('index.html'), {self.read('cursor/' + name) for name in names})
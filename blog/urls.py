@@ -1,14 +1,26 @@
 from django.urls import path
 from . import views
 
-urlpatterns = [
-  path('', views.postList, name='postList'),
-  path('register/', views.register, name='register'),
-  path('post/<int:pk>/', views.postDetail, name='postDetail'),
-  path('post/new/', views.postNew, name='postNew'),
-  path('post/category/<int:id_category>/', views.postFilter, name='postFilter'),
-  path('post/<int:pk>/publish/', views.postPublish, name='postPublish'),
-  path('post/<pk>/remove/', views.postRemove, name='postRemove'),
-  path('post/<pk>/edit/', views.postEdit, name='postEdit'),
-  path('post/<pk>/myPosts/', views.myPosts, name='myPosts'),
-]
\ No newline at end of file
+def build_urlpatterns(read):
+  # read: modulo com as views de leitura (blog.views ou blog.async_views)
+  return [
+    path('', read.postList, name='postList'),
+    path('register/', views.register, name='register'),
+    path('post/<int:pk>/', read.postDetail, name='postDetail'),
+    path('post/mostViewed/', read.mostViewed, name='mostViewed'),
+    path('post/new/', views.postNew, name='postNew'),
+    path('post/category/', read.postCategories, name='postCategories'),
+    path('post/category/<int:id_category>/', read.postFilter, name='postFilter'),
+    path('archive/<int:year>/', read.postArchive, name='postArchiveYear'),
+    path('archive/<int:year>/<int:month>/', read.postArchive, name='postArchiveMonth'),
+    path('post/<int:pk>/publish/', views.postPublish, name='postPublish'),
+    path('post/moderate/', views.postModerate, name='postModerate'),
+    path('post/<pk>/remove/', views.postRemove, name='postRemove'),
+    path('post/<pk>/edit/', views.postEdit, name='postEdit'),
+    path('post/<pk>/myPosts/', read.myPosts, name='myPosts'),
+    path('feed/<str:feed_format>/', read.postFeed, name='postFeed'),
+    path('post/category/<int:id_category>/feed/<str:feed_format>/', read.categoryFeed, name='categoryFeed'),
+    path('post/<int:pk>/myPosts/feed/<str:feed_format>/', read.authorFeed, name='authorFeed'),
+  ]
+
+urlpatterns = build_urlpatterns(views)
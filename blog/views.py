@@ -1,11 +1,32 @@
+import json
 from django.shortcuts import render, get_object_or_404
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import require_POST
+from django.urls import reverse
+from django.utils.http import urlencode
 from django.utils import timezone
-from .models import Post, Category
+from django.contrib.auth.models import User
+from .models import Post, Category, CategoryStats
 from .forms import PostForm
 from django.shortcuts import redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import login, authenticate, logout
 from .forms import RegistrationForm, LoginForm
+from .pagination import paginate
+from .search import search_page
+from .cache import cache_response, view_tags
+from .conditional import conditional_page, list_last_modified, next_scheduled, post_last_modified
+from .feeds import CONTENT_TYPES, FEED_TITLE, Feed, feed_response
+from .replicas import pin_to_primary, read_from_replica
+from .counters import count_view
+from .moderation import ModerationError, moderate, owned_posts
+from .related import related_posts
+from .archive import period
+from django.conf import settings
+
+MOST_VIEWED = getattr(settings, 'BLOG_MOST_VIEWED', 10)
+MAX_FILTER_CATEGORIES = getattr(settings, 'BLOG_MAX_FILTER_CATEGORIES', 20)
+MAX_ID = 2 ** 63 - 1
 
 def custom_login(request):
     if request.method == 'POST':
@@ -34,23 +55,45 @@ def register(request):
 
     return render(request, 'registration/register.html', {'form': form})
 
-def postList(request):
-  posts = Post.objects.filter(published_date__lte=timezone.now()).order_by('published_date') 
-  category = Category.objects.all()
-  search = request.GET.get('search')
+def listPage(request, posts, search):
+  cursor = request.GET.get('cursor')
   if search:
-    posts = Post.objects.filter(title__icontains = search)
-  return render(request, 'blog/postList.html', {'posts': posts, 'category': category})
+    # a busca vale para todos os posts, ordenados por relevancia (bm25)
+    return search_page(Post.objects.for_listing(), search, cursor)
+  return paginate(posts, cursor)
 
-def postDetail(request, pk):
-  post = get_object_or_404(Post, pk=pk)
+# As views de leitura tem duas partes: *Page monta o template e o contexto e a
+# view so renderiza; blog.async_views usa as mesmas funcoes nas versoes async.
+
+def postListPage(request):
+  posts = Post.objects.for_listing().filter(published_date__lte=timezone.now()).order_by('published_date') 
+  search = request.GET.get('search')
+  page = listPage(request, posts, search)
+  return 'blog/postList.html', {'posts': page.object_list, 'page': page, 'search': search}
+
+@cache_response('list', 'categories')
+@read_from_replica
+@conditional_page('list', 'categories', last_modified=list_last_modified, expires=next_scheduled)
+def postList(request):
+  return render(request, *postListPage(request))
+
+def postDetailPage(request, pk):
+  # o corpo ja vem renderizado em text_html; text so e lido se o post ainda nao
+  # passou pelo render_posts
+  post = get_object_or_404(Post.objects.defer('text'), pk=pk)
   search = request.GET.get('search')
-  category = Category.objects.all()
   user = request.user
   if search:
-    post = Post.objects.filter(title__icontains = search)
-    return render(request, 'blog/postList.html', {'posts': post, 'category': category})
-  return render(request, 'blog/postDetail.html', {'post': post, 'user': user})
+    page = listPage(request, None, search)
+    return 'blog/postList.html', {'posts': page.object_list, 'page': page, 'search': search}
+  return 'blog/postDetail.html', {'post': post, 'user': user, 'related_posts': related_posts(pk)}
+
+@count_view
+@cache_response('post:{pk}', 'categories')
+@read_from_replica
+@conditional_page('post:{pk}', 'categories', last_modified=post_last_modified)
+def postDetail(request, pk):
+  return render(request, *postDetailPage(request, pk))
 
 @login_required
 def postNew(request):
@@ -62,45 +105,184 @@ def postNew(request):
           #post.published_date = timezone.now()
           post.save()
           form.save_m2m()
+          pin_to_primary(request)
           return redirect('postDetail', pk=post.pk)
   else:
       form = PostForm() 
   return render(request, 'blog/postNew.html', {'form': form})
 
+def postFilterPage(request, id_category):
+  posts = Post.objects.for_listing().filter(category = id_category)
+  search = request.GET.get('search')
+  page = listPage(request, posts, search)
+  stats = CategoryStats.objects.filter(category = id_category).first()
+  return 'blog/postList.html', {'posts': page.object_list, 'page': page, 'search': search, 'category_stats': stats} #retornar só nova lista de postsList filtrado pela categoria
+
+@cache_response('category:{id_category}', 'list', 'categories')
+@read_from_replica
+@conditional_page('category:{id_category}', 'list', 'categories', last_modified=list_last_modified, expires=next_scheduled)
 def postFilter(request, id_category):
-  posts = Post.objects.filter(category = id_category)
-  category = Category.objects.all()
+  return render(request, *postFilterPage(request, id_category))
+
+def categoryFilter(request):
+  # ?c=1&c=4&mode=all|any: ids validos, sem repeticao, no maximo MAX_FILTER_CATEGORIES
+  ids = []
+  for value in request.GET.getlist('c'):
+    try:
+      pk = int(value)
+    except ValueError:
+      continue
+    # fora do INTEGER do SQLite a consulta falharia
+    if 0 < pk <= MAX_ID and pk not in ids:
+      ids.append(pk)
+  mode = 'all' if request.GET.get('mode') == 'all' else 'any'
+  return ids[:MAX_FILTER_CATEGORIES], mode
+
+def postCategoriesPage(request):
+  ids, mode = categoryFilter(request)
+  if not ids:
+    raise Http404('No categories selected')
+  posts = Post.objects.for_listing().in_categories(ids, mode).filter(published_date__lte=timezone.now())
   search = request.GET.get('search')
-  if search:
-    posts = Post.objects.filter(title__icontains = search)
-  return render(request, 'blog/postList.html', {'posts': posts, 'category': category}) #retornar só nova lista de postsList filtrado pela categoria
+  cursor = request.GET.get('cursor')
+  # a busca aqui fica restrita as categorias escolhidas
+  page = search_page(posts, search, cursor) if search else paginate(posts, cursor)
+  params = [('c', pk) for pk in ids] + [('mode', mode)]
+  categories = Category.objects.filter(pk__in=ids).order_by('name')
+  return 'blog/postList.html', {'posts': page.object_list, 'page': page, 'search': search,
+                                'filter_params': params, 'filter_query': urlencode(params),
+                                'filter_categories': categories, 'filter_mode': mode}
 
-def myPosts(request, pk):
-  post = Post.objects.filter(author = pk)
-  category = Category.objects.all()
+@cache_response('list', 'categories')
+@read_from_replica
+@conditional_page('list', 'categories', last_modified=list_last_modified, expires=next_scheduled)
+def postCategories(request):
+  return render(request, *postCategoriesPage(request))
+
+def postArchivePage(request, year, month=None):
+  # as contagens da barra lateral vem do blog.archive; aqui so a faixa de datas
+  if not 1 <= year < 9999 or (month is not None and not 1 <= month <= 12):
+    raise Http404('Invalid archive period')
+  start, end = period(year, month)
+  posts = (Post.objects.for_listing().filter(published_date__gte=start, published_date__lt=end)
+           .filter(published_date__lte=timezone.now()))
   search = request.GET.get('search')
-  if search:
-    post = Post.objects.filter(title__icontains = search)
-    return render(request, 'blog/postList.html', {'posts': post, 'category': category})
-  return render(request, 'blog/postList.html', {'post': post, 'category': category}) #retornar só nova lista de postsList filtrado pela categoria
+  page = listPage(request, posts, search)
+  return 'blog/postList.html', {'posts': page.object_list, 'page': page, 'search': search,
+                                'archive_period': start, 'archive_month': month}
+
+@cache_response('list', 'categories')
+@read_from_replica
+@conditional_page('list', 'categories', last_modified=list_last_modified, expires=next_scheduled)
+def postArchive(request, year, month=None):
+  return render(request, *postArchivePage(request, year, month))
+
+def myPostsPage(request, pk):
+  post = Post.objects.for_listing().filter(author = pk)
+  search = request.GET.get('search')
+  page = listPage(request, post, search)
+  return 'blog/postList.html', {'posts': page.object_list, 'page': page, 'search': search} #retornar só nova lista de postsList filtrado pela categoria
+
+@cache_response('author:{pk}', 'list', 'categories')
+@read_from_replica
+@conditional_page('author:{pk}', 'list', 'categories', last_modified=list_last_modified, expires=next_scheduled)
+def myPosts(request, pk):
+  return render(request, *myPostsPage(request, pk))
+
+def mostViewedPage(request):
+  # contagens ja gravadas pelo blog.counters; as do buffer entram no proximo flush
+  posts = (Post.objects.for_listing('view_count').filter(published_date__lte=timezone.now())
+           .order_by('-view_count', '-pk')[:MOST_VIEWED])
+  return 'blog/postList.html', {'posts': posts, 'most_viewed': True}
+
+@cache_response('views', 'list', 'categories')
+@read_from_replica
+@conditional_page('views', 'list', 'categories', last_modified=list_last_modified, expires=next_scheduled)
+def mostViewed(request):
+  return render(request, *mostViewedPage(request))
+
+# Feeds (rss, atom, json) de todos os posts, de uma categoria ou de um autor.
+# Mesmo esquema das paginas: *FeedPage monta o feed e a view so responde em
+# streaming; blog.async_views responde sem streaming.
+
+def feedPage(request, feed_format, title, link, tags, kwargs, filters):
+  if feed_format not in CONTENT_TYPES:
+    raise Http404('Unknown feed format')
+  feed = Feed(request, title, link, view_tags(request, tags, kwargs))
+  return {'request': request, 'feed_format': feed_format, 'feed': feed, 'tags': tags, 'kwargs': kwargs, 'filters': filters}
+
+def postFeedPage(request, feed_format):
+  return feedPage(request, feed_format, FEED_TITLE, reverse('postList'), ['list'], {}, {})
+
+def categoryFeedPage(request, id_category, feed_format):
+  category = get_object_or_404(Category, pk=id_category)
+  return feedPage(request, feed_format, '%s - %s' % (FEED_TITLE, category.name),
+                  reverse('postFilter', args=[id_category]), ['category:{id_category}'],
+                  {'id_category': id_category}, {'category': id_category})
+
+def authorFeedPage(request, pk, feed_format):
+  author = get_object_or_404(User, pk=pk)
+  return feedPage(request, feed_format, '%s - %s' % (FEED_TITLE, author.username),
+                  reverse('myPosts', args=[pk]), ['author:{pk}'], {'pk': pk}, {'author': pk})
+
+@conditional_page('list', last_modified=list_last_modified)
+def postFeed(request, feed_format):
+  return feed_response(**postFeedPage(request, feed_format))
+
+@conditional_page('category:{id_category}', last_modified=list_last_modified)
+def categoryFeed(request, id_category, feed_format):
+  return feed_response(**categoryFeedPage(request, id_category, feed_format))
+
+@conditional_page('author:{pk}', last_modified=list_last_modified)
+def authorFeed(request, pk, feed_format):
+  return feed_response(**authorFeedPage(request, pk, feed_format))
 
 @login_required
 def postDraftList(request):
-    posts = Post.objects.filter(published_date__isnull=True).order_by('created_date')
+    posts = Post.objects.for_listing().filter(published_date__isnull=True).order_by('created_date')
     return render(request, 'blog/postDraftList.html', {'posts': posts})
 
 @login_required
 def postPublish(request, pk):
     post = get_object_or_404(Post, pk=pk)
     post.publish()
+    pin_to_primary(request)
     return redirect('/')
 
 @login_required
 def postRemove(request, pk):
     post = get_object_or_404(Post, pk=pk)
     post.delete()
+    pin_to_primary(request)
     return redirect('/')
 
+def moderationRequest(request):
+  # JSON {"action": ..., "ids": [...]} ou formulario com action e varios ids
+  if request.content_type == 'application/json':
+    try:
+      data = json.loads(request.body)
+      return data['action'], [int(pk) for pk in data['ids']]
+    except (ValueError, TypeError, KeyError):
+      raise ModerationError('Expected {"action": ..., "ids": [...]}')
+  try:
+    return request.POST.get('action'), [int(pk) for pk in request.POST.getlist('ids')]
+  except ValueError:
+    raise ModerationError('Invalid post id')
+
+@login_required
+@require_POST
+def postModerate(request):
+  # publica, despublica ou apaga varios posts de uma vez
+  try:
+    action, ids = moderationRequest(request)
+    rows = owned_posts(request.user, ids)
+    count = moderate(action, rows)
+  except ModerationError as error:
+    status = 403 if error.ids else 400
+    return JsonResponse({'error': str(error), 'ids': error.ids}, status=status)
+  pin_to_primary(request)
+  return JsonResponse({'action': action, 'ids': sorted(rows), 'count': count})
+
 @login_required
 def postEdit(request, pk):
     post = get_object_or_404(Post, pk=pk)
@@ -111,6 +293,7 @@ def postEdit(request, pk):
             post.author = request.user
             post.published_date = timezone.now()
             post.save()
+            pin_to_primary(request)
             return redirect('postDetail', pk=post.pk)
     else:
         form = PostForm(instance=post)
@@ -9,8 +9,17 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
+from asgiref.sync import ThreadSensitiveContext
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mysite.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+
+async def application(scope, receive, send):
+    # O ASGIHandler do Django 3.2 manda todo codigo thread_sensitive para uma
+    # unica thread global, serializando os requests. Um contexto por request
+    # (como o Django 4.0 faz) da a cada request a sua thread e a sua conexao.
+    async with ThreadSensitiveContext():
+        await django_application(scope, receive, send)
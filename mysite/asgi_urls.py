@@ -0,0 +1,9 @@
+from django.urls import path, include
+
+from .urls import accountpatterns
+
+# Mesmas rotas de mysite.urls, com as views de leitura async do blog. Usado nos
+# requests ASGI via BLOG_ASGI_URLCONF (blog.middleware.AsgiUrlconfMiddleware).
+urlpatterns = accountpatterns + [
+    path('', include('blog.async_urls'))
+]
@@ -46,6 +46,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'blog.instrumentation.QueryTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -53,13 +54,17 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'blog.middleware.AsgiUrlconfMiddleware',
 ]
 
 ROOT_URLCONF = 'mysite.urls'
 
+# Requests ASGI (mysite/asgi.py) usam as versoes async das views de leitura.
+BLOG_ASGI_URLCONF = 'mysite.asgi_urls'
+
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'blog.instrumentation.TimedDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -85,9 +90,123 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Conexoes persistentes: cada thread do servidor reaproveita a sua
+        # conexao (e os PRAGMAs abaixo) por ate 60s. No ASGI do Django 3.2 cada
+        # request tem a sua thread, entao ali use 0.
+        'CONN_MAX_AGE': 60,
+    }
+}
+
+# Replicas de leitura (blog.replicas): aliases de DATABASES usados, em
+# round-robin, pelas views de leitura. Depois de postNew/postEdit/postPublish/
+# postRemove a sessao le do primario por BLOG_REPLICA_LAG_SECONDS, que tambem e
+# o tempo maximo no cache das paginas lidas de uma replica. Com SQLite,
+# "manage.py sync_replicas" copia o primario para as replicas (ver
+# mysite/settings_replicas.py).
+
+DATABASE_ROUTERS = ['blog.replicas.ReplicaRouter']
+BLOG_READ_REPLICAS = []
+BLOG_REPLICA_LAG_SECONDS = 5
+
+# PRAGMAs aplicados em toda conexao SQLite nova (blog.db); {} desliga.
+# WAL deixa leitores lerem enquanto postNew/postEdit gravam; com WAL,
+# synchronous=NORMAL so sincroniza o disco nos checkpoints. cache_size negativo
+# e em KiB; busy_timeout (ms) vem primeiro para a troca de journal_mode esperar
+# outro processo em vez de falhar.
+
+BLOG_SQLITE_PRAGMAS = {
+    'busy_timeout': 5000,
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -20000,
+    'mmap_size': 128 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# As paginas do blog ficam no alias BLOG_CACHE; para cache em disco troque o
+# BACKEND por 'django.core.cache.backends.filebased.FileBasedCache' e o
+# LOCATION por um diretorio, ex.: BASE_DIR / 'cache'. O LocMemCache e de cada
+# processo: o que o run_jobs e os comandos (import_posts, render_posts,
+# rebuild_*) invalidam nao chega ao servidor web.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'blog',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
     }
 }
 
+BLOG_CACHE = 'default'
+BLOG_CACHE_VIEWS = True
+BLOG_CACHE_ANONYMOUS_ONLY = True
+
+
+# Fila de jobs (blog.jobs, comando run_jobs). Com BLOG_WARM_PAGES cada escrita
+# enfileira a regeracao das paginas que invalidou; so vale a pena com um cache
+# compartilhado entre processos e com o run_jobs rodando. Com
+# BLOG_RELATED_IN_BACKGROUND os posts relacionados sao recalculados pelo
+# run_jobs em vez de na requisicao que publicou ou mudou as categorias; o job
+# invalida as paginas no cache, que entao tambem precisa ser compartilhado (o
+# check blog.E001 recusa o LocMemCache).
+
+BLOG_WARM_PAGES = False
+BLOG_RELATED_IN_BACKGROUND = False
+BLOG_JOBS_RETRY_DELAY = 30
+
+
+# Visualizacoes dos posts (blog.counters): acumuladas em memoria e gravadas a
+# cada BLOG_VIEW_FLUSH_INTERVAL segundos (mesmo sem visitas novas) ou
+# BLOG_VIEW_FLUSH_THRESHOLD visitas, e no fim do processo. BLOG_VIEW_FLUSH_TIMER
+# grava tambem as visitas paradas (sem visitas novas); o test runner desliga.
+
+BLOG_VIEW_COUNTS = True
+BLOG_VIEW_FLUSH_INTERVAL = 10
+BLOG_VIEW_FLUSH_TIMER = True
+BLOG_VIEW_FLUSH_THRESHOLD = 100
+BLOG_MOST_VIEWED = 10
+
+
+# Saida do comando build_static_site (blog.static_site): o blog em HTML estatico.
+
+BLOG_STATIC_SITE_DIR = BASE_DIR / 'site'
+
+
+# Instrumentacao por request (blog.instrumentation): header Server-Timing com
+# consultas, tempo de SQL, de template e total; requests acima do limite vao
+# para o log rotativo abaixo, com o SQL executado.
+
+BLOG_QUERY_TIMING = False
+BLOG_SLOW_REQUEST_MS = 500
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'slow_requests': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': BASE_DIR / 'slow_requests.log',
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'delay': True,
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'blog.slow_requests': {
+            'handlers': ['slow_requests'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -127,9 +246,35 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'static'
 
+# Pipeline de CSS (blog.assets): o collectstatic junta e minifica o CSS de
+# cada pagina, poe o hash do conteudo no nome e grava versoes .gz/.br. As
+# fontes vem do Google Fonts uma vez, no build:
+#     python3 manage.py download_fonts && python3 manage.py collectstatic
+# Com BLOG_SERVE_STATIC o proprio Django serve o STATIC_ROOT, com
+# Cache-Control immutable para os arquivos com hash (sem servidor web na frente).
+
+STATICFILES_STORAGE = 'blog.assets.AssetStorage'
+
+BLOG_CSS_BUNDLES = {
+    'postList': ['css/fonts.css', 'css/postList.css'],
+    'postDetail': ['css/fonts.css', 'css/postDetail.css'],
+    'postNew': ['css/fonts.css', 'css/postNew.css'],
+    'login': ['css/fonts.css', 'css/login.css'],
+    'register': ['css/fonts.css', 'css/register.css'],
+}
+
+BLOG_WEB_FONTS = ['Libre Baskerville', 'Roboto:wght@400;900']
+
+BLOG_SERVE_STATIC = False
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
 #os.environ["DJANGO_ALLOW_ASYNC_UNSAFE"] = "true"
 
-DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Test runner do blog (blog.testrunner): desliga o timer das visualizacoes.
+
+TEST_RUNNER = 'blog.testrunner.BlogTestRunner'
@@ -0,0 +1,15 @@
+# Primario e duas replicas em arquivos SQLite, para testar o roteamento local:
+#
+#     python3 manage.py sync_replicas --settings mysite.settings_replicas
+#     python3 manage.py runserver --settings mysite.settings_replicas
+#
+# As replicas so mudam no proximo sync_replicas, o que simula o atraso de
+# replicacao.
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, DATABASES
+
+for alias in ('replica1', 'replica2'):
+    DATABASES[alias] = dict(DATABASES['default'], NAME=BASE_DIR / ('db.%s.sqlite3' % alias))
+
+BLOG_READ_REPLICAS = ['replica1', 'replica2']
@@ -1,11 +1,20 @@
-from django.urls import path, include
+from django.conf import settings
+from django.urls import path, include, re_path
 from django.contrib import admin
 
 from django.contrib.auth import views
 
-urlpatterns = [
+from blog import assets
+
+accountpatterns = [
     path('admin/', admin.site.urls),
     path('accounts/login/', views.LoginView.as_view(), name='login'),
     path('accounts/logout/', views.LogoutView.as_view(next_page='/'), name='logout'),
+]
+
+if getattr(settings, 'BLOG_SERVE_STATIC', False):
+    accountpatterns.append(re_path(r'^%s(?P<path>.+)$' % settings.STATIC_URL.lstrip('/'), assets.serve))
+
+urlpatterns = accountpatterns + [
     path('', include('blog.urls'))
-]
\ No newline at end of file
+]